@@ -7,6 +7,7 @@ import os
 import sys
 from google.cloud import bigquery
 import json
+from gcp_vm_inventory.utils import get_credentials
 
 # Project ID from our demo dataset
 PROJECT_ID = "sites-web-273920"
@@ -19,7 +20,7 @@ def diagnose_bigquery_access():
     # 1. Test basic client creation
     try:
         print("\n1. Creating BigQuery client...")
-        client = bigquery.Client(project=PROJECT_ID)
+        client = bigquery.Client(project=PROJECT_ID, credentials=get_credentials())
         print(f"✓ Client created successfully with project: {client.project}")
     except Exception as e:
         print(f"✗ Failed to create client: {str(e)}")
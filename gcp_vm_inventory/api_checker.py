@@ -7,12 +7,94 @@ for projects.
 
 import subprocess
 import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from .core import run_gcloud_command, get_projects
+from .utils import gcloud_env
+
+# Maximum number of concurrent gcloud invocations
+MAX_WORKERS = 16
+
+# Colored display of each API status
+_STATUS_DISPLAY = {
+    "OK": "\033[92mAPI [OK]\033[0m",                  # Green
+    "MISSING": "\033[91mAPI [MISSING]\033[0m",        # Red
+    "CREDENTIAL_ISSUE": "\033[93mAPI [CREDENTIAL_ISSUE]\033[0m",  # Yellow
+    "ERROR": "\033[91mAPI [ERROR]\033[0m"             # Red
+}
+
+
+# Seconds during which the API statuses of a project are reused
+API_STATUS_TTL = 300
+
+# Statuses of an API that could be checked, as opposed to errors. Only these are reused.
+CHECKED_STATUSES = ("OK", "MISSING")
+
+# APIs required by the inventory, with their display names
+REQUIRED_APIS = {
+    "compute.googleapis.com": "Compute Engine API",
+    "sqladmin.googleapis.com": "Cloud SQL Admin API",
+    "bigquery.googleapis.com": "BigQuery API",
+    "container.googleapis.com": "Kubernetes Engine API"
+}
+
+# Statuses of the required APIs checked so far, keyed by (project_id, service_account_key),
+# with the time they were checked at
+_api_statuses = {}
+_api_statuses_lock = threading.Lock()
+
+
+def _list_api_statuses(project_id, service_account_key=None):
+    """Get the status of each required API of a project with one gcloud command.
+    
+    Args:
+        project_id: The GCP project ID to check
+        service_account_key: Path to service account key file (optional)
+    
+    Returns:
+        Dictionary mapping API IDs to status strings
+    """
+    # List the enabled services once and check every required API against them,
+    # instead of running one gcloud command per API
+    command = [
+        "gcloud", "services", "list", "--enabled",
+        "--project", project_id,
+        "--format=value(config.name)",
+        "--quiet"
+    ]
+    
+    try:
+        result = subprocess.run(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=True,
+            text=True,
+            env=gcloud_env(service_account_key)
+        )
+    except subprocess.CalledProcessError as e:
+        if "PERMISSION_DENIED" in e.stderr:
+            status = "CREDENTIAL_ISSUE"
+        else:
+            status = "ERROR"
+        return dict.fromkeys(REQUIRED_APIS, status)
+    
+    enabled_apis = set(result.stdout.split())
+    return {
+        api_id: "OK" if api_id in enabled_apis else "MISSING"
+        for api_id in REQUIRED_APIS
+    }
 
 
 def check_required_apis(project_id, service_account_key=None):
     """Check if required APIs are enabled for a project.
     
+    Statuses are reused for API_STATUS_TTL seconds, so that the API check and the
+    collectors skipping disabled APIs list the services of a project once. Errors
+    are not reused, and every call returns a new dictionary.
+    
     Args:
         project_id: The GCP project ID to check
         service_account_key: Path to service account key file (optional)
@@ -20,55 +102,52 @@ def check_required_apis(project_id, service_account_key=None):
     Returns:
         Dictionary with API status information
     """
-    required_apis = {
-        "compute.googleapis.com": "Compute Engine API",
-        "sqladmin.googleapis.com": "Cloud SQL Admin API",
-        "bigquery.googleapis.com": "BigQuery API",
-        "container.googleapis.com": "Kubernetes Engine API"
-    }
+    cache_key = (project_id, service_account_key)
+    with _api_statuses_lock:
+        entry = _api_statuses.get(cache_key)
+    
+    if entry is not None and time.monotonic() - entry[0] < API_STATUS_TTL:
+        statuses = entry[1]
+    else:
+        statuses = _list_api_statuses(project_id, service_account_key)
+        if all(status in CHECKED_STATUSES for status in statuses.values()):
+            with _api_statuses_lock:
+                _api_statuses[cache_key] = (time.monotonic(), statuses)
     
     results = {}
     
-    for api_id, api_name in required_apis.items():
-        # Check if the API is enabled
-        command = [
-            "gcloud", "services", "list",
-            "--project", project_id,
-            "--filter", f"config.name:{api_id}",
-            "--format=value(state)",
-            "--quiet"
-        ]
-        
-        try:
-            result = subprocess.run(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                check=True,
-                text=True
-            )
-            
-            output = result.stdout.strip()
-            
-            if output == "ENABLED":
-                status = "OK"
-            else:
-                status = "MISSING"
-                
-        except subprocess.CalledProcessError as e:
-            if "PERMISSION_DENIED" in e.stderr:
-                status = "CREDENTIAL_ISSUE"
-            else:
-                status = "ERROR"
-        
+    for api_id, api_name in REQUIRED_APIS.items():
         results[api_id] = {
             "name": api_name,
-            "status": status
+            "status": statuses[api_id]
         }
     
     return results
 
 
+def invalidate_api_status_cache():
+    """Forget the API statuses checked so far, so that the next checks list the services again."""
+    with _api_statuses_lock:
+        _api_statuses.clear()
+
+
+def is_api_disabled(project_id, api_id, service_account_key=None):
+    """Check whether a required API is known to be disabled for a project.
+    
+    Projects whose services could not be listed are not reported as disabled, so
+    that their resources are still collected.
+    
+    Args:
+        project_id: The GCP project ID to check
+        api_id: ID of one of the required APIs (e.g. "sqladmin.googleapis.com")
+        service_account_key: Path to service account key file (optional)
+    
+    Returns:
+        Boolean indicating if the API is not enabled
+    """
+    return check_required_apis(project_id, service_account_key)[api_id]["status"] == "MISSING"
+
+
 def check_apis_for_projects(projects=None, service_account_key=None):
     """Check required APIs for all projects or a specific project.
     
@@ -79,8 +158,6 @@ def check_apis_for_projects(projects=None, service_account_key=None):
     Returns:
         Dictionary mapping project IDs to API status information
     """
-    project_api_status = {}
-    
     if isinstance(projects, str):
         # Single project ID provided
         projects = [projects]
@@ -93,10 +170,13 @@ def check_apis_for_projects(projects=None, service_account_key=None):
         
         projects = [p.get('projectId') for p in projects_data]
     
-    for project_id in projects:
+    def check_project(project_id):
         print(f"Checking API status for project: {project_id}")
-        api_status = check_required_apis(project_id, service_account_key)
-        project_api_status[project_id] = api_status
+        return check_required_apis(project_id, service_account_key)
+    
+    # Each check is an independent gcloud subprocess, so run them concurrently
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        project_api_status = dict(zip(projects, executor.map(check_project, projects)))
     
     return project_api_status
 
@@ -110,26 +190,27 @@ def display_api_status(project_api_status):
     Returns:
         Boolean indicating if all APIs are OK
     """
-    print("\n=== API Status Check Results ===")
+    # Write the whole report with a single call rather than one print per API
+    lines = ["\n=== API Status Check Results ==="]
+    
+    # Colors are only used on a terminal, redirected output gets the plain statuses
+    status_table = _STATUS_DISPLAY if sys.stdout.isatty() else {}
     
     all_apis_ok = True
     
     for project_id, api_status in project_api_status.items():
-        print(f"\nProject: {project_id}")
+        lines.append(f"\nProject: {project_id}")
         
         for api_id, info in api_status.items():
-            status_display = {
-                "OK": "\033[92mAPI [OK]\033[0m",                  # Green
-                "MISSING": "\033[91mAPI [MISSING]\033[0m",        # Red
-                "CREDENTIAL_ISSUE": "\033[93mAPI [CREDENTIAL_ISSUE]\033[0m",  # Yellow
-                "ERROR": "\033[91mAPI [ERROR]\033[0m"             # Red
-            }.get(info["status"], f"API [{info['status']}]")
+            status_display = status_table.get(info["status"], f"API [{info['status']}]")
             
-            print(f"  {info['name']} ({api_id}): {status_display}")
+            lines.append(f"  {info['name']} ({api_id}): {status_display}")
             
             if info["status"] != "OK":
                 all_apis_ok = False
     
+    sys.stdout.write("\n".join(lines) + "\n")
+    
     return all_apis_ok
 
 
@@ -5,10 +5,18 @@ This module provides functionality to collect BigQuery inventory data from GCP.
 """
 
 import logging
-from typing import Dict, List, Optional, Any
-from google.cloud import bigquery
+import operator
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Any, Tuple
+import requests
+from google.api_core import exceptions, retry
 from .gcp_client import GCPClient
-from .models import BigQueryDatasetInfo
+from .models import BigQueryDatasetInfo, BigQueryDatasetSummary, BigQueryTableInfo
+from .utils import BYTES_PER_GB, DEFAULT_CONCURRENCY, DEFAULT_PAGE_SIZE, TABLE_TYPES
+
+if TYPE_CHECKING:
+    from google.cloud import bigquery
 
 # Configure logging
 logging.basicConfig(
@@ -17,74 +25,256 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Number of projects processed concurrently
+PROJECT_WORKERS = 8
+
+# Number of tables fetched concurrently when their details are not available from __TABLES__
+TABLE_DETAIL_WORKERS = 8
+
+# Errors after which a BigQuery request is worth retrying
+TRANSIENT_ERRORS = (
+    exceptions.TooManyRequests,
+    exceptions.InternalServerError,
+    exceptions.BadGateway,
+    exceptions.ServiceUnavailable,
+    exceptions.DeadlineExceeded,
+    requests.exceptions.ConnectionError
+)
+
+# Error reasons of 403 responses that BigQuery uses for rate limits
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'backendError'}
+
+
+def _is_transient_error(exc: Exception) -> bool:
+    """Check whether a failed BigQuery request should be retried.
+    
+    Args:
+        exc: The exception raised by the request
+        
+    Returns:
+        True if the error is transient
+    """
+    if isinstance(exc, TRANSIENT_ERRORS):
+        return True
+    return isinstance(exc, exceptions.Forbidden) and any(
+        error.get('reason') in RATE_LIMIT_REASONS for error in exc.errors or []
+    )
+
+
+# Retry policy of BigQuery requests, backing off exponentially on rate limits
+BQ_RETRY = retry.Retry(
+    predicate=_is_transient_error,
+    initial=1.0,
+    maximum=30.0,
+    multiplier=2.0,
+    deadline=300.0
+)
+
 
 class BigQueryInventory:
     """Class for collecting BigQuery inventory data from GCP."""
     
-    def __init__(self, client: GCPClient):
+    def __init__(self, client: GCPClient, max_workers: int = DEFAULT_CONCURRENCY,
+                 page_size: int = DEFAULT_PAGE_SIZE):
         """Initialize the BigQuery inventory collector.
         
         Args:
             client: GCP client instance
+            max_workers: Maximum number of datasets processed concurrently
+            page_size: Number of datasets or tables requested per page when listing them
         """
         self.client = client
-        self._bq_client = None
+        self.max_workers = max_workers
+        self.page_size = page_size
+        # Shared by all projects, so it caps the datasets in flight across projects.
+        # Its threads are only started as work is submitted.
+        self._dataset_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bq-dataset')
+        self._bq_clients = {}
+        self._bq_clients_lock = threading.Lock()
+        self._location_cache = {}
+        self._dataset_times = {}
+        self._full_datasets = {}
     
-    def _get_bq_client(self) -> Optional[bigquery.Client]:
-        """Get a BigQuery client.
+    def _get_bq_client(self, project_id: Optional[str] = None) -> Optional["bigquery.Client"]:
+        """Get a BigQuery client for a project.
+        
+        Each project gets its own client, so projects can be processed concurrently
+        without sharing mutable state.
         
+        Args:
+            project_id: The GCP project ID (defaults to the client's project)
+            
         Returns:
             BigQuery client or None if creation failed
         """
-        if not self._bq_client:
-            self._bq_client = self.client.get_bigquery_client()
-        return self._bq_client
+        project_id = project_id or self.client.project_id
+        with self._bq_clients_lock:
+            if not self._bq_clients.get(project_id):
+                self._bq_clients[project_id] = self.client.get_bigquery_client(project_id)
+            return self._bq_clients[project_id]
     
-    def get_datasets(self, project_id: str) -> List[Dict[str, Any]]:
-        """Get all BigQuery datasets in a specific project.
+    def _get_full_dataset(self, bq_client: "bigquery.Client", project_id: str, dataset_id: str) -> "bigquery.Dataset":
+        """Fetch a dataset, at most once per inventory run.
         
         Args:
+            bq_client: BigQuery client
             project_id: The GCP project ID
+            dataset_id: The BigQuery dataset ID
             
         Returns:
-            List of dataset dictionaries
+            The full BigQuery dataset
         """
-        bq_client = self._get_bq_client()
-        if not bq_client:
-            logger.error(f"Could not create BigQuery client for project {project_id}")
-            return []
+        key = (project_id, dataset_id)
+        dataset = self._full_datasets.get(key)
+        if dataset is None:
+            dataset = bq_client.get_dataset(bq_client.dataset(dataset_id), retry=BQ_RETRY)
+            self._full_datasets[key] = dataset
+        return dataset
+    
+    def _query_schemata_locations(self, bq_client: "bigquery.Client", project_id: str,
+                                  region: str) -> Optional[Dict[str, str]]:
+        """Get the locations of all datasets of a project in one region with a single query.
+        
+        The creation and last modification times of the datasets are read by the same
+        query and recorded for get_datasets.
+        
+        Args:
+            bq_client: BigQuery client
+            project_id: The GCP project ID
+            region: The BigQuery region or multi-region (e.g. "US", "europe-west1")
             
+        Returns:
+            Dictionary mapping dataset IDs to locations or None if the query failed
+        """
+        query = (
+            f"SELECT schema_name, location, creation_time, last_modified_time "
+            f"FROM `{project_id}`.`region-{region.lower()}`.INFORMATION_SCHEMA.SCHEMATA"
+        )
         try:
-            datasets = list(bq_client.list_datasets())
+            rows = list(bq_client.query(query, retry=BQ_RETRY).result())
+        except Exception as e:
+            logger.warning(f"Could not query dataset locations in {region} for project {project_id}: {str(e)}")
+            return None
+        
+        times = self._dataset_times.setdefault(project_id, {})
+        for row in rows:
+            times[row.schema_name] = (
+                row.creation_time.timestamp() * 1000 if row.creation_time else None,
+                row.last_modified_time.timestamp() * 1000 if row.last_modified_time else None
+            )
+        return {row.schema_name: row.location for row in rows}
+    
+    def get_dataset_locations(self, project_id: str, dataset_ids: List[str]) -> Dict[str, str]:
+        """Get the locations of datasets in a specific project.
+        
+        DatasetListItem objects don't have a location, so one dataset is fetched to
+        discover a region, and the locations of every dataset in that region are then
+        read from its INFORMATION_SCHEMA.SCHEMATA view in a single query. This repeats
+        until all datasets are resolved, so the number of calls grows with the number
+        of regions rather than the number of datasets.
+        
+        If the view cannot be queried, the remaining datasets are assumed to be in the
+        location of the last fetched dataset, as most projects keep their datasets in a
+        single location. extract_dataset_info corrects the guess, as it has to fetch
+        these datasets for their creation times anyway.
+        
+        Args:
+            project_id: The GCP project ID
+            dataset_ids: The BigQuery dataset IDs
             
-            # Convert to a format similar to CLI output for compatibility
-            result = []
-            for dataset in datasets:
-                # DatasetListItem objects don't have a location attribute
-                # We need to get the full dataset to access the location
-                try:
-                    dataset_ref = bq_client.dataset(dataset.dataset_id)
-                    full_dataset = bq_client.get_dataset(dataset_ref)
-                    location = full_dataset.location
-                except Exception as e:
-                    logger.warning(f"Could not get location for dataset {dataset.dataset_id}: {str(e)}")
-                    location = "unknown"
-                    
-                result.append({
-                    'datasetReference': {
-                        'datasetId': dataset.dataset_id,
-                        'projectId': project_id
-                    },
-                    'id': f"{project_id}:{dataset.dataset_id}",
-                    'kind': 'bigquery#dataset',
-                    'location': location
-                })
-            
-            logger.info(f"Found {len(result)} datasets in project {project_id}")
-            return result
+        Returns:
+            Dictionary mapping dataset IDs to locations
+        """
+        locations = self._location_cache.setdefault(project_id, {})
+        unresolved = [dataset_id for dataset_id in dataset_ids if dataset_id not in locations]
+        if not unresolved:
+            return locations
+        
+        bq_client = self._get_bq_client(project_id)
+        queried_regions = set()
+        
+        for dataset_id in unresolved:
+            if dataset_id in locations:
+                continue
+            
+            try:
+                dataset = self._get_full_dataset(bq_client, project_id, dataset_id)
+                location = dataset.location
+                self._dataset_times.setdefault(project_id, {})[dataset_id] = (
+                    dataset.created.timestamp() * 1000 if dataset.created else None,
+                    dataset.modified.timestamp() * 1000 if dataset.modified else None
+                )
+            except Exception as e:
+                logger.warning(f"Could not get location for dataset {dataset_id}: {str(e)}")
+                location = "unknown"
+            locations[dataset_id] = location
+            
+            # Resolve the other datasets of the same region at once
+            remaining = sum(1 for other_id in unresolved if other_id not in locations)
+            if remaining and location != "unknown" and location.lower() not in queried_regions:
+                queried_regions.add(location.lower())
+                region_locations = self._query_schemata_locations(bq_client, project_id, location)
+                if region_locations is None:
+                    for other_id in unresolved:
+                        locations.setdefault(other_id, location)
+                    break
+                locations.update(region_locations)
+        
+        return locations
+    
+    def iter_dataset_summaries(self, project_id: str) -> Iterator[BigQueryDatasetSummary]:
+        """Get all BigQuery datasets in a specific project, one page at a time.
+        
+        Datasets are yielded as soon as their page is listed and their locations are
+        resolved, so they can be processed while the next pages are being fetched.
+        The creation and last modification times are included when they were read
+        while resolving the dataset locations, so that extract_dataset_info does not
+        need to fetch the dataset again.
+        
+        Args:
+            project_id: The GCP project ID
+            
+        Yields:
+            BigQueryDatasetSummary objects
+        """
+        bq_client = self._get_bq_client(project_id)
+        if not bq_client:
+            logger.error(f"Could not create BigQuery client for project {project_id}")
+            return
+        
+        count = 0
+        try:
+            for page in bq_client.list_datasets(page_size=self.page_size, retry=BQ_RETRY).pages:
+                datasets = list(page)
+                locations = self.get_dataset_locations(
+                    project_id, [dataset.dataset_id for dataset in datasets]
+                )
+                times = self._dataset_times.get(project_id, {})
+                
+                for dataset in datasets:
+                    yield BigQueryDatasetSummary(
+                        project_id,
+                        dataset.dataset_id,
+                        locations.get(dataset.dataset_id, "unknown"),
+                        *times.get(dataset.dataset_id, (None, None))
+                    )
+                count += len(datasets)
         except Exception as e:
             logger.error(f"Error getting BigQuery datasets for project {project_id}: {str(e)}")
-            return []
+            return
+        
+        logger.info(f"Found {count} datasets in project {project_id}")
+    
+    def get_datasets(self, project_id: str) -> List[BigQueryDatasetSummary]:
+        """Get all BigQuery datasets in a specific project.
+        
+        Args:
+            project_id: The GCP project ID
+            
+        Returns:
+            List of BigQueryDatasetSummary objects
+        """
+        return list(self.iter_dataset_summaries(project_id))
     
     def get_dataset_info(self, project_id: str, dataset_id: str) -> Optional[Dict[str, Any]]:
         """Get detailed information about a BigQuery dataset.
@@ -96,13 +286,12 @@ class BigQueryInventory:
         Returns:
             Dictionary with dataset information or None if not available
         """
-        bq_client = self._get_bq_client()
+        bq_client = self._get_bq_client(project_id)
         if not bq_client:
             return None
             
         try:
-            dataset_ref = bq_client.dataset(dataset_id)
-            dataset = bq_client.get_dataset(dataset_ref)
+            dataset = self._get_full_dataset(bq_client, project_id, dataset_id)
             
             # Convert to a dictionary format
             return {
@@ -120,55 +309,112 @@ class BigQueryInventory:
             logger.error(f"Error getting BigQuery dataset info for {project_id}:{dataset_id}: {str(e)}")
             return None
     
-    def get_tables(self, project_id: str, dataset_id: str) -> List[Dict[str, Any]]:
+    def _query_table_details(self, bq_client: "bigquery.Client", project_id: str,
+                             dataset_id: str) -> Dict[str, Dict[str, Any]]:
+        """Get the details of all tables in a dataset with a single __TABLES__ query.
+        
+        Args:
+            bq_client: BigQuery client
+            project_id: The GCP project ID
+            dataset_id: The BigQuery dataset ID
+            
+        Returns:
+            Dictionary mapping table IDs to table details, empty if the query failed
+        """
+        query = (
+            f"SELECT table_id, row_count, size_bytes, creation_time, last_modified_time, type "
+            f"FROM `{project_id}.{dataset_id}.__TABLES__`"
+        )
+        try:
+            rows = bq_client.query(query, retry=BQ_RETRY).result()
+        except Exception as e:
+            logger.warning(f"Could not query table details for {project_id}:{dataset_id}: {str(e)}")
+            return {}
+        
+        return {
+            row.table_id: {
+                'num_bytes': row.size_bytes,
+                'num_rows': row.row_count,
+                'creation_time': row.creation_time,
+                'last_modified_time': row.last_modified_time,
+                'table_type': TABLE_TYPES.get(row.type, 'N/A')
+            }
+            for row in rows
+        }
+    
+    def _get_table_details(self, bq_client: "bigquery.Client", table: Any) -> Dict[str, Any]:
+        """Get the details of a single table.
+        
+        Args:
+            bq_client: BigQuery client
+            table: TableListItem of the table
+            
+        Returns:
+            Dictionary with table details
+        """
+        try:
+            table_ref = bq_client.get_table(table.reference, retry=BQ_RETRY)
+            return {
+                'num_bytes': table_ref.num_bytes,
+                'num_rows': table_ref.num_rows,
+                'creation_time': table_ref.created.timestamp() * 1000 if table_ref.created else None,
+                'last_modified_time': table_ref.modified.timestamp() * 1000 if table_ref.modified else None,
+                'table_type': table_ref.table_type
+            }
+        except Exception as e:
+            logger.warning(f"Error getting details for table {table.table_id}: {str(e)}")
+            # Add basic info without details
+            return {
+                'num_bytes': 0,
+                'num_rows': 0,
+                'creation_time': None,
+                'last_modified_time': None,
+                'table_type': None
+            }
+    
+    def get_tables(self, project_id: str, dataset_id: str, query_meta_table: bool = True) -> List[BigQueryTableInfo]:
         """Get all tables in a BigQuery dataset.
         
+        Table details are read for the whole dataset from its __TABLES__ meta-table.
+        Tables missing from it (e.g. when the query is not allowed) are fetched
+        individually and concurrently.
+        
         Args:
             project_id: The GCP project ID
             dataset_id: The BigQuery dataset ID
+            query_meta_table: Whether to query __TABLES__, rather than only fetching
+                every table individually (e.g. when the meta-table is known to fail)
             
         Returns:
-            List of table dictionaries
+            List of BigQueryTableInfo objects
         """
-        bq_client = self._get_bq_client()
+        bq_client = self._get_bq_client(project_id)
         if not bq_client:
             return []
             
         try:
-            dataset_ref = bq_client.dataset(dataset_id)
-            tables = list(bq_client.list_tables(dataset_ref))
+            # Get detailed information for all tables at once
+            details = self._query_table_details(bq_client, project_id, dataset_id) if query_meta_table else {}
             
-            # Get detailed information for each table
+            # Match the listed tables with their details while the pages are fetched
             result = []
-            for table in tables:
-                try:
-                    table_ref = bq_client.get_table(table.reference)
-                    result.append({
-                        'id': f"{project_id}:{dataset_id}.{table.table_id}",
-                        'tableReference': {
-                            'projectId': project_id,
-                            'datasetId': dataset_id,
-                            'tableId': table.table_id
-                        },
-                        'numBytes': table_ref.num_bytes,
-                        'numRows': table_ref.num_rows,
-                        'creationTime': table_ref.created.timestamp() * 1000 if table_ref.created else None,
-                        'lastModifiedTime': table_ref.modified.timestamp() * 1000 if table_ref.modified else None,
-                        'type': table_ref.table_type
-                    })
-                except Exception as e:
-                    logger.warning(f"Error getting details for table {table.table_id}: {str(e)}")
-                    # Add basic info without details
-                    result.append({
-                        'id': f"{project_id}:{dataset_id}.{table.table_id}",
-                        'tableReference': {
-                            'projectId': project_id,
-                            'datasetId': dataset_id,
-                            'tableId': table.table_id
-                        },
-                        'numBytes': 0,
-                        'numRows': 0
-                    })
+            missing = []
+            dataset_ref = bq_client.dataset(dataset_id)
+            for table in bq_client.list_tables(dataset_ref, page_size=self.page_size, retry=BQ_RETRY):
+                if table.table_id in details:
+                    result.append(BigQueryTableInfo(project_id, dataset_id, table.table_id, **details[table.table_id]))
+                else:
+                    missing.append(table)
+            
+            if missing:
+                with ThreadPoolExecutor(max_workers=TABLE_DETAIL_WORKERS) as executor:
+                    missing_details = executor.map(
+                        lambda table: self._get_table_details(bq_client, table), missing
+                    )
+                    result.extend(
+                        BigQueryTableInfo(project_id, dataset_id, table.table_id, **table_details)
+                        for table, table_details in zip(missing, missing_details)
+                    )
             
             logger.info(f"Found {len(result)} tables in dataset {dataset_id}")
             return result
@@ -176,34 +422,74 @@ class BigQueryInventory:
             logger.error(f"Error getting BigQuery tables for {project_id}:{dataset_id}: {str(e)}")
             return []
     
-    def extract_dataset_info(self, project_id: str, dataset_id: str, location: str) -> Optional[BigQueryDatasetInfo]:
+    def get_table_summary(self, project_id: str, dataset_id: str) -> Tuple[int, int]:
+        """Get the number of tables and their total size in a BigQuery dataset.
+        
+        The aggregates are computed by a single query on the dataset's __TABLES__
+        meta-table, without listing the tables. If the query fails, they are computed
+        from the tables, listed and fetched one by one without querying __TABLES__ again.
+        
+        Args:
+            project_id: The GCP project ID
+            dataset_id: The BigQuery dataset ID
+            
+        Returns:
+            Tuple of (table_count, total_size_bytes)
+        """
+        bq_client = self._get_bq_client(project_id)
+        if not bq_client:
+            return 0, 0
+        
+        query = (
+            f"SELECT COUNT(*) AS table_count, SUM(size_bytes) AS total_size_bytes "
+            f"FROM `{project_id}.{dataset_id}.__TABLES__`"
+        )
+        try:
+            for row in bq_client.query(query, retry=BQ_RETRY).result():
+                return row.table_count, row.total_size_bytes or 0
+        except Exception as e:
+            logger.warning(f"Could not query table summary for {project_id}:{dataset_id}: {str(e)}")
+        
+        tables = self.get_tables(project_id, dataset_id, query_meta_table=False)
+        # Summed by builtins over the attribute values, skipping unknown (None) sizes
+        return len(tables), sum(filter(None, map(operator.attrgetter('num_bytes'), tables)))
+    
+    def extract_dataset_info(self, project_id: str, dataset_id: str, location: str,
+                             creation_time: Optional[float] = None,
+                             last_modified_time: Optional[float] = None) -> Optional[BigQueryDatasetInfo]:
         """Extract BigQuery dataset information.
         
+        The dataset is only fetched when its creation time is not given, which also
+        happens when its location had to be guessed by get_dataset_locations.
+        
         Args:
             project_id: The GCP project ID
             dataset_id: The BigQuery dataset ID
             location: The dataset location
+            creation_time: The dataset creation time in milliseconds (optional)
+            last_modified_time: The dataset last modification time in milliseconds (optional)
             
         Returns:
             BigQueryDatasetInfo object or None if extraction failed
         """
-        bq_client = self._get_bq_client()
+        bq_client = self._get_bq_client(project_id)
         if not bq_client:
             return None
             
         try:
-            # Get dataset details
-            dataset_ref = bq_client.dataset(dataset_id)
-            full_dataset = bq_client.get_dataset(dataset_ref)
-            creation_time = full_dataset.created.timestamp() * 1000 if full_dataset.created else None
-            last_modified_time = full_dataset.modified.timestamp() * 1000 if full_dataset.modified else None
-            
-            # Get tables in the dataset
-            tables = self.get_tables(project_id, dataset_id)
+            if creation_time is None:
+                # Get dataset details
+                full_dataset = self._get_full_dataset(bq_client, project_id, dataset_id)
+                if full_dataset.location and full_dataset.location != location:
+                    # Correct a location that get_dataset_locations had to guess
+                    location = full_dataset.location
+                    self._location_cache.setdefault(project_id, {})[dataset_id] = location
+                creation_time = full_dataset.created.timestamp() * 1000 if full_dataset.created else None
+                last_modified_time = full_dataset.modified.timestamp() * 1000 if full_dataset.modified else None
             
-            # Calculate total storage
-            total_size_bytes = sum(table.get('numBytes', 0) for table in tables if 'numBytes' in table)
-            total_size_gb = round(total_size_bytes / (1024 * 1024 * 1024), 2) if total_size_bytes > 0 else 0
+            # Get the table count and total storage of the dataset
+            table_count, total_size_bytes = self.get_table_summary(project_id, dataset_id)
+            total_size_gb = round(total_size_bytes / BYTES_PER_GB, 2) if total_size_bytes else 0.0
             
             return BigQueryDatasetInfo(
                 project_id=project_id,
@@ -211,108 +497,153 @@ class BigQueryInventory:
                 location=location,
                 creation_time=creation_time,
                 last_modified_time=last_modified_time,
-                table_count=len(tables),
+                table_count=table_count,
                 total_size_gb=total_size_gb
             )
         except Exception as e:
             logger.error(f"Error extracting dataset info for {project_id}:{dataset_id}: {str(e)}")
             return None
     
-    def collect_bigquery_inventory(self, project_id: Optional[str] = None, 
-                                  skip_disabled_apis: bool = False) -> List[BigQueryDatasetInfo]:
-        """Collect BigQuery inventory data from GCP.
+    def iter_datasets(self, project_id: str, datasets: Iterable[BigQueryDatasetSummary]) -> Iterator[BigQueryDatasetInfo]:
+        """Extract information for the datasets of a project concurrently.
+        
+        Datasets are submitted for extraction as they are drawn from the iterable, so
+        extraction overlaps with listing when it is a generator.
         
         Args:
-            project_id: Specific project ID to inventory (optional)
-            skip_disabled_apis: Whether to skip projects with disabled APIs
+            project_id: The GCP project ID
+            datasets: BigQueryDatasetSummary objects, e.g. from iter_dataset_summaries
+            
+        Yields:
+            BigQueryDatasetInfo objects, as soon as each dataset is extracted
+        """
+        def extract(dataset):
+            logger.info(f"Processing dataset: {dataset.dataset_id}")
+            return self.extract_dataset_info(
+                project_id, dataset.dataset_id, dataset.location,
+                dataset.creation_time, dataset.last_modified_time
+            )
+        
+        futures = {}
+        try:
+            for dataset in datasets:
+                if dataset.dataset_id:
+                    futures[self._dataset_executor.submit(extract, dataset)] = dataset.dataset_id
+            
+            for future in as_completed(futures):
+                dataset_id = futures[future]
+                try:
+                    dataset_info = future.result()
+                except Exception as e:
+                    logger.error(f"Error processing dataset {project_id}:{dataset_id}: {str(e)}")
+                    continue
+                
+                if dataset_info:
+                    logger.info(f"Added dataset {dataset_id} with {dataset_info.table_count} tables and {dataset_info.total_size_gb} GB")
+                    yield dataset_info
+        finally:
+            # Don't leave the datasets of an abandoned iteration queued in the shared pool
+            for future in futures:
+                future.cancel()
+    
+    def extract_datasets(self, project_id: str, datasets: List[BigQueryDatasetSummary]) -> List[BigQueryDatasetInfo]:
+        """Extract information for the datasets of a project concurrently.
+        
+        Args:
+            project_id: The GCP project ID
+            datasets: List of BigQueryDatasetSummary objects as returned by get_datasets
             
         Returns:
             List of BigQueryDatasetInfo objects
         """
-        all_bq_data = []
+        return list(self.iter_datasets(project_id, datasets))
+    
+    def _iter_one_project(self, project_id: str, skip_disabled_apis: bool = False) -> Iterator[BigQueryDatasetInfo]:
+        """Collect BigQuery inventory data for a single project.
+        
+        Args:
+            project_id: The GCP project ID
+            skip_disabled_apis: Whether to skip projects with disabled APIs
+            
+        Yields:
+            BigQueryDatasetInfo objects
+        """
+        logger.info(f"Collecting BigQuery data for project: {project_id}")
+        
+        # First check if we can create a client - this will fail fast if there are permission issues
+        bq_client = self._get_bq_client(project_id)
+        if not bq_client:
+            logger.error(f"Could not create BigQuery client for project {project_id}")
+            if not skip_disabled_apis:
+                logger.warning(f"Skipping project {project_id} due to client creation failure")
+            return
+        
+        # Process the datasets concurrently, while they are still being listed
+        yield from self.iter_datasets(project_id, self.iter_dataset_summaries(project_id))
+    
+    def iter_bigquery_inventory(self, project_id: Optional[str] = None,
+                                skip_disabled_apis: bool = False) -> Iterator[BigQueryDatasetInfo]:
+        """Collect BigQuery inventory data from GCP, yielding datasets as they are extracted.
+        
+        For a single project every dataset is yielded as soon as it is extracted. When
+        all projects are inventoried, projects are processed concurrently and the
+        datasets of each project are yielded once the project is complete.
+        
+        Args:
+            project_id: Specific project ID to inventory (optional)
+            skip_disabled_apis: Whether to skip projects with disabled APIs
+            
+        Yields:
+            BigQueryDatasetInfo objects
+        """
+        # Datasets fetched by a previous run may have changed since
+        self._full_datasets.clear()
+        self._dataset_times.clear()
         
         try:
             if project_id:
                 # Process a single project
-                logger.info(f"Collecting BigQuery data for project: {project_id}")
-                
-                # First check if we can create a client - this will fail fast if there are permission issues
-                bq_client = self._get_bq_client()
-                if not bq_client:
-                    logger.error(f"Could not create BigQuery client for project {project_id}")
-                    if not skip_disabled_apis:
-                        logger.warning(f"Skipping project {project_id} due to client creation failure")
-                    return all_bq_data
-                
-                # Get all datasets
-                datasets = self.get_datasets(project_id)
-                if not datasets:
-                    logger.info(f"No BigQuery datasets found in project {project_id}")
-                    return all_bq_data
-                
-                logger.info(f"Found {len(datasets)} datasets in project {project_id}")
-                
-                # Process each dataset
-                for dataset in datasets:
-                    dataset_id = dataset.get('datasetReference', {}).get('datasetId')
-                    if not dataset_id:
-                        continue
-                    
-                    location = dataset.get('location', 'N/A')
-                    logger.info(f"Processing dataset: {dataset_id}")
-                    
-                    dataset_info = self.extract_dataset_info(project_id, dataset_id, location)
-                    if dataset_info:
-                        all_bq_data.append(dataset_info)
-                        logger.info(f"Added dataset {dataset_id} with {dataset_info.table_count} tables and {dataset_info.total_size_gb} GB")
-            else:
-                # Process all accessible projects
-                projects = self.client.get_projects()
-                if not projects:
-                    logger.warning("No projects found or unable to access project list.")
-                    return []
-                
-                logger.info(f"Found {len(projects)} projects to check for BigQuery datasets")
-                
-                for project in projects:
-                    project_id = project.get('projectId')
-                    logger.info(f"Collecting BigQuery data for project: {project_id}")
-                    
-                    # Set the project ID for the client
-                    self.client.project_id = project_id
-                    self._bq_client = None  # Reset the BQ client to create a new one with the current project
-                    
-                    # First check if we can create a client - this will fail fast if there are permission issues
-                    bq_client = self._get_bq_client()
-                    if not bq_client:
-                        logger.error(f"Could not create BigQuery client for project {project_id}")
-                        if not skip_disabled_apis:
-                            logger.warning(f"Skipping project {project_id} due to client creation failure")
-                        continue
-                    
-                    # Get all datasets
-                    datasets = self.get_datasets(project_id)
-                    if not datasets:
-                        logger.info(f"No BigQuery datasets found in project {project_id}")
+                yield from self._iter_one_project(project_id, skip_disabled_apis)
+                return
+            
+            # Process all accessible projects
+            projects = self.client.get_projects()
+            if not projects:
+                logger.warning("No projects found or unable to access project list.")
+                return
+            
+            logger.info(f"Found {len(projects)} projects to check for BigQuery datasets")
+            
+            def collect_one_project(proj_id):
+                return list(self._iter_one_project(proj_id, skip_disabled_apis))
+            
+            with ThreadPoolExecutor(max_workers=PROJECT_WORKERS) as executor:
+                futures = {
+                    executor.submit(collect_one_project, project.get('projectId')): project.get('projectId')
+                    for project in projects
+                }
+                for future in as_completed(futures):
+                    try:
+                        project_data = future.result()
+                    except Exception as e:
+                        logger.error(f"Error collecting BigQuery inventory for project {futures[future]}: {str(e)}")
                         continue
-                    
-                    logger.info(f"Found {len(datasets)} datasets in project {project_id}")
-                    
-                    # Process each dataset
-                    for dataset in datasets:
-                        dataset_id = dataset.get('datasetReference', {}).get('datasetId')
-                        if not dataset_id:
-                            continue
-                        
-                        location = dataset.get('location', 'N/A')
-                        logger.info(f"Processing dataset: {dataset_id}")
-                        
-                        dataset_info = self.extract_dataset_info(project_id, dataset_id, location)
-                        if dataset_info:
-                            all_bq_data.append(dataset_info)
-                            logger.info(f"Added dataset {dataset_id} with {dataset_info.table_count} tables and {dataset_info.total_size_gb} GB")
+                    yield from project_data
         except Exception as e:
             logger.error(f"Error collecting BigQuery inventory: {str(e)}")
+    
+    def collect_bigquery_inventory(self, project_id: Optional[str] = None, 
+                                  skip_disabled_apis: bool = False) -> List[BigQueryDatasetInfo]:
+        """Collect BigQuery inventory data from GCP.
+        
+        Args:
+            project_id: Specific project ID to inventory (optional)
+            skip_disabled_apis: Whether to skip projects with disabled APIs
+            
+        Returns:
+            List of BigQueryDatasetInfo objects
+        """
+        all_bq_data = list(self.iter_bigquery_inventory(project_id, skip_disabled_apis))
         
         logger.info(f"Collected information for {len(all_bq_data)} BigQuery datasets across all projects")
         return all_bq_data
@@ -0,0 +1,145 @@
+"""
+Cache Module for GCP VM Inventory Tool.
+
+This module provides a persistent on-disk cache for gcloud command results, so
+that repeated runs do not pay the subprocess and API latency again for metadata
+that rarely changes.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import tempfile
+import time
+from typing import Any, List, Optional, Tuple
+
+import orjson
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "gcp_vm_inventory")
+DEFAULT_TTL = 3600  # seconds
+
+
+class GcloudCache:
+    """TTL'd cache of gcloud results stored as one JSON file per command."""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, ttl: int = DEFAULT_TTL,
+                 identity: Optional[str] = None):
+        """Initialize the cache.
+
+        Args:
+            cache_dir: Directory where cache entries are stored
+            ttl: Time to live of an entry in seconds
+            identity: Credentials the results are fetched with, as returned by
+                utils.credential_identity. Entries stored under other credentials
+                are not returned.
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.identity = identity
+        self.enabled = True
+        self._gcloud_version = None
+
+    @property
+    def gcloud_version(self) -> Optional[str]:
+        """Version of the installed Cloud SDK, used to invalidate entries on upgrade."""
+        if self._gcloud_version is None:
+            try:
+                result = subprocess.run(
+                    ["gcloud", "version", "--format=json"],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    check=True,
+                    text=True
+                )
+                self._gcloud_version = json.loads(result.stdout).get("Google Cloud SDK", "")
+            except (OSError, subprocess.CalledProcessError, ValueError):
+                self._gcloud_version = ""
+        return self._gcloud_version
+
+    def _path(self, key: Tuple) -> str:
+        """Get the file path of the entry for a key, under the credentials of the cache."""
+        digest = hashlib.sha256(json.dumps((self.identity, key)).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def get(self, command: List[str], check_json: bool = True) -> Tuple[bool, Any]:
+        """Look up the cached result of a gcloud command.
+
+        Args:
+            command: List of command parts
+            check_json: Whether the output was parsed as JSON
+
+        Returns:
+            Tuple of (hit, value)
+        """
+        if not self.enabled:
+            return False, None
+
+        try:
+            # Entries can hold a whole inventory, so they are parsed from bytes by orjson
+            with open(self._path((command, check_json)), "rb") as cache_file:
+                entry = orjson.loads(cache_file.read())
+        except (OSError, orjson.JSONDecodeError):
+            return False, None
+
+        if time.time() - entry.get("timestamp", 0) > self.ttl:
+            return False, None
+        if entry.get("gcloud_version") != self.gcloud_version:
+            return False, None
+
+        # Keys are not all lists of strings, so they are logged with their repr
+        logger.debug("Using cached result for: %r", command)
+        return True, entry.get("value")
+
+    def set(self, command: List[str], value: Any, check_json: bool = True) -> None:
+        """Store the result of a gcloud command.
+
+        Args:
+            command: List of command parts
+            value: Result to store
+            check_json: Whether the output was parsed as JSON
+        """
+        if not self.enabled:
+            return
+
+        entry = {
+            "timestamp": time.time(),
+            "gcloud_version": self.gcloud_version,
+            "command": command,
+            "value": value
+        }
+
+        tmp_path = None
+        try:
+            data = orjson.dumps(entry)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temporary file first so concurrent readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as cache_file:
+                cache_file.write(data)
+            os.replace(tmp_path, self._path((command, check_json)))
+        except (OSError, TypeError) as e:
+            logger.warning(f"Could not write cache entry: {str(e)}")
+            # Do not leave the partial entry behind
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def clear(self) -> None:
+        """Remove all cache entries."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            # Temporary files are left by writes interrupted before their rename
+            if name.endswith((".json", ".tmp")):
+                os.remove(os.path.join(self.cache_dir, name))
@@ -9,8 +9,8 @@ import argparse
 import os
 import sys
 import logging
-from .inventory_service import InventoryService
-from .utils import display_disclaimer
+from .api_checker import display_api_status
+from .utils import DEFAULT_CONCURRENCY, DEFAULT_PAGE_SIZE, MAX_CONCURRENT_COMMANDS, display_disclaimer
 
 # Configure logging
 logging.basicConfig(
@@ -20,45 +20,6 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def display_api_status(api_status_list):
-    """Display API status information in a formatted way.
-    
-    Args:
-        api_status_list: List of APIStatus objects
-        
-    Returns:
-        Boolean indicating if all APIs are OK
-    """
-    print("\n=== API Status Check Results ===")
-    
-    all_apis_ok = True
-    
-    # Group by project
-    projects = {}
-    for api_status in api_status_list:
-        if api_status.project_id not in projects:
-            projects[api_status.project_id] = []
-        projects[api_status.project_id].append(api_status)
-    
-    for project_id, api_statuses in projects.items():
-        print(f"\nProject: {project_id}")
-        
-        for api_status in api_statuses:
-            status_display = {
-                "OK": "\033[92mAPI [OK]\033[0m",                  # Green
-                "MISSING": "\033[91mAPI [MISSING]\033[0m",        # Red
-                "CREDENTIAL_ISSUE": "\033[93mAPI [CREDENTIAL_ISSUE]\033[0m",  # Yellow
-                "ERROR": "\033[91mAPI [ERROR]\033[0m"             # Red
-            }.get(api_status.status, f"API [{api_status.status}]")
-            
-            print(f"  {api_status.api_name} ({api_status.api_id}): {status_display}")
-            
-            if api_status.status != "OK":
-                all_apis_ok = False
-    
-    return all_apis_ok
-
-
 def main():
     """Main entry point for the CLI."""
     parser = argparse.ArgumentParser(description='Extract GCP VM inventory to CSV')
@@ -81,6 +42,14 @@ def main():
                       help='Collect GKE inventory (default: True)')
     parser.add_argument('--format', choices=['csv', 'json', 'both'], default='csv',
                       help='Output format (default: csv)')
+    parser.add_argument('--cache', action='store_true',
+                      help='Reuse gcloud results cached by previous runs with the same credentials (1 hour)')
+    parser.add_argument('--bq-concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                      help='Number of BigQuery datasets processed concurrently (default: %(default)s)')
+    parser.add_argument('--bq-page-size', type=int, default=DEFAULT_PAGE_SIZE,
+                      help='Number of BigQuery datasets or tables listed per request (default: %(default)s)')
+    parser.add_argument('--max-workers', type=int, default=MAX_CONCURRENT_COMMANDS,
+                      help='Number of gcloud commands run concurrently (default: %(default)s)')
     args = parser.parse_args()
     
     # Display disclaimer and get user agreement
@@ -92,17 +61,35 @@ def main():
     script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     output_dir = os.path.join(script_dir, args.output_dir)
     
+    # Create the output directory once, before any collection work
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # Imported here because it loads the Google Cloud client libraries, which takes
+    # long enough to be noticeable on --help or when the disclaimer is declined
+    from .inventory_service import InventoryService
+    
     # Create inventory service
     service = InventoryService(
         project_id=args.project,
-        service_account_key=args.service_account_key
+        service_account_key=args.service_account_key,
+        use_cache=args.cache,
+        bq_concurrency=args.bq_concurrency,
+        bq_page_size=args.bq_page_size,
+        max_workers=args.max_workers
     )
     
     # Check API status first
     logger.info("Checking API status...")
     api_status_list = service.check_api_status()
     
-    all_apis_ok = display_api_status(api_status_list)
+    # Same report as the functional API checker, which groups the statuses by project
+    project_api_status = {}
+    for api_status in api_status_list:
+        project_api_status.setdefault(api_status.project_id, {})[api_status.api_id] = {
+            "name": api_status.api_name,
+            "status": api_status.status
+        }
+    all_apis_ok = display_api_status(project_api_status)
     
     if args.check_apis_only:
         logger.info("API check completed. Exiting as requested.")
@@ -116,49 +103,29 @@ def main():
             logger.info("Exiting as requested.")
             return
     
-    # Collect inventory data
+    # Collect inventory data, writing each item to the output files as soon as it is collected
     if args.collect_vms:
         logger.info("Collecting VM inventory...")
-        vms = service.collect_vm_inventory(skip_disabled_apis=args.skip_disabled_apis)
-        if vms:
-            if args.format in ['csv', 'both']:
-                service.export_to_csv(vms, output_dir, 'vm_inventory')
-            if args.format in ['json', 'both']:
-                service.export_to_json(vms, output_dir, 'vm_inventory')
-        else:
+        vms = service.iter_vm_inventory(skip_disabled_apis=args.skip_disabled_apis)
+        if not service.export_inventory(vms, output_dir, 'vm_inventory', args.format):
             logger.warning("No VM data collected.")
     
     if args.collect_bigquery:
         logger.info("Collecting BigQuery inventory...")
-        bigquery_datasets = service.collect_bigquery_inventory(skip_disabled_apis=args.skip_disabled_apis)
-        if bigquery_datasets:
-            if args.format in ['csv', 'both']:
-                service.export_to_csv(bigquery_datasets, output_dir, 'bigquery_inventory')
-            if args.format in ['json', 'both']:
-                service.export_to_json(bigquery_datasets, output_dir, 'bigquery_inventory')
-        else:
+        bigquery_datasets = service.iter_bigquery_inventory(skip_disabled_apis=args.skip_disabled_apis)
+        if not service.export_inventory(bigquery_datasets, output_dir, 'bigquery_inventory', args.format):
             logger.warning("No BigQuery data collected.")
     
     if args.collect_sql:
         logger.info("Collecting Cloud SQL inventory...")
         sql_instances = service.collect_sql_inventory(skip_disabled_apis=args.skip_disabled_apis)
-        if sql_instances:
-            if args.format in ['csv', 'both']:
-                service.export_to_csv(sql_instances, output_dir, 'sql_inventory')
-            if args.format in ['json', 'both']:
-                service.export_to_json(sql_instances, output_dir, 'sql_inventory')
-        else:
+        if not service.export_inventory(sql_instances, output_dir, 'sql_inventory', args.format):
             logger.warning("No Cloud SQL data collected.")
     
     if args.collect_gke:
         logger.info("Collecting GKE inventory...")
         gke_clusters = service.collect_gke_inventory(skip_disabled_apis=args.skip_disabled_apis)
-        if gke_clusters:
-            if args.format in ['csv', 'both']:
-                service.export_to_csv(gke_clusters, output_dir, 'gke_inventory')
-            if args.format in ['json', 'both']:
-                service.export_to_json(gke_clusters, output_dir, 'gke_inventory')
-        else:
+        if not service.export_inventory(gke_clusters, output_dir, 'gke_inventory', args.format):
             logger.warning("No GKE data collected.")
     
     logger.info("Inventory collection completed.")
@@ -5,11 +5,39 @@ This module contains the core functions for extracting VM information from GCP.
 """
 
 import csv
-import json
+import operator
 import os
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import fields
 from datetime import datetime
-from .utils import check_gcloud_installed
+import orjson
+from .models import VMInfo
+from .utils import (
+    check_gcloud_installed, os_from_license, resource_name, gcloud_env, VM_INSTANCE_FORMAT,
+    MACHINE_TYPE_FORMAT, MACHINE_TYPE_LIST_FORMAT
+)
+
+# Maximum number of projects collected concurrently
+MAX_WORKERS = 16
+
+# Buffer size of export files, large enough to write rows in few syscalls
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Columns of the VM inventory, in the order of the dictionaries built by extract_vm_info.
+# They are the fields of VMInfo, so the CSV files of the CLI and of this module match.
+VM_FIELDNAMES = tuple(f.name for f in fields(VMInfo))
+
+# CPU and memory of the machine types fetched so far, keyed by (project_id, zone, machine_type)
+_machine_types = {}
+
+# Output directories already created by export_to_csv
+_output_dirs_made = set()
+
+# Projects listed so far, keyed by service account key
+_projects = {}
+_projects_lock = threading.Lock()
 
 
 def run_gcloud_command(command, check_json=True, suppress_errors=False, service_account_key=None):
@@ -31,35 +59,20 @@ def run_gcloud_command(command, check_json=True, suppress_errors=False, service_
             print(error_message)
         return None
     
-    # If service account key is provided, add authentication
-    if service_account_key:
-        # Add authentication to the command
-        auth_command = ["gcloud", "auth", "activate-service-account", "--key-file", service_account_key]
-        try:
-            subprocess.run(
-                auth_command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                check=True,
-                text=True
-            )
-        except subprocess.CalledProcessError as e:
-            if not suppress_errors:
-                print(f"Error authenticating with service account: {e}")
-                print(f"Error output: {e.stderr}")
-            return None
-    
     try:
+        # Keep the output as bytes: orjson parses them directly, without decoding to text first.
+        # Errors are only read when they are reported, otherwise gcloud writes them to /dev/null.
         result = subprocess.run(
             command,
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+            stderr=subprocess.DEVNULL if suppress_errors else subprocess.PIPE,
             check=True,
-            text=True
+            # The key is given to this command only, gcloud's active account is left unchanged
+            env=gcloud_env(service_account_key)
         )
         
         # Check if output is empty
-        if not result.stdout or result.stdout.strip() == "":
+        if not result.stdout.strip():
             if check_json:
                 return []
             else:
@@ -67,22 +80,23 @@ def run_gcloud_command(command, check_json=True, suppress_errors=False, service_
                 
         if check_json:
             try:
-                return json.loads(result.stdout)
-            except json.JSONDecodeError as e:
+                return orjson.loads(result.stdout)
+            except orjson.JSONDecodeError as e:
                 if not suppress_errors:
                     print(f"Warning: Command output is not valid JSON: {command}")
-                    print(f"Output: {result.stdout}")
+                    print(f"Output: {result.stdout.decode(errors='replace')}")
                     print(f"Error: {str(e)}")
                 return []
         else:
-            return result.stdout
+            return result.stdout.decode()
     except subprocess.CalledProcessError as e:
         if not suppress_errors:
+            stderr = e.stderr.decode(errors='replace') if e.stderr else ""
             print(f"Error executing command: {e}")
-            print(f"Error output: {e.stderr}")
+            print(f"Error output: {stderr}")
             
             # Check for API not enabled error
-            if "API not enabled" in e.stderr or "API has not been used" in e.stderr:
+            if "API not enabled" in stderr or "API has not been used" in stderr:
                 print("\nNOTE: This error indicates that the Compute Engine API is not enabled for this project.")
                 print("You need to enable the API before you can access VM information.")
                 print("You can enable it by visiting the URL in the error message above.")
@@ -107,14 +121,29 @@ def get_organization_info(service_account_key=None):
 def get_projects(service_account_key=None):
     """Get a list of all accessible GCP projects.
     
+    The list is fetched once per service account key and shared by every
+    collector. A failed listing is not kept, so it is tried again on the next call.
+    
     Args:
         service_account_key: Path to service account key file (optional)
         
     Returns:
         List of project dictionaries
     """
-    command = ["gcloud", "projects", "list", "--format=json", "--quiet"]
-    return run_gcloud_command(command, service_account_key=service_account_key)
+    with _projects_lock:
+        projects = _projects.get(service_account_key)
+        if projects is None:
+            command = ["gcloud", "projects", "list", "--format=json", "--quiet"]
+            projects = run_gcloud_command(command, service_account_key=service_account_key)
+            if projects is not None:
+                _projects[service_account_key] = projects
+        return projects
+
+
+def invalidate_projects_cache():
+    """Forget the projects listed so far, so the next calls to get_projects list them again."""
+    with _projects_lock:
+        _projects.clear()
 
 
 def get_vms_in_project(project_id, service_account_key=None):
@@ -122,7 +151,7 @@ def get_vms_in_project(project_id, service_account_key=None):
     command = [
         "gcloud", "compute", "instances", "list",
         "--project", project_id,
-        "--format=json",
+        f"--format={VM_INSTANCE_FORMAT}",
         "--quiet"  # Prevent interactive prompts
     ]
     return run_gcloud_command(command, service_account_key=service_account_key)
@@ -130,51 +159,105 @@ def get_vms_in_project(project_id, service_account_key=None):
 
 def extract_vm_info(vm, project_id, service_account_key=None):
     """Extract relevant information from VM data."""
-    machine_type_parts = vm.get('machineType', '').split('/')
-    machine_type = machine_type_parts[-1] if machine_type_parts else 'unknown'
+    machine_type = resource_name(vm.get('machineType', ''))
+    zone_url = vm.get('zone')
+    zone = resource_name(zone_url) if zone_url else ''
     
     # Extract CPU and memory information
-    machine_info = get_machine_type_info(project_id, vm.get('zone', '').split('/')[-1], machine_type, service_account_key)
+    machine_info = get_machine_type_info(project_id, zone, machine_type, service_account_key)
+    
+    # Only the first network interface is reported
+    network_interfaces = vm.get('networkInterfaces')
+    if network_interfaces:
+        interface = network_interfaces[0]
+        network = resource_name(interface.get('network', 'N/A'))
+        internal_ip = interface.get('networkIP', 'N/A')
+        access_configs = interface.get('accessConfigs')
+        external_ip = access_configs[0].get('natIP', 'N/A') if access_configs else 'N/A'
+    else:
+        network = internal_ip = external_ip = 'N/A'
     
     return {
         'project_id': project_id,
         'vm_id': vm.get('id', 'N/A'),
         'name': vm.get('name', 'N/A'),
-        'zone': vm.get('zone', 'N/A').split('/')[-1] if vm.get('zone') else 'N/A',
+        'zone': zone or 'N/A',
         'status': vm.get('status', 'N/A'),
         'machine_type': machine_type,
         'cpu_count': machine_info.get('cpu_count', 'N/A'),
         'memory_mb': machine_info.get('memory_mb', 'N/A'),
         'os': get_os_info(vm),
         'creation_timestamp': vm.get('creationTimestamp', 'N/A'),
-        'network': vm.get('networkInterfaces', [{}])[0].get('network', 'N/A').split('/')[-1] 
-                  if vm.get('networkInterfaces') else 'N/A',
-        'internal_ip': vm.get('networkInterfaces', [{}])[0].get('networkIP', 'N/A') 
-                      if vm.get('networkInterfaces') else 'N/A',
-        'external_ip': get_external_ip(vm)
+        'network': network,
+        'internal_ip': internal_ip,
+        'external_ip': external_ip
     }
 
 
+def prefetch_machine_types(project_id, vms, service_account_key=None):
+    """Fetch the machine types used by the VMs of a project with a single gcloud call.
+    
+    The machine types of all zones the VMs run in are listed at once, instead of
+    being described one VM at a time, and cached for get_machine_type_info.
+    
+    Args:
+        project_id: The GCP project ID
+        vms: VM data of the project
+        service_account_key: Path to service account key file (optional)
+    """
+    wanted = {
+        (resource_name(vm.get('zone', '')), resource_name(vm.get('machineType', '')))
+        for vm in vms
+    }
+    wanted = {key for key in wanted if all(key) and (project_id, *key) not in _machine_types}
+    if not wanted:
+        return
+    
+    zones = ' '.join(sorted({zone for zone, _ in wanted}))
+    names = ' '.join(sorted({name for _, name in wanted}))
+    command = [
+        "gcloud", "compute", "machine-types", "list",
+        "--project", project_id,
+        f"--filter=zone:({zones}) AND name:({names})",
+        f"--format={MACHINE_TYPE_LIST_FORMAT}",
+        "--quiet"  # Prevent interactive prompts
+    ]
+    
+    for result in run_gcloud_command(command, service_account_key=service_account_key) or []:
+        key = (resource_name(result.get('zone', '')), result.get('name'))
+        if key in wanted:
+            _machine_types[(project_id, *key)] = {
+                'cpu_count': result.get('guestCpus', 'N/A'),
+                'memory_mb': result.get('memoryMb', 'N/A')
+            }
+
+
 def get_machine_type_info(project_id, zone, machine_type, service_account_key=None):
     """Get CPU and memory information for a machine type."""
     if machine_type == 'unknown':
         return {'cpu_count': 'N/A', 'memory_mb': 'N/A'}
     
+    cached = _machine_types.get((project_id, zone, machine_type))
+    if cached:
+        return cached
+    
     command = [
         "gcloud", "compute", "machine-types", "describe",
         machine_type,
         "--project", project_id,
         "--zone", zone,
-        "--format=json",
+        f"--format={MACHINE_TYPE_FORMAT}",
         "--quiet"  # Prevent interactive prompts
     ]
     
     result = run_gcloud_command(command, service_account_key=service_account_key)
     if result:
-        return {
+        # Machine types never change, so keep them for the lifetime of the process
+        _machine_types[(project_id, zone, machine_type)] = info = {
             'cpu_count': result.get('guestCpus', 'N/A'),
             'memory_mb': result.get('memoryMb', 'N/A')
         }
+        return info
     return {'cpu_count': 'N/A', 'memory_mb': 'N/A'}
 
 
@@ -193,10 +276,7 @@ def get_os_info(vm):
         return 'N/A'
     
     # Extract OS name from license URL
-    license_parts = licenses[0].split('/')
-    if len(license_parts) >= 2:
-        return license_parts[-1]
-    return 'N/A'
+    return os_from_license(licenses[0])
 
 
 def get_external_ip(vm):
@@ -213,65 +293,126 @@ def get_external_ip(vm):
 
 
 def export_to_csv(vm_data, output_dir):
-    """Export VM data to a CSV file."""
-    os.makedirs(output_dir, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = os.path.join(output_dir, f"gcp_vm_inventory_{timestamp}.csv")
+    """Export VM data to a CSV file.
     
-    if not vm_data:
+    Rows are written as they are consumed, so vm_data can be a generator and the
+    rows written so far are kept if the collection is interrupted.
+    
+    Args:
+        vm_data: Iterable of VM data dictionaries
+        output_dir: Directory to store the CSV output
+        
+    Returns:
+        Path to the created CSV file or None if there was no data
+    """
+    rows = iter(vm_data)
+    first_row = next(rows, None)
+    if first_row is None:
         print("No VM data to export.")
         return None
     
-    fieldnames = vm_data[0].keys()
+    if output_dir not in _output_dirs_made:
+        os.makedirs(output_dir, exist_ok=True)
+        _output_dirs_made.add(output_dir)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = os.path.join(output_dir, f"gcp_vm_inventory_{timestamp}.csv")
     
-    with open(filename, 'w', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(vm_data)
+    # Rows are written as plain tuples, which csv.writer handles faster than DictWriter
+    get_values = operator.itemgetter(*VM_FIELDNAMES)
+    with open(filename, 'w', newline='', buffering=WRITE_BUFFER_SIZE) as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(VM_FIELDNAMES)
+        writer.writerow(get_values(first_row))
+        writer.writerows(map(get_values, rows))
     
     print(f"VM inventory exported to {filename}")
     return filename
 
 
-def collect_vm_inventory(project_id=None, skip_disabled_apis=False, service_account_key=None):
-    """Collect VM inventory data from GCP.
+def collect_project_vms(project_id, service_account_key=None):
+    """Collect VM inventory data for a single project.
     
     Args:
-        project_id: Specific project ID to inventory (optional)
-        skip_disabled_apis: Whether to skip projects with disabled APIs
+        project_id: The GCP project ID
         service_account_key: Path to service account key file (optional)
         
     Returns:
-        List of VM data dictionaries
+        List of VM data dictionaries, empty if no VMs were found or they could not be listed
     """
-    all_vm_data = []
+    print(f"Collecting VM data for project: {project_id}")
+    vms = get_vms_in_project(project_id, service_account_key)
+    if not vms:
+        return []
+    
+    prefetch_machine_types(project_id, vms, service_account_key)
+    return [extract_vm_info(vm, project_id, service_account_key) for vm in vms]
+
+
+def iter_vm_inventory(project_id=None, skip_disabled_apis=False, service_account_key=None,
+                      max_workers=MAX_WORKERS):
+    """Collect VM inventory data from GCP, yielding VMs as their project completes.
+    
+    When no project is given, all accessible projects are collected concurrently.
     
+    Args:
+        project_id: Specific project ID to inventory (optional)
+        skip_disabled_apis: Whether to skip projects with disabled APIs
+        service_account_key: Path to service account key file (optional)
+        max_workers: Maximum number of projects collected concurrently
+        
+    Yields:
+        VM data dictionaries
+    """
     if project_id:
         # Process a single project
-        print(f"Collecting VM data for project: {project_id}")
-        vms = get_vms_in_project(project_id, service_account_key)
-        if vms:
-            for vm in vms:
-                vm_info = extract_vm_info(vm, project_id, service_account_key)
-                all_vm_data.append(vm_info)
-    else:
-        # Process all accessible projects
-        projects = get_projects(service_account_key)
-        if not projects:
-            print("No projects found or unable to access project list.")
-            return []
+        yield from collect_project_vms(project_id, service_account_key)
+        return
+    
+    # Process all accessible projects
+    projects = get_projects(service_account_key)
+    if not projects:
+        print("No projects found or unable to access project list.")
+        return
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(collect_project_vms, project.get('projectId'), service_account_key):
+                project.get('projectId')
+            for project in projects
+        }
         
-        for project in projects:
-            project_id = project.get('projectId')
-            print(f"\nCollecting VM data for project: {project_id}")
-            vms = get_vms_in_project(project_id, service_account_key)
-            if vms:
-                for vm in vms:
-                    vm_info = extract_vm_info(vm, project_id, service_account_key)
-                    all_vm_data.append(vm_info)
-            elif not skip_disabled_apis:
-                print(f"No VM data found for project: {project_id} or API access issue")
-            else:
-                print(f"Skipping project: {project_id} (possibly due to disabled API)")
+        try:
+            for future in as_completed(futures):
+                project_id = futures[future]
+                try:
+                    vm_data = future.result()
+                except Exception as e:
+                    print(f"Error collecting VM data for project {project_id}: {str(e)}")
+                    continue
+                
+                if vm_data:
+                    yield from vm_data
+                elif not skip_disabled_apis:
+                    print(f"No VM data found for project: {project_id} or API access issue")
+                else:
+                    print(f"Skipping project: {project_id} (possibly due to disabled API)")
+        finally:
+            # Do not start the remaining projects if the consumer stops early
+            for future in futures:
+                future.cancel()
+
+
+def collect_vm_inventory(project_id=None, skip_disabled_apis=False, service_account_key=None,
+                         max_workers=MAX_WORKERS):
+    """Collect VM inventory data from GCP.
     
-    return all_vm_data
+    Args:
+        project_id: Specific project ID to inventory (optional)
+        skip_disabled_apis: Whether to skip projects with disabled APIs
+        service_account_key: Path to service account key file (optional)
+        max_workers: Maximum number of projects collected concurrently
+        
+    Returns:
+        List of VM data dictionaries
+    """
+    return list(iter_vm_inventory(project_id, skip_disabled_apis, service_account_key, max_workers))
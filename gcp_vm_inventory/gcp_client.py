@@ -7,9 +7,15 @@ This module provides a unified client interface for interacting with GCP service
 import json
 import subprocess
 import logging
-from google.cloud import bigquery
-from google.oauth2 import service_account
-from typing import Dict, List, Optional, Tuple, Any, Union
+import tempfile
+import threading
+import orjson
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple, Any, Union
+from .cache import GcloudCache
+from .utils import MAX_CONCURRENT_COMMANDS, gcloud_env, get_credentials
+
+if TYPE_CHECKING:
+    from google.cloud import bigquery
 
 # Configure logging
 logging.basicConfig(
@@ -18,27 +24,51 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Keep-alive connections kept per BigQuery client. The requests default of 10 is less
+# than the number of concurrent table lookups, which then reconnect for every call.
+BQ_HTTP_POOL_SIZE = 128
+
+COMPUTE_API_URL = "https://compute.googleapis.com/compute/v1"
+COMPUTE_PAGE_SIZE = 500
+COMPUTE_REQUEST_TIMEOUT = 120  # seconds
+
+# Number of characters read at a time when streaming gcloud output
+STREAM_CHUNK_SIZE = 64 * 1024
+
 
 class GCPClient:
     """Client for interacting with GCP services."""
     
-    def __init__(self, project_id: Optional[str] = None, service_account_key: Optional[str] = None):
+    def __init__(self, project_id: Optional[str] = None, service_account_key: Optional[str] = None,
+                 cache: Optional[GcloudCache] = None, max_concurrent_commands: int = MAX_CONCURRENT_COMMANDS):
         """Initialize the GCP client.
         
         Args:
             project_id: The GCP project ID (optional)
             service_account_key: Path to service account key file (optional)
+            cache: Cache of gcloud results to reuse across runs (optional)
+            max_concurrent_commands: Maximum number of gcloud commands run at the same time
         """
         self.project_id = project_id
         self.service_account_key = service_account_key
-        self._bq_client = None
+        self.cache = cache
+        self.max_concurrent_commands = max_concurrent_commands
+        self._command_slots = threading.Semaphore(max_concurrent_commands)
+        self._bq_clients = {}
+        self._bq_clients_lock = threading.Lock()
+        self._session = None
+        self._session_unavailable = False
+        self._session_lock = threading.Lock()
+        self._projects = None
+        self._organization_info = None
+        self._projects_lock = threading.Lock()
+        self._enabled_apis = {}
         
         # Check if gcloud is installed
         self._check_gcloud_installed()
         
-        # Authenticate with service account if provided
-        if service_account_key:
-            self._authenticate_service_account()
+        # The service account key is given to each gcloud command, not activated globally
+        self._gcloud_env = gcloud_env(service_account_key)
     
     def _check_gcloud_installed(self) -> Tuple[bool, Optional[str]]:
         """Check if the gcloud command line tool is installed.
@@ -58,28 +88,6 @@ class GCPClient:
             return False, error_message
         return True, None
     
-    def _authenticate_service_account(self) -> bool:
-        """Authenticate with the provided service account key.
-        
-        Returns:
-            True if authentication was successful, False otherwise
-        """
-        auth_command = ["gcloud", "auth", "activate-service-account", "--key-file", self.service_account_key]
-        try:
-            subprocess.run(
-                auth_command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                check=True,
-                text=True
-            )
-            logger.info(f"Successfully authenticated with service account key: {self.service_account_key}")
-            return True
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Error authenticating with service account: {e}")
-            logger.error(f"Error output: {e.stderr}")
-            return False
-    
     def run_gcloud_command(self, command: List[str], check_json: bool = True, 
                           suppress_errors: bool = False) -> Optional[Union[Dict, List, str]]:
         """Execute a gcloud command and return the output.
@@ -92,81 +100,272 @@ class GCPClient:
         Returns:
             Parsed JSON object, list, or raw text output
         """
+        if self.cache:
+            hit, value = self.cache.get(command, check_json)
+            if hit:
+                return value
+        
         try:
-            result = subprocess.run(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                check=True,
-                text=True
-            )
+            # Keep the output as bytes: orjson parses them directly, without decoding to text first.
+            # Errors are only read when they are reported, otherwise gcloud writes them to /dev/null.
+            with self._command_slots:
+                result = subprocess.run(
+                    command,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL if suppress_errors else subprocess.PIPE,
+                    check=True,
+                    env=self._gcloud_env
+                )
             
             # Check if output is empty
-            if not result.stdout or result.stdout.strip() == "":
-                if check_json:
-                    return []
-                else:
-                    return ""
-                    
-            if check_json:
+            if not result.stdout.strip():
+                value = [] if check_json else ""
+            elif check_json:
                 try:
-                    return json.loads(result.stdout)
-                except json.JSONDecodeError as e:
+                    value = orjson.loads(result.stdout)
+                except orjson.JSONDecodeError as e:
                     if not suppress_errors:
                         logger.warning(f"Command output is not valid JSON: {command}")
-                        logger.warning(f"Output: {result.stdout}")
+                        logger.warning(f"Output: {result.stdout.decode(errors='replace')}")
                         logger.warning(f"Error: {str(e)}")
                     return []
             else:
-                return result.stdout
+                value = result.stdout.decode()
+            
+            if self.cache:
+                self.cache.set(command, value, check_json)
+            return value
         except subprocess.CalledProcessError as e:
             if not suppress_errors:
+                stderr = e.stderr.decode(errors='replace') if e.stderr else ""
                 logger.error(f"Error executing command: {e}")
-                logger.error(f"Error output: {e.stderr}")
+                logger.error(f"Error output: {stderr}")
                 
                 # Check for API not enabled error
-                if "API not enabled" in e.stderr or "API has not been used" in e.stderr:
+                if "API not enabled" in stderr or "API has not been used" in stderr:
                     logger.warning("\nNOTE: This error indicates that an API is not enabled for this project.")
                     logger.warning("You need to enable the API before you can access the information.")
                     logger.warning("You can enable it by visiting the URL in the error message above.")
             
             return None
     
-    def get_bigquery_client(self) -> Optional[bigquery.Client]:
-        """Get a BigQuery client for the current project.
+    def stream_gcloud_json(self, command: List[str], suppress_errors: bool = False) -> Iterator[Any]:
+        """Execute a gcloud command that outputs a JSON list and yield its items one by one.
+        
+        The output is decoded incrementally while gcloud is still writing it, so the
+        raw output of a large listing is never held in memory at once. Results are
+        not cached.
+        
+        The command stays open while its items are consumed, so it does not take one
+        of the client's command slots: a consumer waiting on other gcloud commands
+        would otherwise hold a slot they need. Callers bound the number of streams
+        they open at once.
         
+        Args:
+            command: List of command parts to execute
+            suppress_errors: Whether to suppress error messages
+            
+        Yields:
+            Items of the JSON list
+            
+        Raises:
+            subprocess.CalledProcessError: If the command fails, after the items it
+                output were yielded, so that a failed listing is not taken as complete
+        """
+        decoder = json.JSONDecoder()
+        
+        with tempfile.TemporaryFile() as stderr_file:
+            process = subprocess.Popen(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=stderr_file,
+                text=True,
+                env=self._gcloud_env
+            )
+            try:
+                buffer = ''
+                for chunk in iter(lambda: process.stdout.read(STREAM_CHUNK_SIZE), ''):
+                    buffer += chunk
+                    pos = 0
+                    while True:
+                        # Skip the list delimiters around and between items
+                        while pos < len(buffer) and buffer[pos] in '[], \t\r\n':
+                            pos += 1
+                        if pos == len(buffer):
+                            break
+                        try:
+                            item, pos = decoder.raw_decode(buffer, pos)
+                        except json.JSONDecodeError:
+                            # Incomplete item, wait for more output
+                            break
+                        yield item
+                    buffer = buffer[pos:]
+                
+                returncode = process.wait()
+                if returncode != 0:
+                    stderr_file.seek(0)
+                    stderr = stderr_file.read().decode(errors='replace')
+                    if not suppress_errors:
+                        logger.error(f"Error executing command: {' '.join(command)}")
+                        logger.error(f"Error output: {stderr}")
+                        
+                        # Check for API not enabled error
+                        if "API not enabled" in stderr or "API has not been used" in stderr:
+                            logger.warning("\nNOTE: This error indicates that an API is not enabled for this project.")
+                            logger.warning("You need to enable the API before you can access the information.")
+                            logger.warning("You can enable it by visiting the URL in the error message above.")
+                    raise subprocess.CalledProcessError(returncode, command, stderr=stderr)
+            finally:
+                process.stdout.close()
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+    
+    def get_bigquery_client(self, project_id: Optional[str] = None) -> Optional["bigquery.Client"]:
+        """Get a BigQuery client for a project.
+        
+        Clients are created once per project and reused, so their HTTP session and
+        credentials are not set up again for every call. The session keeps enough
+        connections open for concurrent requests to reuse them instead of paying a
+        new TLS handshake each.
+        
+        Args:
+            project_id: The GCP project ID (defaults to the current project)
+            
         Returns:
             BigQuery client or None if creation failed
         """
-        if self._bq_client:
-            return self._bq_client
+        project_id = project_id or self.project_id
+        with self._bq_clients_lock:
+            if project_id in self._bq_clients:
+                return self._bq_clients[project_id]
             
-        try:
-            if self.service_account_key:
-                credentials = service_account.Credentials.from_service_account_file(
-                    self.service_account_key,
-                    scopes=["https://www.googleapis.com/auth/cloud-platform"]
-                )
-                self._bq_client = bigquery.Client(project=self.project_id, credentials=credentials)
-            else:
-                # Use default credentials from environment
-                self._bq_client = bigquery.Client(project=self.project_id)
+            try:
+                # Imported here so that runs without BigQuery do not pay for loading the SDK
+                from google.cloud import bigquery
+                
+                session = self._get_authorized_session()
+                if session is not None:
+                    # All projects share the session, and so its pool of open connections
+                    bq_client = bigquery.Client(
+                        project=project_id,
+                        credentials=session.credentials,
+                        _http=session
+                    )
+                else:
+                    from requests.adapters import HTTPAdapter
+                    
+                    bq_client = bigquery.Client(
+                        project=project_id,
+                        credentials=get_credentials(self.service_account_key)
+                    )
+                    bq_client._http.mount(
+                        "https://", HTTPAdapter(pool_connections=BQ_HTTP_POOL_SIZE, pool_maxsize=BQ_HTTP_POOL_SIZE)
+                    )
+                self._bq_clients[project_id] = bq_client
+                
+                logger.info(f"Successfully created BigQuery client for project: {project_id}")
+                return bq_client
+            except Exception as e:
+                logger.error(f"Error creating BigQuery client: {str(e)}")
+                return None
+    
+    def _get_authorized_session(self):
+        """Get the HTTP session used for direct Compute Engine and BigQuery API calls.
+        
+        Returns:
+            Authorized session, or None if no credentials are available to the libraries
+            (for example when only the gcloud CLI has been logged in)
+        """
+        with self._session_lock:
+            if self._session is None and not self._session_unavailable:
+                try:
+                    from google.auth.transport.requests import AuthorizedSession
+                    from requests.adapters import HTTPAdapter
+                    
+                    session = AuthorizedSession(get_credentials(self.service_account_key))
+                    session.mount(
+                        "https://", HTTPAdapter(pool_connections=BQ_HTTP_POOL_SIZE, pool_maxsize=BQ_HTTP_POOL_SIZE)
+                    )
+                    self._session = session
+                except Exception as e:
+                    logger.info(f"API credentials not available, using gcloud instead: {str(e)}")
+                    self._session_unavailable = True
+            return self._session
+    
+    def compute_aggregated_list(self, project_id: str, resource: str, fields: Optional[str] = None,
+                                filter_expression: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """List a Compute Engine resource across all zones of a project.
+        
+        Calls the aggregatedList REST method in process, which returns every zone in
+        one paged request and avoids starting a gcloud subprocess.
+        
+        Args:
+            project_id: The GCP project ID
+            resource: Collection name, such as "instances"
+            fields: Fields to return for each item (optional)
+            filter_expression: Compute Engine filter applied by the API, such as
+                'name eq "(n1-standard-2|e2-medium)"' (optional)
             
-            logger.info(f"Successfully created BigQuery client for project: {self.project_id}")
-            return self._bq_client
+        Returns:
+            List of resource dictionaries, or None if the API could not be called and
+            the caller should fall back to gcloud
+        """
+        url = f"{COMPUTE_API_URL}/projects/{project_id}/aggregated/{resource}"
+        cache_key = ["aggregatedList", url, fields or "", filter_expression or ""]
+        if self.cache:
+            hit, value = self.cache.get(cache_key)
+            if hit:
+                return value
+        
+        session = self._get_authorized_session()
+        if session is None:
+            return None
+        
+        params = {"maxResults": COMPUTE_PAGE_SIZE, "returnPartialSuccess": "true"}
+        if fields:
+            params["fields"] = f"nextPageToken,items/*/{resource}({fields})"
+        if filter_expression:
+            params["filter"] = filter_expression
+        
+        items = []
+        try:
+            while True:
+                with self._command_slots:
+                    response = session.get(url, params=params, timeout=COMPUTE_REQUEST_TIMEOUT)
+                if response.status_code != 200:
+                    logger.warning(
+                        f"Compute Engine API returned {response.status_code} for {project_id}, using gcloud instead"
+                    )
+                    return None
+                page = response.json()
+                for scoped_list in page.get("items", {}).values():
+                    items.extend(scoped_list.get(resource, []))
+                if not page.get("nextPageToken"):
+                    break
+                params["pageToken"] = page["nextPageToken"]
         except Exception as e:
-            logger.error(f"Error creating BigQuery client: {str(e)}")
+            logger.warning(f"Error calling the Compute Engine API, using gcloud instead: {str(e)}")
             return None
+        
+        if self.cache:
+            self.cache.set(cache_key, items)
+        return items
     
     def get_projects(self) -> List[Dict[str, Any]]:
         """Get a list of all accessible GCP projects.
         
+        The list is fetched once per client and shared by every collector. A failed
+        listing is not kept, so it is tried again on the next call.
+        
         Returns:
             List of project dictionaries
         """
-        command = ["gcloud", "projects", "list", "--format=json", "--quiet"]
-        result = self.run_gcloud_command(command)
-        return result if result else []
+        with self._projects_lock:
+            if self._projects is None:
+                command = ["gcloud", "projects", "list", "--format=json", "--quiet"]
+                self._projects = self.run_gcloud_command(command)
+            return self._projects or []
     
     def get_organization_info(self) -> Optional[Dict[str, Any]]:
         """Get information about the GCP organization.
@@ -174,45 +373,81 @@ class GCPClient:
         Returns:
             Dictionary with organization information or None if not available
         """
-        command = ["gcloud", "organizations", "list", "--format=json", "--quiet"]
-        return self.run_gcloud_command(command)
+        with self._projects_lock:
+            if self._organization_info is None:
+                command = ["gcloud", "organizations", "list", "--format=json", "--quiet"]
+                self._organization_info = self.run_gcloud_command(command)
+            return self._organization_info
     
-    def check_api_status(self, project_id: str, api_id: str) -> str:
-        """Check if an API is enabled for a project.
+    def invalidate_projects_cache(self) -> None:
+        """Forget the projects and organization fetched so far, so the next calls list them again."""
+        with self._projects_lock:
+            self._projects = None
+            self._organization_info = None
+    
+    def list_enabled_apis(self, project_id: str) -> FrozenSet[str]:
+        """List the APIs enabled for a project with a single gcloud call.
+        
+        The list is kept for the lifetime of the client, so checking further APIs of
+        the same project does not run gcloud again.
         
         Args:
             project_id: The GCP project ID
-            api_id: The API ID to check
             
         Returns:
-            Status string: "OK", "MISSING", "CREDENTIAL_ISSUE", or "ERROR"
+            Set of enabled API IDs
+            
+        Raises:
+            subprocess.CalledProcessError: If the services could not be listed
         """
         command = [
-            "gcloud", "services", "list",
+            "gcloud", "services", "list", "--enabled",
             "--project", project_id,
-            "--filter", f"config.name:{api_id}",
-            "--format=value(state)",
+            "--format=value(config.name)",
             "--quiet"
         ]
         
-        try:
-            result = subprocess.run(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                check=True,
-                text=True
-            )
-            
-            output = result.stdout.strip()
+        enabled_apis = self._enabled_apis.get(project_id)
+        if enabled_apis is None:
+            with self._command_slots:
+                result = subprocess.run(
+                    command,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    check=True,
+                    text=True,
+                    env=self._gcloud_env
+                )
+            enabled_apis = self._enabled_apis[project_id] = frozenset(result.stdout.split())
+        return enabled_apis
+    
+    def check_api_statuses(self, project_id: str, api_ids: Iterable[str]) -> Dict[str, str]:
+        """Check if APIs are enabled for a project.
+        
+        Args:
+            project_id: The GCP project ID
+            api_ids: The API IDs to check
             
-            if output == "ENABLED":
-                return "OK"
-            else:
-                return "MISSING"
-                
+        Returns:
+            Dictionary of API ID to status string: "OK", "MISSING", "CREDENTIAL_ISSUE", or "ERROR"
+        """
+        try:
+            enabled_apis = self.list_enabled_apis(project_id)
         except subprocess.CalledProcessError as e:
-            if "PERMISSION_DENIED" in e.stderr:
-                return "CREDENTIAL_ISSUE"
-            else:
-                return "ERROR"
+            status = "CREDENTIAL_ISSUE" if "PERMISSION_DENIED" in e.stderr else "ERROR"
+            return {api_id: status for api_id in api_ids}
+        
+        found = enabled_apis.intersection(api_ids)
+        return {api_id: "OK" if api_id in found else "MISSING" for api_id in api_ids}
+    
+    def check_api_status(self, project_id: str, api_id: str) -> str:
+        """Check if an API is enabled for a project.
+        
+        Args:
+            project_id: The GCP project ID
+            api_id: The API ID to check
+            
+        Returns:
+            Status string: "OK", "MISSING", "CREDENTIAL_ISSUE", or "ERROR"
+        """
+        return self.check_api_statuses(project_id, [api_id])[api_id]
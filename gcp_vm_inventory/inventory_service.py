@@ -5,12 +5,17 @@ This module provides a unified service for collecting inventory data from GCP.
 """
 
 import csv
-import json
+import operator
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import fields, is_dataclass
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Union
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Any, Tuple, Union
+import orjson
+from .cache import GcloudCache
 from .gcp_client import GCPClient
+from .utils import DEFAULT_CONCURRENCY, DEFAULT_PAGE_SIZE, MAX_CONCURRENT_COMMANDS, credential_identity
 from .vm_inventory import VMInventory
 from .bigquery_inventory import BigQueryInventory
 from .models import (
@@ -29,22 +34,73 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Buffer size of export files, large enough to write rows in few syscalls
+WRITE_BUFFER_SIZE = 1 << 20
+
+# orjson options of the JSON exports, indented like json.dump(..., indent=2)
+JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+
+def _csv_columns(item: Any) -> Tuple[Tuple[str, ...], Callable[[Any], Tuple]]:
+    """Get the CSV header for items like this one, and a function returning the row of an item.
+    
+    Dataclass fields are read directly as attributes, without building a dictionary
+    per row. Other items are read through their to_dict method, or as dictionaries.
+    
+    Args:
+        item: First item to export
+        
+    Returns:
+        Tuple of (fieldnames, row getter)
+    """
+    if is_dataclass(item):
+        fieldnames = tuple(f.name for f in fields(item))
+        return fieldnames, operator.attrgetter(*fieldnames)
+    
+    if hasattr(item, 'to_dict'):
+        fieldnames = tuple(item.to_dict())
+        get_values = operator.itemgetter(*fieldnames)
+        return fieldnames, lambda other: get_values(other.to_dict())
+    
+    fieldnames = tuple(item)
+    return fieldnames, operator.itemgetter(*fieldnames)
+
+
+def _json_default(obj: Any) -> Any:
+    """Serialize objects that orjson does not support natively through their to_dict method."""
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
 
 class InventoryService:
     """Service for collecting inventory data from GCP."""
     
-    def __init__(self, project_id: Optional[str] = None, service_account_key: Optional[str] = None):
+    def __init__(self, project_id: Optional[str] = None, service_account_key: Optional[str] = None,
+                 use_cache: bool = False, bq_concurrency: int = DEFAULT_CONCURRENCY,
+                 bq_page_size: int = DEFAULT_PAGE_SIZE, max_workers: int = MAX_CONCURRENT_COMMANDS):
         """Initialize the inventory service.
         
         Args:
             project_id: The GCP project ID (optional)
             service_account_key: Path to service account key file (optional)
+            use_cache: Whether to reuse gcloud results cached on disk by previous runs
+            bq_concurrency: Maximum number of BigQuery datasets processed concurrently
+            bq_page_size: Number of BigQuery datasets or tables requested per page
+            max_workers: Maximum number of gcloud commands run concurrently
         """
         self.project_id = project_id
         self.service_account_key = service_account_key
-        self.client = GCPClient(project_id, service_account_key)
+        self.max_workers = max_workers
+        # Cached results are only reused by runs with the same credentials
+        cache = GcloudCache(identity=credential_identity(service_account_key)) if use_cache else None
+        self.client = GCPClient(project_id, service_account_key, cache, max_workers)
         self.vm_inventory = VMInventory(self.client)
-        self.bq_inventory = BigQueryInventory(self.client)
+        self.bq_inventory = BigQueryInventory(self.client, bq_concurrency, bq_page_size)
+        
+        # Every file exported by this service carries the same timestamp
+        self._run_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._output_dirs_made = set()
     
     def check_api_status(self, project_id: Optional[str] = None) -> List[APIStatus]:
         """Check the status of required APIs.
@@ -62,7 +118,6 @@ class InventoryService:
             "container.googleapis.com": "Kubernetes Engine API"
         }
         
-        api_status_list = []
         projects = []
         
         if project_id:
@@ -76,20 +131,17 @@ class InventoryService:
             
             projects = [p.get('projectId') for p in projects_data]
         
-        for proj_id in projects:
+        def check(proj_id):
             logger.info(f"Checking API status for project: {proj_id}")
-            
-            for api_id, api_name in required_apis.items():
-                status = self.client.check_api_status(proj_id, api_id)
-                
-                api_status_list.append(APIStatus(
-                    project_id=proj_id,
-                    api_id=api_id,
-                    api_name=api_name,
-                    status=status
-                ))
-        
-        return api_status_list
+            statuses = self.client.check_api_statuses(proj_id, list(required_apis))
+            return [
+                APIStatus(project_id=proj_id, api_id=api_id, api_name=api_name, status=statuses[api_id])
+                for api_id, api_name in required_apis.items()
+            ]
+        
+        # List the enabled APIs of every project concurrently, keeping the results in order
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return [status for statuses in executor.map(check, projects) for status in statuses]
     
     def collect_vm_inventory(self, skip_disabled_apis: bool = False) -> List[VMInfo]:
         """Collect VM inventory data.
@@ -105,6 +157,20 @@ class InventoryService:
             skip_disabled_apis=skip_disabled_apis
         )
     
+    def iter_vm_inventory(self, skip_disabled_apis: bool = False) -> Iterator[VMInfo]:
+        """Collect VM inventory data, yielding VMs as they are extracted.
+        
+        Args:
+            skip_disabled_apis: Whether to skip projects with disabled APIs
+            
+        Yields:
+            VMInfo objects
+        """
+        return self.vm_inventory.iter_vm_inventory(
+            project_id=self.project_id,
+            skip_disabled_apis=skip_disabled_apis
+        )
+    
     def collect_bigquery_inventory(self, skip_disabled_apis: bool = False) -> List[BigQueryDatasetInfo]:
         """Collect BigQuery inventory data.
         
@@ -119,6 +185,20 @@ class InventoryService:
             skip_disabled_apis=skip_disabled_apis
         )
     
+    def iter_bigquery_inventory(self, skip_disabled_apis: bool = False) -> Iterator[BigQueryDatasetInfo]:
+        """Collect BigQuery inventory data, yielding datasets as they are extracted.
+        
+        Args:
+            skip_disabled_apis: Whether to skip projects with disabled APIs
+            
+        Yields:
+            BigQueryDatasetInfo objects
+        """
+        return self.bq_inventory.iter_bigquery_inventory(
+            project_id=self.project_id,
+            skip_disabled_apis=skip_disabled_apis
+        )
+    
     def collect_sql_inventory(self, skip_disabled_apis: bool = False) -> List[SQLInstanceInfo]:
         """Collect Cloud SQL inventory data.
         
@@ -146,6 +226,8 @@ class InventoryService:
     def collect_all_inventory(self, skip_disabled_apis: bool = False) -> InventoryResult:
         """Collect all inventory data.
         
+        The API status and every resource type are collected concurrently.
+        
         Args:
             skip_disabled_apis: Whether to skip projects with disabled APIs
             
@@ -154,24 +236,22 @@ class InventoryService:
         """
         logger.info("Starting inventory collection")
         
-        # Check API status first
-        api_status = self.check_api_status(self.project_id)
-        
-        # Collect VM inventory
-        logger.info("Collecting VM inventory")
-        vms = self.collect_vm_inventory(skip_disabled_apis)
-        
-        # Collect BigQuery inventory
-        logger.info("Collecting BigQuery inventory")
-        bigquery_datasets = self.collect_bigquery_inventory(skip_disabled_apis)
-        
-        # Collect SQL inventory
-        logger.info("Collecting Cloud SQL inventory")
-        sql_instances = self.collect_sql_inventory(skip_disabled_apis)
-        
-        # Collect GKE inventory
-        logger.info("Collecting GKE inventory")
-        gke_clusters = self.collect_gke_inventory(skip_disabled_apis)
+        # The API check and the collectors are independent, so run them all at once.
+        # They share the GCP client, whose gcloud calls and caches are thread-safe.
+        with ThreadPoolExecutor(max_workers=5, thread_name_prefix='collector') as executor:
+            api_status_future = executor.submit(self.check_api_status, self.project_id)
+            
+            logger.info("Collecting VM, BigQuery, Cloud SQL and GKE inventory")
+            vms_future = executor.submit(self.collect_vm_inventory, skip_disabled_apis)
+            bigquery_future = executor.submit(self.collect_bigquery_inventory, skip_disabled_apis)
+            sql_future = executor.submit(self.collect_sql_inventory, skip_disabled_apis)
+            gke_future = executor.submit(self.collect_gke_inventory, skip_disabled_apis)
+            
+            api_status = api_status_future.result()
+            vms = vms_future.result()
+            bigquery_datasets = bigquery_future.result()
+            sql_instances = sql_future.result()
+            gke_clusters = gke_future.result()
         
         logger.info("Inventory collection completed")
         
@@ -184,36 +264,42 @@ class InventoryService:
             api_status=api_status
         )
     
-    def export_to_csv(self, data: List[Union[VMInfo, SQLInstanceInfo, BigQueryDatasetInfo, GKEClusterInfo]], 
+    def _make_output_dir(self, output_dir: str) -> None:
+        """Create an output directory, once per service rather than once per exported file."""
+        if output_dir not in self._output_dirs_made:
+            os.makedirs(output_dir, exist_ok=True)
+            self._output_dirs_made.add(output_dir)
+    
+    def export_to_csv(self, data: Iterable[Union[VMInfo, SQLInstanceInfo, BigQueryDatasetInfo, GKEClusterInfo]], 
                      output_dir: str, filename_prefix: str) -> Optional[str]:
         """Export data to a CSV file.
         
+        Items are converted and written one at a time, so data can be a generator.
+        
         Args:
-            data: List of data objects to export
+            data: Iterable of data objects to export
             output_dir: Directory to store the CSV output
             filename_prefix: Prefix for the CSV filename
             
         Returns:
             Path to the created CSV file or None if export failed
         """
-        if not data:
+        items = iter(data)
+        first_item = next(items, None)
+        if first_item is None:
             logger.warning(f"No {filename_prefix} data to export.")
             return None
         
-        os.makedirs(output_dir, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = os.path.join(output_dir, f"{filename_prefix}_{timestamp}.csv")
-        
-        # Convert data objects to dictionaries
-        dict_data = [item.to_dict() if hasattr(item, 'to_dict') else item for item in data]
-        
-        fieldnames = dict_data[0].keys()
+        self._make_output_dir(output_dir)
+        filename = os.path.join(output_dir, f"{filename_prefix}_{self._run_timestamp}.csv")
         
         try:
-            with open(filename, 'w', newline='') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(dict_data)
+            fieldnames, get_values = _csv_columns(first_item)
+            with open(filename, 'w', newline='', buffering=WRITE_BUFFER_SIZE) as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(fieldnames)
+                writer.writerow(get_values(first_item))
+                writer.writerows(map(get_values, items))
             
             logger.info(f"Data exported to {filename}")
             return filename
@@ -236,24 +322,103 @@ class InventoryService:
             logger.warning(f"No {filename_prefix} data to export.")
             return None
         
-        os.makedirs(output_dir, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = os.path.join(output_dir, f"{filename_prefix}_{timestamp}.json")
-        
-        # Convert data objects to dictionaries if they have a to_dict method
-        if hasattr(data, 'to_dict'):
-            dict_data = data.to_dict()
-        elif isinstance(data, list) and all(hasattr(item, 'to_dict') for item in data):
-            dict_data = [item.to_dict() for item in data]
-        else:
-            dict_data = data
+        self._make_output_dir(output_dir)
+        filename = os.path.join(output_dir, f"{filename_prefix}_{self._run_timestamp}.json")
         
         try:
-            with open(filename, 'w') as jsonfile:
-                json.dump(dict_data, jsonfile, indent=2)
+            # Dataclasses are serialized directly, without converting them to dictionaries first
+            if hasattr(data, 'to_json'):
+                content = data.to_json(JSON_OPTIONS)
+            else:
+                content = orjson.dumps(data, default=_json_default, option=JSON_OPTIONS)
+            
+            with open(filename, 'wb', buffering=WRITE_BUFFER_SIZE) as jsonfile:
+                jsonfile.write(content)
             
             logger.info(f"Data exported to {filename}")
             return filename
         except Exception as e:
             logger.error(f"Error exporting data to JSON: {str(e)}")
             return None
+    
+    def export_all(self, result: InventoryResult, output_dir: str) -> List[str]:
+        """Export a full inventory to a run_<timestamp> subdirectory of the output directory.
+        
+        Each resource type is written to its own CSV file, and the whole result to
+        one JSON file.
+        
+        Args:
+            result: Inventory to export
+            output_dir: Directory in which the run directory is created
+            
+        Returns:
+            Paths of the created files
+        """
+        run_dir = os.path.join(output_dir, f"run_{self._run_timestamp}")
+        exports = [
+            (result.vms, 'vm_inventory'),
+            (result.sql_instances, 'sql_inventory'),
+            (result.bigquery_datasets, 'bigquery_inventory'),
+            (result.gke_clusters, 'gke_inventory')
+        ]
+        
+        filenames = [self.export_to_csv(data, run_dir, prefix) for data, prefix in exports if data]
+        filenames.append(self.export_to_json(result, run_dir, 'inventory'))
+        return [filename for filename in filenames if filename]
+    
+    def export_inventory(self, items: Iterable[Union[VMInfo, SQLInstanceInfo, BigQueryDatasetInfo, GKEClusterInfo]],
+                         output_dir: str, filename_prefix: str, output_format: str = 'csv') -> int:
+        """Export inventory data to CSV and/or JSON files while it is being collected.
+        
+        Each item is written as soon as it is produced, so memory use does not grow
+        with the size of the inventory. If the collection is interrupted, the files
+        still hold the items written so far and the JSON array is closed.
+        
+        Args:
+            items: Data objects to export, typically a generator such as iter_vm_inventory
+            output_dir: Directory to store the output files
+            filename_prefix: Prefix for the filenames
+            output_format: Output format ('csv', 'json' or 'both')
+            
+        Returns:
+            Number of exported items
+        """
+        base_filename = os.path.join(output_dir, f"{filename_prefix}_{self._run_timestamp}")
+        csv_file = json_file = writer = None
+        count = 0
+        
+        try:
+            for item in items:
+                if count == 0:
+                    # Create the files with the first item, so that empty inventories leave no files
+                    self._make_output_dir(output_dir)
+                    if output_format in ['csv', 'both']:
+                        csv_file = open(f"{base_filename}.csv", 'w', newline='', buffering=WRITE_BUFFER_SIZE)
+                        fieldnames, get_values = _csv_columns(item)
+                        writer = csv.writer(csv_file)
+                        writer.writerow(fieldnames)
+                    if output_format in ['json', 'both']:
+                        json_file = open(f"{base_filename}.json", 'wb', buffering=WRITE_BUFFER_SIZE)
+                        json_file.write(b'[\n')
+                elif json_file:
+                    json_file.write(b',\n')
+                
+                if writer:
+                    writer.writerow(get_values(item))
+                if json_file:
+                    # Indent the item as if the whole list had been dumped at once
+                    content = orjson.dumps(item, default=_json_default, option=JSON_OPTIONS)
+                    json_file.write(b'  ' + content.replace(b'\n', b'\n  '))
+                count += 1
+        except OSError as e:
+            logger.error(f"Error exporting {filename_prefix} data: {str(e)}")
+        finally:
+            if csv_file:
+                csv_file.close()
+                logger.info(f"Data exported to {csv_file.name}")
+            if json_file:
+                json_file.write(b'\n]')
+                json_file.close()
+                logger.info(f"Data exported to {json_file.name}")
+        
+        return count
@@ -4,11 +4,59 @@ Data models for GCP VM Inventory Tool.
 This module defines the data models used throughout the application.
 """
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 
+import orjson
 
+
+def _with_slots(cls):
+    """Rebuild a dataclass with __slots__ for its fields.
+    
+    Instances then have no per-object __dict__, which makes them smaller and their
+    attributes faster to read. This is what dataclass(slots=True) does on Python
+    3.10+. Subclasses must be decorated as well to keep the benefit.
+    
+    Args:
+        cls: Dataclass to rebuild
+        
+    Returns:
+        Equivalent dataclass using __slots__
+    """
+    field_names = tuple(f.name for f in fields(cls))
+    cls_dict = dict(cls.__dict__)
+    cls_dict['__slots__'] = field_names
+    # Defaults are kept by the generated __init__ and would clash with the slots
+    for name in field_names + ('__dict__', '__weakref__'):
+        cls_dict.pop(name, None)
+    return type(cls)(cls.__name__, cls.__bases__, cls_dict)
+
+
+def _with_to_dict(cls):
+    """Add a to_dict method returning the fields of a dataclass by name.
+    
+    The field names are read once, at class definition, rather than written by
+    hand for every model or introspected on each call.
+    
+    Args:
+        cls: Dataclass to extend
+        
+    Returns:
+        The same class with a to_dict method
+    """
+    field_names = tuple(f.name for f in fields(cls))
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary."""
+        return {name: getattr(self, name) for name in field_names}
+    
+    to_dict.__qualname__ = f"{cls.__qualname__}.to_dict"
+    cls.to_dict = to_dict
+    return cls
+
+
+@_with_slots
 @dataclass
 class MachineTypeInfo:
     """Information about a GCP machine type."""
@@ -16,6 +64,8 @@ class MachineTypeInfo:
     memory_mb: int = 0
 
 
+@_with_slots
+@_with_to_dict
 @dataclass
 class VMInfo:
     """Information about a GCP VM instance."""
@@ -32,26 +82,10 @@ class VMInfo:
     network: str = "N/A"
     internal_ip: str = "N/A"
     external_ip: str = "N/A"
-    
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary."""
-        return {
-            'project_id': self.project_id,
-            'vm_id': self.vm_id,
-            'name': self.name,
-            'zone': self.zone,
-            'status': self.status,
-            'machine_type': self.machine_type,
-            'cpu_count': self.cpu_count,
-            'memory_mb': self.memory_mb,
-            'os': self.os,
-            'creation_timestamp': self.creation_timestamp,
-            'network': self.network,
-            'internal_ip': self.internal_ip,
-            'external_ip': self.external_ip
-        }
 
 
+@_with_slots
+@_with_to_dict
 @dataclass
 class SQLInstanceInfo:
     """Information about a GCP Cloud SQL instance."""
@@ -67,25 +101,35 @@ class SQLInstanceInfo:
     creation_time: str = "N/A"
     public_ip: str = "N/A"
     private_ip: str = "N/A"
-    
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary."""
-        return {
-            'project_id': self.project_id,
-            'instance_name': self.instance_name,
-            'database_version': self.database_version,
-            'region': self.region,
-            'tier': self.tier,
-            'storage_size_gb': self.storage_size_gb,
-            'storage_type': self.storage_type,
-            'availability_type': self.availability_type,
-            'state': self.state,
-            'creation_time': self.creation_time,
-            'public_ip': self.public_ip,
-            'private_ip': self.private_ip
-        }
 
 
+@_with_slots
+@dataclass
+class BigQueryDatasetSummary:
+    """Summary of a BigQuery dataset as listed in a project."""
+    project_id: str
+    dataset_id: str
+    location: str
+    creation_time: Optional[float]
+    last_modified_time: Optional[float]
+
+
+@_with_slots
+@dataclass
+class BigQueryTableInfo:
+    """Information about a table of a BigQuery dataset."""
+    project_id: str
+    dataset_id: str
+    table_id: str
+    num_bytes: Optional[int]
+    num_rows: Optional[int]
+    creation_time: Optional[float]
+    last_modified_time: Optional[float]
+    table_type: Optional[str]
+
+
+@_with_slots
+@_with_to_dict
 @dataclass
 class BigQueryDatasetInfo:
     """Information about a GCP BigQuery dataset."""
@@ -96,20 +140,10 @@ class BigQueryDatasetInfo:
     last_modified_time: Optional[float] = None
     table_count: int = 0
     total_size_gb: float = 0.0
-    
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary."""
-        return {
-            'project_id': self.project_id,
-            'dataset_id': self.dataset_id,
-            'location': self.location,
-            'creation_time': self.creation_time,
-            'last_modified_time': self.last_modified_time,
-            'table_count': self.table_count,
-            'total_size_gb': self.total_size_gb
-        }
 
 
+@_with_slots
+@_with_to_dict
 @dataclass
 class GKEClusterInfo:
     """Information about a GCP GKE cluster."""
@@ -123,23 +157,10 @@ class GKEClusterInfo:
     network: str = "N/A"
     subnetwork: str = "N/A"
     creation_time: str = "N/A"
-    
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary."""
-        return {
-            'project_id': self.project_id,
-            'cluster_name': self.cluster_name,
-            'location': self.location,
-            'status': self.status,
-            'kubernetes_version': self.kubernetes_version,
-            'node_count': self.node_count,
-            'node_pools': self.node_pools,
-            'network': self.network,
-            'subnetwork': self.subnetwork,
-            'creation_time': self.creation_time
-        }
 
 
+@_with_slots
+@_with_to_dict
 @dataclass
 class APIStatus:
     """Status of a GCP API."""
@@ -147,17 +168,9 @@ class APIStatus:
     api_id: str
     api_name: str
     status: str
-    
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary."""
-        return {
-            'project_id': self.project_id,
-            'api_id': self.api_id,
-            'api_name': self.api_name,
-            'status': self.status
-        }
 
 
+@_with_slots
 @dataclass
 class InventoryResult:
     """Result of an inventory collection operation."""
@@ -178,3 +191,17 @@ class InventoryResult:
             'gke_clusters': [gke.to_dict() for gke in self.gke_clusters],
             'api_status': [api.to_dict() for api in self.api_status]
         }
+    
+    def to_json(self, option: int = 0) -> bytes:
+        """Serialize to JSON, with the same content as to_dict.
+        
+        orjson reads the dataclasses and the timestamp directly, without building
+        the intermediate dictionaries.
+        
+        Args:
+            option: orjson serialization options
+            
+        Returns:
+            UTF-8 encoded JSON document
+        """
+        return orjson.dumps(self, option=option)
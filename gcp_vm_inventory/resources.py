@@ -5,17 +5,42 @@ This module provides functionality to collect information about various GCP reso
 including SQL instances, BigQuery datasets, and GKE clusters.
 """
 
-import json
-from google.cloud import bigquery
-from google.oauth2 import service_account
+import operator
 import os
-from .core import run_gcloud_command, get_projects
-from .utils import check_gcloud_installed
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .api_checker import is_api_disabled
+from .core import run_gcloud_command, get_projects, get_organization_info, MAX_WORKERS
+from .utils import (
+    check_gcloud_installed, get_credentials, resource_name, BYTES_PER_GB, TABLE_TYPES, SQL_INSTANCE_FORMAT, GKE_CLUSTER_FORMAT,
+    SQL_INSTANCE_FIELDS, GKE_CLUSTER_FIELDS
+)
+
+# Maximum number of concurrent BigQuery requests per project
+DATASET_WORKERS = 32
+
+# Number of tables listed per page, the maximum allowed by the API
+TABLE_PAGE_SIZE = 1000
+
+# BigQuery clients created so far, keyed by (project_id, service_account_key)
+_bigquery_clients = {}
+_bigquery_clients_lock = threading.Lock()
+
+SQL_ADMIN_API_URL = "https://sqladmin.googleapis.com/v1"
+CONTAINER_API_URL = "https://container.googleapis.com/v1"
+REST_REQUEST_TIMEOUT = 120  # seconds
+
+# HTTP sessions for direct REST calls, keyed by service account key (None when unavailable)
+_sessions = {}
+_sessions_lock = threading.Lock()
 
 
 def get_bigquery_client(project_id, service_account_key=None):
     """Get a BigQuery client for a specific project.
     
+    Clients are created once per project and key and then reused. Clients of
+    different projects share the key's authorized session and its connections.
+    
     Args:
         project_id: The GCP project ID
         service_account_key: Path to service account key file (optional)
@@ -23,24 +48,102 @@ def get_bigquery_client(project_id, service_account_key=None):
     Returns:
         BigQuery client
     """
+    key = (project_id, service_account_key)
+    with _bigquery_clients_lock:
+        client = _bigquery_clients.get(key)
+        if client is not None:
+            return client
+        
+        try:
+            # Imported here so that runs without BigQuery do not pay for loading the SDK
+            from google.cloud import bigquery
+            session = get_authorized_session(service_account_key)
+            if session is not None:
+                # All projects share the session, and so its pool of open connections
+                client = bigquery.Client(project=project_id, credentials=session.credentials, _http=session)
+            else:
+                from requests.adapters import HTTPAdapter
+                client = bigquery.Client(project=project_id, credentials=get_credentials(service_account_key))
+                # Keep a connection for every concurrent dataset request
+                client._http.mount(
+                    "https://", HTTPAdapter(pool_connections=DATASET_WORKERS, pool_maxsize=DATASET_WORKERS)
+                )
+        except Exception as e:
+            print(f"Error creating BigQuery client: {str(e)}")
+            return None
+        
+        _bigquery_clients[key] = client
+        return client
+
+
+def get_authorized_session(service_account_key=None):
+    """Get the HTTP session used for direct REST API calls.
+    
+    Args:
+        service_account_key: Path to service account key file (optional)
+        
+    Returns:
+        Authorized session, or None if no credentials are available to the libraries
+        (for example when only the gcloud CLI has been logged in)
+    """
+    with _sessions_lock:
+        if service_account_key not in _sessions:
+            try:
+                from google.auth.transport.requests import AuthorizedSession
+                from requests.adapters import HTTPAdapter
+                session = AuthorizedSession(get_credentials(service_account_key))
+                # Keep a connection for every dataset request of every concurrently collected project
+                pool_size = MAX_WORKERS * DATASET_WORKERS
+                session.mount("https://", HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+                _sessions[service_account_key] = session
+            except Exception as e:
+                print(f"API credentials not available, using gcloud instead: {str(e)}")
+                _sessions[service_account_key] = None
+        return _sessions[service_account_key]
+
+
+def list_rest_resources(url, items_key, fields=None, service_account_key=None):
+    """List resources with a REST API call made in process instead of a gcloud subprocess.
+    
+    The REST resources are the same documents gcloud prints with --format=json.
+    
+    Args:
+        url: URL of the list method
+        items_key: Key of the resources in the response, such as "items"
+        fields: Partial-response field mask (optional)
+        service_account_key: Path to service account key file (optional)
+        
+    Returns:
+        List of resource dictionaries, or None if the API could not be called and
+        the caller should fall back to gcloud
+    """
+    session = get_authorized_session(service_account_key)
+    if session is None:
+        return None
+    
+    params = {"fields": fields} if fields else {}
+    items = []
     try:
-        if service_account_key:
-            credentials = service_account.Credentials.from_service_account_file(
-                service_account_key,
-                scopes=["https://www.googleapis.com/auth/cloud-platform"]
-            )
-            return bigquery.Client(project=project_id, credentials=credentials)
-        else:
-            # Use default credentials from environment
-            return bigquery.Client(project=project_id)
+        while True:
+            response = session.get(url, params=params, timeout=REST_REQUEST_TIMEOUT)
+            if response.status_code != 200:
+                print(f"Warning: {url} returned {response.status_code}, using gcloud instead")
+                return None
+            page = response.json()
+            items.extend(page.get(items_key, []))
+            if not page.get("nextPageToken"):
+                return items
+            params["pageToken"] = page["nextPageToken"]
     except Exception as e:
-        print(f"Error creating BigQuery client: {str(e)}")
+        print(f"Warning: Could not call {url}, using gcloud instead: {str(e)}")
         return None
 
 
 def get_sql_instances(project_id, service_account_key=None):
     """Get all Cloud SQL instances in a specific project.
     
+    The Cloud SQL Admin API is called directly when possible, otherwise gcloud is used.
+    
     Args:
         project_id: The GCP project ID
         service_account_key: Path to service account key file (optional)
@@ -48,10 +151,16 @@ def get_sql_instances(project_id, service_account_key=None):
     Returns:
         List of SQL instance data
     """
+    instances = list_rest_resources(
+        f"{SQL_ADMIN_API_URL}/projects/{project_id}/instances", "items", SQL_INSTANCE_FIELDS, service_account_key
+    )
+    if instances is not None:
+        return instances
+    
     command = [
         "gcloud", "sql", "instances", "list",
         "--project", project_id,
-        "--format=json",
+        f"--format={SQL_INSTANCE_FORMAT}",
         "--quiet"
     ]
     return run_gcloud_command(command, service_account_key=service_account_key)
@@ -67,21 +176,31 @@ def extract_sql_instance_info(instance, project_id):
     Returns:
         Dictionary with SQL instance information
     """
+    get = instance.get
+    settings_get = (get('settings') or {}).get
+    ip_addresses = get('ipAddresses') or ()
+    
+    # The first address is reported as public, whatever its type
+    public_ip = ip_addresses[0].get('ipAddress', 'N/A') if ip_addresses else 'N/A'
+    private_ip = 'N/A'
+    for ip in ip_addresses:
+        if ip.get('type') == 'PRIVATE':
+            private_ip = ip.get('ipAddress')
+            break
+    
     return {
         'project_id': project_id,
-        'instance_name': instance.get('name', 'N/A'),
-        'database_version': instance.get('databaseVersion', 'N/A'),
-        'region': instance.get('region', 'N/A'),
-        'tier': instance.get('settings', {}).get('tier', 'N/A'),
-        'storage_size_gb': instance.get('settings', {}).get('dataDiskSizeGb', 'N/A'),
-        'storage_type': instance.get('settings', {}).get('dataDiskType', 'N/A'),
-        'availability_type': instance.get('settings', {}).get('availabilityType', 'N/A'),
-        'state': instance.get('state', 'N/A'),
-        'creation_time': instance.get('createTime', 'N/A'),
-        'public_ip': instance.get('ipAddresses', [{}])[0].get('ipAddress', 'N/A') 
-                    if instance.get('ipAddresses') else 'N/A',
-        'private_ip': next((ip.get('ipAddress') for ip in instance.get('ipAddresses', []) 
-                          if ip.get('type') == 'PRIVATE'), 'N/A')
+        'instance_name': get('name', 'N/A'),
+        'database_version': get('databaseVersion', 'N/A'),
+        'region': get('region', 'N/A'),
+        'tier': settings_get('tier', 'N/A'),
+        'storage_size_gb': settings_get('dataDiskSizeGb', 'N/A'),
+        'storage_type': settings_get('dataDiskType', 'N/A'),
+        'availability_type': settings_get('availabilityType', 'N/A'),
+        'state': get('state', 'N/A'),
+        'creation_time': get('createTime', 'N/A'),
+        'public_ip': public_ip,
+        'private_ip': private_ip
     }
 
 
@@ -107,10 +226,14 @@ def get_bigquery_datasets(project_id, service_account_key=None):
         for dataset in datasets:
             # DatasetListItem objects don't have a location attribute
             # We need to get the full dataset to access the location
+            # Its creation and modification times are kept too, so they are not fetched again
+            creation_time = last_modified_time = None
             try:
                 dataset_ref = client.dataset(dataset.dataset_id)
                 full_dataset = client.get_dataset(dataset_ref)
                 location = full_dataset.location
+                creation_time = full_dataset.created.timestamp() * 1000 if full_dataset.created else None
+                last_modified_time = full_dataset.modified.timestamp() * 1000 if full_dataset.modified else None
             except Exception as e:
                 print(f"Warning: Could not get location for dataset {dataset.dataset_id}: {str(e)}")
                 location = "unknown"
@@ -122,7 +245,9 @@ def get_bigquery_datasets(project_id, service_account_key=None):
                 },
                 'id': f"{project_id}:{dataset.dataset_id}",
                 'kind': 'bigquery#dataset',
-                'location': location
+                'location': location,
+                'creationTime': creation_time,  # In milliseconds
+                'lastModifiedTime': last_modified_time
             })
         return result
     except Exception as e:
@@ -166,9 +291,109 @@ def get_bigquery_dataset_info(project_id, dataset_id, service_account_key=None):
         return None
 
 
+def query_bigquery_tables(client, project_id, dataset_id):
+    """Get all tables in a BigQuery dataset with a single query on its __TABLES__ meta-table.
+    
+    Args:
+        client: BigQuery client
+        project_id: The GCP project ID
+        dataset_id: The BigQuery dataset ID
+        
+    Returns:
+        List of table data, or None if the query failed
+    """
+    query = (
+        f"SELECT table_id, row_count, size_bytes, creation_time, last_modified_time, type "
+        f"FROM `{project_id}.{dataset_id}.__TABLES__`"
+    )
+    try:
+        rows = client.query(query).result()
+        return [
+            {
+                'id': f"{project_id}:{dataset_id}.{row.table_id}",
+                'tableReference': {
+                    'projectId': project_id,
+                    'datasetId': dataset_id,
+                    'tableId': row.table_id
+                },
+                'numBytes': row.size_bytes,
+                'numRows': row.row_count,
+                'creationTime': row.creation_time,  # Already in milliseconds
+                'lastModifiedTime': row.last_modified_time,
+                'type': TABLE_TYPES.get(row.type, 'N/A')
+            }
+            for row in rows
+        ]
+    except Exception as e:
+        print(f"Warning: Could not query tables of dataset {dataset_id}: {str(e)}")
+        return None
+
+
+def get_bigquery_table_info(client, project_id, dataset_id, table):
+    """Get detailed information about a listed BigQuery table.
+    
+    Args:
+        client: BigQuery client
+        project_id: The GCP project ID
+        dataset_id: The BigQuery dataset ID
+        table: TableListItem of the table
+        
+    Returns:
+        Dictionary with table information
+    """
+    table_info = {
+        'id': f"{project_id}:{dataset_id}.{table.table_id}",
+        'tableReference': {
+            'projectId': project_id,
+            'datasetId': dataset_id,
+            'tableId': table.table_id
+        }
+    }
+    try:
+        table_ref = client.get_table(table.reference)
+        table_info.update({
+            'numBytes': table_ref.num_bytes,
+            'numRows': table_ref.num_rows,
+            'creationTime': table_ref.created.timestamp() * 1000 if table_ref.created else None,
+            'lastModifiedTime': table_ref.modified.timestamp() * 1000 if table_ref.modified else None,
+            'type': table_ref.table_type
+        })
+    except Exception as e:
+        print(f"Error getting details for table {table.table_id}: {str(e)}")
+        # Add basic info without details
+        table_info.update({
+            'numBytes': 0,
+            'numRows': 0
+        })
+    return table_info
+
+
+def list_bigquery_tables(client, project_id, dataset_id):
+    """Get all tables in a BigQuery dataset by listing and fetching them.
+    
+    The table list carries no sizes, so every table is fetched. This is a fallback
+    that already runs in the dataset pool of extract_bigquery_info, itself in the
+    project pool, so the tables are fetched one after the other instead of in a
+    third level of threads.
+    
+    Args:
+        client: BigQuery client
+        project_id: The GCP project ID
+        dataset_id: The BigQuery dataset ID
+        
+    Returns:
+        List of table data
+    """
+    tables = client.list_tables(client.dataset(dataset_id), page_size=TABLE_PAGE_SIZE)
+    return [get_bigquery_table_info(client, project_id, dataset_id, table) for table in tables]
+
+
 def get_bigquery_tables(project_id, dataset_id, service_account_key=None):
     """Get all tables in a BigQuery dataset using the API.
     
+    The tables are read from the dataset's __TABLES__ meta-table in one query. If
+    that is not possible, they are listed and fetched.
+    
     Args:
         project_id: The GCP project ID
         dataset_id: The BigQuery dataset ID
@@ -181,50 +406,71 @@ def get_bigquery_tables(project_id, dataset_id, service_account_key=None):
         client = get_bigquery_client(project_id, service_account_key)
         if not client:
             return []
-            
-        dataset_ref = client.dataset(dataset_id)
-        tables = list(client.list_tables(dataset_ref))
         
-        # Get detailed information for each table
-        result = []
-        for table in tables:
-            try:
-                table_ref = client.get_table(table.reference)
-                result.append({
-                    'id': f"{project_id}:{dataset_id}.{table.table_id}",
-                    'tableReference': {
-                        'projectId': project_id,
-                        'datasetId': dataset_id,
-                        'tableId': table.table_id
-                    },
-                    'numBytes': table_ref.num_bytes,
-                    'numRows': table_ref.num_rows,
-                    'creationTime': table_ref.created.timestamp() * 1000 if table_ref.created else None,
-                    'lastModifiedTime': table_ref.modified.timestamp() * 1000 if table_ref.modified else None,
-                    'type': table_ref.table_type
-                })
-            except Exception as e:
-                print(f"Error getting details for table {table.table_id}: {str(e)}")
-                # Add basic info without details
-                result.append({
-                    'id': f"{project_id}:{dataset_id}.{table.table_id}",
-                    'tableReference': {
-                        'projectId': project_id,
-                        'datasetId': dataset_id,
-                        'tableId': table.table_id
-                    },
-                    'numBytes': 0,
-                    'numRows': 0
-                })
-        return result
+        result = query_bigquery_tables(client, project_id, dataset_id)
+        if result is not None:
+            return result
+            
+        return list_bigquery_tables(client, project_id, dataset_id)
     except Exception as e:
         print(f"Error getting BigQuery tables for {project_id}:{dataset_id}: {str(e)}")
         return []
 
 
+def get_bigquery_dataset_stats(client, project_id, dataset_id):
+    """Get the number of tables and their total size in a BigQuery dataset.
+    
+    Both are aggregated by BigQuery in a single query on the dataset's __TABLES__
+    meta-table, without listing or fetching the tables.
+    
+    Args:
+        client: BigQuery client
+        project_id: The GCP project ID
+        dataset_id: The BigQuery dataset ID
+        
+    Returns:
+        Tuple of (table_count, total_size_bytes) or None if the query failed
+    """
+    query = (
+        f"SELECT COUNT(*), SUM(size_bytes) "
+        f"FROM `{project_id}.{dataset_id}.__TABLES__`"
+    )
+    try:
+        for row in client.query(query).result():
+            return row[0], row[1] or 0
+    except Exception as e:
+        print(f"Warning: Could not query table statistics for dataset {dataset_id}: {str(e)}")
+    return None
+
+
+def get_bigquery_dataset_size(client, project_id, dataset_id):
+    """Get the number of tables and their total size in bytes in a BigQuery dataset.
+    
+    Args:
+        client: BigQuery client
+        project_id: The GCP project ID
+        dataset_id: The BigQuery dataset ID
+        
+    Returns:
+        Tuple of (table_count, total_size_bytes)
+    """
+    stats = get_bigquery_dataset_stats(client, project_id, dataset_id)
+    if stats:
+        return stats
+    
+    # Fall back to fetching every table
+    tables = list_bigquery_tables(client, project_id, dataset_id)
+    # Summed by builtins over the values, skipping unknown (None) sizes
+    return len(tables), sum(filter(None, map(operator.itemgetter('numBytes'), tables)))
+
+
 def extract_bigquery_info(project_id, service_account_key=None):
     """Extract BigQuery storage information for a project.
     
+    The sizes of the datasets are independent requests, so they are all fetched
+    concurrently and joined per dataset at the end. Their timestamps come with the
+    dataset list.
+    
     Args:
         project_id: The GCP project ID
         service_account_key: Path to service account key file (optional)
@@ -243,63 +489,37 @@ def extract_bigquery_info(project_id, service_account_key=None):
         
         print(f"Found {len(datasets)} datasets in project {project_id}")
         
+        # Datasets were listed, so the project's client exists and is cached
         client = get_bigquery_client(project_id, service_account_key)
-        if not client:
-            print(f"Could not create BigQuery client for project {project_id}")
-            return bq_info
         
-        for dataset in datasets:
-            dataset_id = dataset.get('datasetReference', {}).get('datasetId')
-            if not dataset_id:
-                continue
+        with ThreadPoolExecutor(max_workers=DATASET_WORKERS) as executor:
+            tasks = []
+            for dataset in datasets:
+                dataset_id = dataset['datasetReference']['datasetId']
+                print(f"Processing dataset: {dataset_id}")
+                tasks.append((dataset, executor.submit(get_bigquery_dataset_size, client, project_id, dataset_id)))
             
-            print(f"Processing dataset: {dataset_id}")
-            
-            # Get dataset details - we already have most of what we need from the datasets list
-            location = dataset.get('location', 'N/A')
-            
-            # Get tables in the dataset
-            try:
-                dataset_ref = client.dataset(dataset_id)
-                tables = list(client.list_tables(dataset_ref))
-                
-                # Calculate total storage
-                total_size_bytes = 0
-                table_count = len(tables)
-                
-                for table in tables:
-                    try:
-                        table_ref = client.get_table(table.reference)
-                        total_size_bytes += table_ref.num_bytes or 0
-                    except Exception as e:
-                        print(f"Warning: Could not get size for table {table.table_id}: {str(e)}")
-                
-                total_size_gb = round(total_size_bytes / (1024 * 1024 * 1024), 2) if total_size_bytes > 0 else 0
-                
-                # Get creation and modification times
+            for dataset, size_future in tasks:
+                dataset_id = dataset['datasetReference']['datasetId']
                 try:
-                    full_dataset = client.get_dataset(dataset_ref)
-                    creation_time = full_dataset.created.timestamp() * 1000 if full_dataset.created else None
-                    last_modified_time = full_dataset.modified.timestamp() * 1000 if full_dataset.modified else None
+                    table_count, total_size_bytes = size_future.result()
+                    total_size_gb = round(total_size_bytes / BYTES_PER_GB, 2)
+                    
+                    bq_info.append({
+                        'project_id': project_id,
+                        'dataset_id': dataset_id,
+                        # We already have the location from the datasets list
+                        'location': dataset.get('location', 'N/A'),
+                        'creation_time': dataset.get('creationTime'),
+                        'last_modified_time': dataset.get('lastModifiedTime'),
+                        'table_count': table_count,
+                        'total_size_gb': total_size_gb
+                    })
+                    
+                    print(f"Added dataset {dataset_id} with {table_count} tables and {total_size_gb} GB")
+                    
                 except Exception as e:
-                    print(f"Warning: Could not get timestamps for dataset {dataset_id}: {str(e)}")
-                    creation_time = None
-                    last_modified_time = None
-                
-                bq_info.append({
-                    'project_id': project_id,
-                    'dataset_id': dataset_id,
-                    'location': location,
-                    'creation_time': creation_time,
-                    'last_modified_time': last_modified_time,
-                    'table_count': table_count,
-                    'total_size_gb': total_size_gb
-                })
-                
-                print(f"Added dataset {dataset_id} with {table_count} tables and {total_size_gb} GB")
-                
-            except Exception as e:
-                print(f"Error processing dataset {dataset_id}: {str(e)}")
+                    print(f"Error processing dataset {dataset_id}: {str(e)}")
     except Exception as e:
         print(f"Error extracting BigQuery info for project {project_id}: {str(e)}")
     
@@ -309,6 +529,8 @@ def extract_bigquery_info(project_id, service_account_key=None):
 def get_gke_clusters(project_id, service_account_key=None):
     """Get all GKE clusters in a specific project.
     
+    The Kubernetes Engine API is called directly when possible, otherwise gcloud is used.
+    
     Args:
         project_id: The GCP project ID
         service_account_key: Path to service account key file (optional)
@@ -316,10 +538,18 @@ def get_gke_clusters(project_id, service_account_key=None):
     Returns:
         List of GKE cluster data
     """
+    # The "-" location lists the clusters of every zone and region in one call
+    clusters = list_rest_resources(
+        f"{CONTAINER_API_URL}/projects/{project_id}/locations/-/clusters", "clusters", GKE_CLUSTER_FIELDS,
+        service_account_key
+    )
+    if clusters is not None:
+        return clusters
+    
     command = [
         "gcloud", "container", "clusters", "list",
         "--project", project_id,
-        "--format=json",
+        f"--format={GKE_CLUSTER_FORMAT}",
         "--quiet"
     ]
     return run_gcloud_command(command, service_account_key=service_account_key)
@@ -335,30 +565,162 @@ def extract_gke_cluster_info(cluster, project_id):
     Returns:
         Dictionary with GKE cluster information
     """
-    node_pools = cluster.get('nodePools', [])
-    total_nodes = sum(pool.get('initialNodeCount', 0) for pool in node_pools)
+    get = cluster.get
+    node_pools = get('nodePools') or ()
+    total_nodes = 0
+    for pool in node_pools:
+        total_nodes += pool.get('initialNodeCount', 0)
     
     return {
         'project_id': project_id,
-        'cluster_name': cluster.get('name', 'N/A'),
-        'location': cluster.get('location', 'N/A'),
-        'status': cluster.get('status', 'N/A'),
-        'kubernetes_version': cluster.get('currentMasterVersion', 'N/A'),
+        'cluster_name': get('name', 'N/A'),
+        'location': get('location', 'N/A'),
+        'status': get('status', 'N/A'),
+        'kubernetes_version': get('currentMasterVersion', 'N/A'),
         'node_count': total_nodes,
         'node_pools': len(node_pools),
-        'network': cluster.get('network', 'N/A'),
-        'subnetwork': cluster.get('subnetwork', 'N/A'),
-        'creation_time': cluster.get('createTime', 'N/A')
+        'network': get('network', 'N/A'),
+        'subnetwork': get('subnetwork', 'N/A'),
+        'creation_time': get('createTime', 'N/A')
     }
 
 
-def collect_sql_inventory(project_id=None, skip_disabled_apis=False, service_account_key=None):
+def get_projects_with_assets(asset_type, projects, service_account_key=None):
+    """Find the projects worth collecting for a resource type with Cloud Asset Inventory.
+    
+    A single search per organization replaces listing the resources of every
+    project, most of which usually have none. Only the projects directly under a
+    searched organization are filtered: projects without an organization, in a
+    folder or in an organization that could not be searched are always kept.
+    
+    Args:
+        asset_type: Cloud Asset Inventory type, such as "sqladmin.googleapis.com/Instance"
+        projects: Project dictionaries as returned by get_projects
+        service_account_key: Path to service account key file (optional)
+        
+    Returns:
+        Set of project IDs to collect, or None if no organization could be searched
+    """
+    organizations = get_organization_info(service_account_key)
+    if not organizations:
+        return None
+    
+    # Search results name projects by number
+    project_ids = {project.get('projectNumber'): project.get('projectId') for project in projects}
+    searched = set()
+    found = set()
+    for organization in organizations:
+        command = [
+            "gcloud", "asset", "search-all-resources",
+            f"--scope={organization.get('name')}",
+            f"--asset-types={asset_type}",
+            "--format=value(project)",
+            "--quiet"
+        ]
+        output = run_gcloud_command(
+            command, check_json=False, suppress_errors=True, service_account_key=service_account_key
+        )
+        if output is None:
+            print(f"Warning: Could not search {asset_type} resources in {organization.get('name')}")
+            continue
+        searched.add(resource_name(organization.get('name', '')))
+        found.update(project_ids.get(resource_name(project)) for project in output.split())
+    
+    if not searched:
+        return None
+    
+    kept = set()
+    for project in projects:
+        parent = project.get('parent') or {}
+        in_searched_organization = parent.get('type') == 'organization' and parent.get('id') in searched
+        if project.get('projectId') in found or not in_searched_organization:
+            kept.add(project.get('projectId'))
+    return kept
+
+
+def _collect_all_projects(collect_project, skip_disabled_apis=False, service_account_key=None, label=None,
+                          api_id=None, asset_type=None):
+    """Run a per-project collector on every accessible project concurrently.
+    
+    Each project is a few independent gcloud or BigQuery calls, so the projects are
+    collected by a thread pool. Results keep the order of the project list. When
+    skipping disabled APIs, projects without the collector's API are not collected.
+    When an asset type is given, only the projects where Cloud Asset Inventory finds
+    resources of that type are collected.
+    
+    Args:
+        collect_project: Function taking (project_id, service_account_key) and returning a list
+        skip_disabled_apis: Whether to skip projects with disabled APIs
+        service_account_key: Path to service account key file (optional)
+        label: Resource name used to report projects without data (optional)
+        api_id: ID of the API the collector needs (optional)
+        asset_type: Cloud Asset Inventory type of the collected resources (optional)
+        
+    Returns:
+        List of the data collected for all projects
+    """
+    projects = get_projects(service_account_key)
+    if not projects:
+        print("No projects found or unable to access project list.")
+        return []
+    
+    project_ids = [project.get('projectId') for project in projects]
+    all_data = []
+    
+    if asset_type:
+        # Fall back to every project when no organization can be searched
+        projects_to_collect = get_projects_with_assets(asset_type, projects, service_account_key)
+        if projects_to_collect is not None:
+            project_ids = [proj_id for proj_id in project_ids if proj_id in projects_to_collect]
+    
+    def collect(proj_id):
+        # The enabled services are listed once per project and shared by every collector
+        if skip_disabled_apis and api_id and is_api_disabled(proj_id, api_id, service_account_key):
+            return None
+        return collect_project(proj_id, service_account_key)
+    
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = executor.map(collect, project_ids)
+        for project_id, data in zip(project_ids, results):
+            if data:
+                all_data.extend(data)
+            elif label is None:
+                continue
+            elif not skip_disabled_apis:
+                print(f"No {label} data found for project: {project_id} or API access issue")
+            else:
+                print(f"Skipping project: {project_id} (possibly due to disabled API)")
+    
+    return all_data
+
+
+def collect_project_sql_instances(project_id, service_account_key=None):
+    """Collect Cloud SQL inventory data for a single project.
+    
+    Args:
+        project_id: The GCP project ID
+        service_account_key: Path to service account key file (optional)
+        
+    Returns:
+        List of SQL instance data dictionaries
+    """
+    print(f"Collecting SQL data for project: {project_id}")
+    instances = get_sql_instances(project_id, service_account_key)
+    return [extract_sql_instance_info(instance, project_id) for instance in instances or []]
+
+
+def collect_sql_inventory(project_id=None, skip_disabled_apis=False, service_account_key=None,
+                          use_asset_search=False):
     """Collect Cloud SQL inventory data from GCP.
     
+    When no project is given, all accessible projects are collected concurrently.
+    
     Args:
         project_id: Specific project ID to inventory (optional)
         skip_disabled_apis: Whether to skip projects with disabled APIs
         service_account_key: Path to service account key file (optional)
+        use_asset_search: Whether to only collect the projects where Cloud Asset Inventory
+            finds resources, instead of every accessible project
         
     Returns:
         List of SQL instance data dictionaries
@@ -368,47 +730,63 @@ def collect_sql_inventory(project_id=None, skip_disabled_apis=False, service_acc
     if not is_gcloud_installed:
         print(error_message)
         return []
-        
-    all_sql_data = []
     
     if project_id:
         # Process a single project
-        print(f"Collecting SQL data for project: {project_id}")
-        instances = get_sql_instances(project_id, service_account_key)
-        if instances:
-            for instance in instances:
-                instance_info = extract_sql_instance_info(instance, project_id)
-                all_sql_data.append(instance_info)
-    else:
-        # Process all accessible projects
-        projects = get_projects(service_account_key)
-        if not projects:
-            print("No projects found or unable to access project list.")
+        return collect_project_sql_instances(project_id, service_account_key)
+    
+    # Process all accessible projects
+    return _collect_all_projects(
+        collect_project_sql_instances, skip_disabled_apis, service_account_key, 'SQL', "sqladmin.googleapis.com",
+        "sqladmin.googleapis.com/Instance" if use_asset_search else None
+    )
+
+
+def collect_project_bigquery_datasets(project_id, service_account_key=None, skip_disabled_apis=False):
+    """Collect BigQuery inventory data for a single project.
+    
+    Args:
+        project_id: The GCP project ID
+        service_account_key: Path to service account key file (optional)
+        skip_disabled_apis: Whether to skip projects with disabled APIs
+        
+    Returns:
+        List of BigQuery data dictionaries
+    """
+    print(f"Collecting BigQuery data for project: {project_id}")
+    try:
+        # First check if we can create a client - this will fail fast if there are permission issues
+        client = get_bigquery_client(project_id, service_account_key)
+        if not client:
+            print(f"Could not create BigQuery client for project {project_id}")
+            if not skip_disabled_apis:
+                print(f"Skipping project {project_id} due to client creation failure")
             return []
         
-        for project in projects:
-            project_id = project.get('projectId')
-            print(f"\nCollecting SQL data for project: {project_id}")
-            instances = get_sql_instances(project_id, service_account_key)
-            if instances:
-                for instance in instances:
-                    instance_info = extract_sql_instance_info(instance, project_id)
-                    all_sql_data.append(instance_info)
-            elif not skip_disabled_apis:
-                print(f"No SQL data found for project: {project_id} or API access issue")
-            else:
-                print(f"Skipping project: {project_id} (possibly due to disabled API)")
-    
-    return all_sql_data
+        # Now extract the BigQuery information
+        bq_info = extract_bigquery_info(project_id, service_account_key)
+        if not bq_info:
+            print(f"No BigQuery datasets found in project {project_id}")
+        return bq_info
+    except Exception as e:
+        print(f"Error collecting BigQuery data for project {project_id}: {str(e)}")
+        if not skip_disabled_apis:
+            print(f"Skipping project {project_id} due to error")
+        return []
 
 
-def collect_bigquery_inventory(project_id=None, skip_disabled_apis=False, service_account_key=None):
+def collect_bigquery_inventory(project_id=None, skip_disabled_apis=False, service_account_key=None,
+                               use_asset_search=False):
     """Collect BigQuery inventory data from GCP.
     
+    When no project is given, all accessible projects are collected concurrently.
+    
     Args:
         project_id: Specific project ID to inventory (optional)
         skip_disabled_apis: Whether to skip projects with disabled APIs
         service_account_key: Path to service account key file (optional)
+        use_asset_search: Whether to only collect the projects where Cloud Asset Inventory
+            finds resources, instead of every accessible project
         
     Returns:
         List of BigQuery data dictionaries
@@ -418,57 +796,16 @@ def collect_bigquery_inventory(project_id=None, skip_disabled_apis=False, servic
     try:
         if project_id:
             # Process a single project
-            print(f"Collecting BigQuery data for project: {project_id}")
-            try:
-                # First check if we can create a client - this will fail fast if there are permission issues
-                client = get_bigquery_client(project_id, service_account_key)
-                if not client:
-                    print(f"Could not create BigQuery client for project {project_id}")
-                    if not skip_disabled_apis:
-                        print(f"Skipping project {project_id} due to client creation failure")
-                    return all_bq_data
-                
-                # Now extract the BigQuery information
-                bq_info = extract_bigquery_info(project_id, service_account_key)
-                all_bq_data.extend(bq_info)
-                
-                if not bq_info:
-                    print(f"No BigQuery datasets found in project {project_id}")
-            except Exception as e:
-                print(f"Error collecting BigQuery data for project {project_id}: {str(e)}")
-                if not skip_disabled_apis:
-                    print(f"Skipping project {project_id} due to error")
+            all_bq_data = collect_project_bigquery_datasets(project_id, service_account_key, skip_disabled_apis)
         else:
             # Process all accessible projects
-            projects = get_projects(service_account_key)
-            if not projects:
-                print("No projects found or unable to access project list.")
-                return []
-            
-            print(f"Found {len(projects)} projects to check for BigQuery datasets")
-            
-            for project in projects:
-                project_id = project.get('projectId')
-                print(f"\nCollecting BigQuery data for project: {project_id}")
-                try:
-                    # First check if we can create a client - this will fail fast if there are permission issues
-                    client = get_bigquery_client(project_id, service_account_key)
-                    if not client:
-                        print(f"Could not create BigQuery client for project {project_id}")
-                        if not skip_disabled_apis:
-                            print(f"Skipping project {project_id} due to client creation failure")
-                        continue
-                    
-                    # Now extract the BigQuery information
-                    bq_info = extract_bigquery_info(project_id, service_account_key)
-                    all_bq_data.extend(bq_info)
-                    
-                    if not bq_info:
-                        print(f"No BigQuery datasets found in project {project_id}")
-                except Exception as e:
-                    print(f"Error collecting BigQuery data for project {project_id}: {str(e)}")
-                    if not skip_disabled_apis:
-                        print(f"Skipping project {project_id} due to error")
+            all_bq_data = _collect_all_projects(
+                lambda proj_id, key: collect_project_bigquery_datasets(proj_id, key, skip_disabled_apis),
+                skip_disabled_apis,
+                service_account_key,
+                api_id="bigquery.googleapis.com",
+                asset_type="bigquery.googleapis.com/Dataset" if use_asset_search else None
+            )
     except Exception as e:
         print(f"Error collecting BigQuery inventory: {str(e)}")
     
@@ -476,13 +813,33 @@ def collect_bigquery_inventory(project_id=None, skip_disabled_apis=False, servic
     return all_bq_data
 
 
-def collect_gke_inventory(project_id=None, skip_disabled_apis=False, service_account_key=None):
+def collect_project_gke_clusters(project_id, service_account_key=None):
+    """Collect GKE cluster inventory data for a single project.
+    
+    Args:
+        project_id: The GCP project ID
+        service_account_key: Path to service account key file (optional)
+        
+    Returns:
+        List of GKE cluster data dictionaries
+    """
+    print(f"Collecting GKE data for project: {project_id}")
+    clusters = get_gke_clusters(project_id, service_account_key)
+    return [extract_gke_cluster_info(cluster, project_id) for cluster in clusters or []]
+
+
+def collect_gke_inventory(project_id=None, skip_disabled_apis=False, service_account_key=None,
+                          use_asset_search=False):
     """Collect GKE cluster inventory data from GCP.
     
+    When no project is given, all accessible projects are collected concurrently.
+    
     Args:
         project_id: Specific project ID to inventory (optional)
         skip_disabled_apis: Whether to skip projects with disabled APIs
         service_account_key: Path to service account key file (optional)
+        use_asset_search: Whether to only collect the projects where Cloud Asset Inventory
+            finds resources, instead of every accessible project
         
     Returns:
         List of GKE cluster data dictionaries
@@ -492,35 +849,13 @@ def collect_gke_inventory(project_id=None, skip_disabled_apis=False, service_acc
     if not is_gcloud_installed:
         print(error_message)
         return []
-        
-    all_gke_data = []
     
     if project_id:
         # Process a single project
-        print(f"Collecting GKE data for project: {project_id}")
-        clusters = get_gke_clusters(project_id, service_account_key)
-        if clusters:
-            for cluster in clusters:
-                cluster_info = extract_gke_cluster_info(cluster, project_id)
-                all_gke_data.append(cluster_info)
-    else:
-        # Process all accessible projects
-        projects = get_projects(service_account_key)
-        if not projects:
-            print("No projects found or unable to access project list.")
-            return []
-        
-        for project in projects:
-            project_id = project.get('projectId')
-            print(f"\nCollecting GKE data for project: {project_id}")
-            clusters = get_gke_clusters(project_id, service_account_key)
-            if clusters:
-                for cluster in clusters:
-                    cluster_info = extract_gke_cluster_info(cluster, project_id)
-                    all_gke_data.append(cluster_info)
-            elif not skip_disabled_apis:
-                print(f"No GKE data found for project: {project_id} or API access issue")
-            else:
-                print(f"Skipping project: {project_id} (possibly due to disabled API)")
+        return collect_project_gke_clusters(project_id, service_account_key)
     
-    return all_gke_data
+    # Process all accessible projects
+    return _collect_all_projects(
+        collect_project_gke_clusters, skip_disabled_apis, service_account_key, 'GKE', "container.googleapis.com",
+        "container.googleapis.com/Cluster" if use_asset_search else None
+    )
@@ -3,52 +3,495 @@ Streamlit UI for GCP VM Inventory Tool.
 
 This module provides a web-based user interface for the GCP VM Inventory Tool
 using Streamlit.
+
+pandas and xlsxwriter are only imported by the functions that use them, so that
+the first page is shown without waiting for them to load.
 """
 
+import atexit
+import hashlib
 import os
 import tempfile
-import base64
-import pandas as pd
+import time
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
 from datetime import datetime
 import io
 import json
 
-from .core import collect_vm_inventory, get_projects, get_organization_info
-from .api_checker import check_apis_for_projects, get_api_status_data
+from . import __version__
+from .cache import GcloudCache, DEFAULT_CACHE_DIR
+from .core import collect_vm_inventory, get_projects, get_organization_info, invalidate_projects_cache
+from .api_checker import (
+    CHECKED_STATUSES, check_apis_for_projects, get_api_status_data, invalidate_api_status_cache
+)
 from .resources import collect_sql_inventory, collect_bigquery_inventory, collect_gke_inventory
-from .utils import check_gcloud_installed, get_disclaimer_text
-
-
-def get_table_download_link(df, filename, file_format="csv"):
-    """Generate a link to download the dataframe as a file."""
-    if file_format == "csv":
-        csv = df.to_csv(index=False)
-        b64 = base64.b64encode(csv.encode()).decode()
-        href = f'<a href="data:file/csv;base64,{b64}" download="{filename}.csv">Download CSV File</a>'
-    elif file_format == "excel":
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df.to_excel(writer, index=False, sheet_name='Sheet1')
-        excel_data = output.getvalue()
-        b64 = base64.b64encode(excel_data).decode()
-        href = f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="{filename}.xlsx">Download Excel File</a>'
+from .utils import check_gcloud_installed, credential_identity, get_disclaimer_text
+
+
+# Number of rows formatted at a time when writing a CSV export
+CSV_CHUNK_SIZE = 10000
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def to_csv_bytes(df):
+    """Serialize a dataframe to CSV, once per distinct dataframe.
+    
+    Rows are formatted and encoded by chunks straight into a byte buffer, instead
+    of building the whole CSV as a string and then encoding a copy of it.
+    """
+    output = io.BytesIO()
+    wrapper = io.TextIOWrapper(output, encoding='utf-8', newline='')
+    df.to_csv(wrapper, index=False, chunksize=CSV_CHUNK_SIZE)
+    wrapper.flush()
+    # Detach so that the buffer is not closed along with the wrapper
+    wrapper.detach()
+    return output.getvalue()
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def to_excel_bytes(df):
+    """Serialize a dataframe to an Excel workbook, once per distinct dataframe.
+    
+    Rows are written one at a time by xlsxwriter in constant memory mode, which
+    flushes each row to disk instead of keeping every cell of the sheet in memory.
+    pandas' to_excel cannot be used for this: it writes column by column, and in
+    this mode cells of rows already flushed are dropped.
+    """
+    import xlsxwriter
+    
+    output = io.BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+    worksheet = workbook.add_worksheet('Sheet1')
+    bold = workbook.add_format({'bold': True})
+    
+    worksheet.write_row(0, 0, df.columns, bold)
+    # Missing values are written as empty cells, as to_excel does
+    values = df.astype(object).where(df.notna(), None)
+    for row_number, row in enumerate(values.itertuples(index=False, name=None), 1):
+        worksheet.write_row(row_number, 0, row)
+    
+    workbook.close()
+    return output.getvalue()
+
+
+# Project fields shown in the project list, with their column names
+PROJECT_COLUMNS = {
+    "name": "Project Name",
+    "projectId": "Project ID",
+    "projectNumber": "Project Number",
+    "createTime": "Creation Time",
+    "lifecycleState": "Status"
+}
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def projects_dataframe(projects):
+    """Build the dataframe of the project list, once per distinct list.
+    
+    Dataframes are cached as resources, so reruns get the same frame back without
+    copying it. Callers must not modify it in place.
+    """
+    import pandas as pd
+    
+    return (
+        pd.DataFrame.from_records(projects, columns=list(PROJECT_COLUMNS))
+        .rename(columns=PROJECT_COLUMNS)
+        .fillna("N/A")
+    )
+
+
+# Project selection option for entering a project ID manually
+MANUAL_PROJECT_OPTION = ("Enter Project ID manually", None)
+
+
+def project_label(option):
+    """Get the label of a (name, ID) project selection option."""
+    name, project_id = option
+    return f"{name} ({project_id})" if project_id else name
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def records_dataframe(records):
+    """Build the dataframe of inventory or API status records, once per distinct list.
+    
+    Callers must not modify the returned frame in place.
+    """
+    import pandas as pd
+    
+    return pd.DataFrame.from_records(records)
+
+
+# VM columns with few distinct values, stored as categories
+VM_CATEGORY_COLUMNS = ('project_id', 'zone', 'status', 'machine_type')
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def vm_dataframe(records):
+    """Build the dataframe of the VM inventory, once per distinct list.
+    
+    The columns that are filtered on repeat a few values over many VMs. As
+    categories, their distinct values are known and filtering compares integer
+    codes instead of strings. Callers must not modify the returned frame in place.
+    """
+    import pandas as pd
+    
+    df = pd.DataFrame.from_records(records)
+    for column in VM_CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    return df
+
+
+STATUS_COLORS = {
+    'OK': 'background-color: #8eff8e',  # Green
+    'CREDENTIAL_ISSUE': 'background-color: #ffde8e'  # Yellow
+}
+STATUS_DEFAULT_COLOR = 'background-color: #ff8e8e'  # Red
+
+
+def status_styles(df):
+    """Get the CSS of every cell of the API status dataframe at once.
+    
+    Args:
+        df: API status dataframe
+        
+    Returns:
+        Dataframe of CSS with the status column colored and the others unstyled
+    """
+    import pandas as pd
+    
+    styles = pd.DataFrame('', index=df.index, columns=df.columns)
+    styles['status'] = df['status'].map(STATUS_COLORS).fillna(STATUS_DEFAULT_COLOR)
+    return styles
+
+
+def filter_by_column(container, df, column, label, key):
+    """Show a multiselect filtering a dataframe on the values of a column.
+    
+    The sorted values are computed once per rerun and nothing is selected by
+    default, which keeps every row. The filter is only shown if the column has
+    several values.
+    
+    Args:
+        container: Streamlit container in which the multiselect is shown
+        df: Dataframe to filter
+        column: Name of the column to filter on
+        label: Label of the multiselect
+        key: Unique key of the multiselect
+        
+    Returns:
+        The rows of the dataframe with one of the selected values
+    """
+    if column not in df.columns:
+        return df
+    
+    if df[column].dtype == 'category':
+        # Categories are already distinct and sorted
+        options = df[column].cat.remove_unused_categories().cat.categories.tolist()
     else:
-        return "Unsupported file format"
+        options = sorted(df[column].dropna().unique().tolist())
+    if len(options) <= 1:
+        return df
+    
+    selected = container.multiselect(label, options=options, key=key)
+    if selected:
+        df = df[df[column].isin(selected)]
+    return df
+
+
+# Choices of number of rows shown per page of a paginated table
+PAGE_SIZES = [50, 200, 1000]
+
+
+def show_paginated_dataframe(df, key):
+    """Show one page of a dataframe, with selectors for the page size and number.
+    
+    Only the rows of the page are sent to the browser on each rerun. Exports
+    still contain the whole dataframe.
+    
+    Args:
+        df: Dataframe to show
+        key: Prefix of the keys of the selectors
+    """
+    col1, col2, col3 = st.columns([1, 1, 2])
+    page_size = col1.selectbox("Rows per page", PAGE_SIZES, index=1, key=f"{key}_page_size")
+    page_count = max(1, -(-len(df) // page_size))
+    # The key changes with the page count, so that the page is reset when filters shrink the table
+    page = col2.number_input(
+        "Page", min_value=1, max_value=page_count, value=1, step=1,
+        key=f"{key}_page_{page_size}_{page_count}"
+    )
+    
+    start = (page - 1) * page_size
+    col3.caption(f"Rows {min(start + 1, len(df))}-{min(start + page_size, len(df))} of {len(df)}")
+    st.dataframe(df.iloc[start:start + page_size])
+
+
+def show_export_options(df, filename_prefix):
+    """Show buttons to download the dataframe as CSV and Excel files.
+    
+    The files are sent as raw bytes by Streamlit, and only serialized again when
+    the dataframe changes, not on every rerun.
+    """
+    st.subheader("Export Options")
+    col1, col2 = st.columns(2)
     
-    return href
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"{filename_prefix}_{timestamp}"
+    
+    col1.download_button(
+        "Download CSV File", to_csv_bytes(df), f"{filename}.csv", "text/csv",
+        key=f"{filename_prefix}_csv"
+    )
+    col2.download_button(
+        "Download Excel File", to_excel_bytes(df), f"{filename}.xlsx",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        key=f"{filename_prefix}_excel"
+    )
+
+
+# Results of GCP calls are kept for this many seconds, so that reruns and repeated
+# clicks reuse them. Each is keyed on its arguments, including the service account key.
+GCP_CACHE_TTL = 900
+
+# Below the in-memory cache, results are also kept on disk so that they survive
+# restarts of the app. Entries are only reused by the same version of the tool.
+persistent_cache = GcloudCache(os.path.join(DEFAULT_CACHE_DIR, "streamlit"))
+
+
+def persisted(func, service_account_key=None, cacheable=bool, **kwargs):
+    """Call a GCP function, reusing its result from the persistent cache if possible.
+    
+    The GCP functions report failures as None or as an empty result, which cannot
+    be told apart from finding nothing, so by default empty results are not kept.
+    
+    Args:
+        func: Function to call
+        service_account_key: Path to the service account key file (optional)
+        cacheable: Function telling whether a result can be kept (default: non-empty)
+        **kwargs: Other keyword arguments of the function
+        
+    Returns:
+        The result of the function
+    """
+    # Results are only reused with the same credentials: the content of the key, or
+    # the active gcloud account without key
+    cache_key = ["streamlit", __version__, func.__name__, credential_identity(service_account_key), kwargs]
+    hit, value = persistent_cache.get(cache_key)
+    if hit:
+        return value
+    
+    value = func(service_account_key=service_account_key, **kwargs)
+    # Failures are not cached
+    if cacheable(value):
+        persistent_cache.set(cache_key, value)
+    return value
+
+
+@st.cache_data(ttl=GCP_CACHE_TTL, show_spinner=False)
+def cached_organization_info(service_account_key=None):
+    """Get information about the GCP organization, cached across reruns."""
+    return persisted(get_organization_info, service_account_key)
+
+
+@st.cache_data(ttl=GCP_CACHE_TTL, show_spinner=False)
+def cached_projects(service_account_key=None):
+    """Get the accessible GCP projects, cached across reruns."""
+    return persisted(get_projects, service_account_key)
+
+
+def api_statuses_checked(project_api_status):
+    """Check whether the API statuses of every project could be checked.
+    
+    Args:
+        project_api_status: Dictionary mapping project IDs to API status information
+        
+    Returns:
+        Boolean indicating if there are statuses and none of them is an error
+    """
+    return bool(project_api_status) and all(
+        info["status"] in CHECKED_STATUSES
+        for api_status in project_api_status.values()
+        for info in api_status.values()
+    )
+
+
+@st.cache_data(ttl=GCP_CACHE_TTL, show_spinner=False)
+def cached_api_status(project_id=None, service_account_key=None):
+    """Get the API status data of a project or all projects, cached across reruns."""
+    project_api_status = persisted(
+        check_apis_for_projects, service_account_key, cacheable=api_statuses_checked, projects=project_id
+    )
+    return get_api_status_data(project_api_status)
+
+
+@st.cache_data(ttl=GCP_CACHE_TTL, show_spinner=False)
+def cached_vm_inventory(project_id=None, skip_disabled_apis=False, service_account_key=None):
+    """Collect the VM inventory, cached across reruns."""
+    return persisted(
+        collect_vm_inventory, service_account_key,
+        project_id=project_id,
+        skip_disabled_apis=skip_disabled_apis
+    )
+
+
+@st.cache_data(ttl=GCP_CACHE_TTL, show_spinner=False)
+def cached_sql_inventory(project_id=None, skip_disabled_apis=False, service_account_key=None,
+                         use_asset_search=False):
+    """Collect the Cloud SQL inventory, cached across reruns."""
+    return persisted(
+        collect_sql_inventory, service_account_key,
+        project_id=project_id,
+        skip_disabled_apis=skip_disabled_apis,
+        use_asset_search=use_asset_search
+    )
+
+
+@st.cache_data(ttl=GCP_CACHE_TTL, show_spinner=False)
+def cached_bigquery_inventory(project_id=None, skip_disabled_apis=False, service_account_key=None,
+                         use_asset_search=False):
+    """Collect the BigQuery inventory, cached across reruns."""
+    return persisted(
+        collect_bigquery_inventory, service_account_key,
+        project_id=project_id,
+        skip_disabled_apis=skip_disabled_apis,
+        use_asset_search=use_asset_search
+    )
+
+
+@st.cache_data(ttl=GCP_CACHE_TTL, show_spinner=False)
+def cached_gke_inventory(project_id=None, skip_disabled_apis=False, service_account_key=None,
+                         use_asset_search=False):
+    """Collect the GKE inventory, cached across reruns."""
+    return persisted(
+        collect_gke_inventory, service_account_key,
+        project_id=project_id,
+        skip_disabled_apis=skip_disabled_apis,
+        use_asset_search=use_asset_search
+    )
+
+
+def clear_gcp_caches():
+    """Forget all cached GCP results, so that the next calls fetch them again."""
+    st.cache_data.clear()
+    persistent_cache.clear()
+    invalidate_projects_cache()
+    invalidate_api_status_cache()
 
 
 def load_gcp_data(service_account_key=None):
-    """Load GCP organization and project data."""
+    """Load GCP organization and project data.
+    
+    Only the project columns that are shown are kept, so that the session state
+    does not hold the full project resources.
+    """
     with st.spinner("Loading GCP data..."):
         # Get organization info
-        org_info = get_organization_info(service_account_key)
+        org_info = cached_organization_info(service_account_key)
         
         # Get projects list
-        projects = get_projects(service_account_key)
+        projects = cached_projects(service_account_key)
+        
+        return org_info, projects_dataframe(projects) if projects else None
+
+
+# Number of GCP calls run at the same time in the background, one per kind of data
+BACKGROUND_WORKERS = 5
+# Seconds between two reruns while background tasks are running
+POLL_INTERVAL = 1
+
+
+def submit_background_task(state_key, label, func, *args, **kwargs):
+    """Run a GCP call on the session's executor, without blocking the script.
+    
+    Args:
+        state_key: Session state key where the result is stored once done
+        label: Description of the task shown while it runs
+        func: Function to call
+        *args: Positional arguments of the function
+        **kwargs: Keyword arguments of the function
+    """
+    if not st.session_state.tasks:
+        st.session_state.task_count = 0
+    future = st.session_state.task_executor.submit(func, *args, **kwargs)
+    st.session_state.tasks[state_key] = (label, future)
+    st.session_state.task_count += 1
+
+
+def poll_background_tasks():
+    """Store the results of finished background tasks in the session state."""
+    for state_key, (label, future) in list(st.session_state.tasks.items()):
+        if not future.done():
+            continue
+        del st.session_state.tasks[state_key]
+        
+        try:
+            result = future.result()
+        except Exception as e:
+            st.error(f"Error while {label[0].lower() + label[1:]}: {str(e)}")
+            if state_key == 'bq_inventory':
+                st.error("Make sure the BigQuery API is enabled and you have the necessary permissions.")
+            # Initialize with empty list on error
+            result = []
         
-        return org_info, projects
+        # Always update the session state, even with empty list
+        st.session_state[state_key] = result if result else []
+
+
+def show_background_progress():
+    """Show the progress of the running background tasks.
+    
+    Returns:
+        Whether tasks are still running
+    """
+    tasks = st.session_state.tasks
+    if not tasks:
+        return False
+    
+    # Tasks already stored are no longer listed
+    running = [label for label, future in tasks.values() if not future.done()]
+    done = st.session_state.task_count - len(running)
+    st.progress(done / st.session_state.task_count, text=f"{', '.join(running) or 'Finishing'}...")
+    return True
+
+
+def remove_file(path):
+    """Remove a file if it still exists."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def store_service_account_key(content):
+    """Write an uploaded service account key to a temporary file.
+    
+    Streamlit reruns the script on every interaction while the key is uploaded,
+    so the file is only written when the content of the key changes. It is
+    removed when another key is uploaded, the key is dropped or the app exits.
+    
+    Args:
+        content: Content of the uploaded key file
+    """
+    key_hash = hashlib.sha256(content).hexdigest()
+    if key_hash == st.session_state.service_account_key_hash:
+        return
+    
+    forget_service_account_key()
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.json') as tmp_file:
+        tmp_file.write(content)
+    atexit.register(remove_file, tmp_file.name)
+    st.session_state.service_account_key_path = tmp_file.name
+    st.session_state.service_account_key_hash = key_hash
+
+
+def forget_service_account_key():
+    """Remove the temporary file of the uploaded service account key, if any."""
+    if st.session_state.service_account_key_path:
+        remove_file(st.session_state.service_account_key_path)
+    st.session_state.service_account_key_path = None
+    st.session_state.service_account_key_hash = None
 
 
 def show_disclaimer():
@@ -90,8 +533,8 @@ def main():
         st.session_state.disclaimer_accepted = False
     if 'org_info' not in st.session_state:
         st.session_state.org_info = None
-    if 'projects' not in st.session_state:
-        st.session_state.projects = None
+    if 'projects_df' not in st.session_state:
+        st.session_state.projects_df = None
     if 'api_status' not in st.session_state:
         st.session_state.api_status = None
     if 'vm_inventory' not in st.session_state:
@@ -106,6 +549,16 @@ def main():
         st.session_state.authenticated = False
     if 'service_account_key_path' not in st.session_state:
         st.session_state.service_account_key_path = None
+    if 'service_account_key_hash' not in st.session_state:
+        st.session_state.service_account_key_hash = None
+    if 'task_executor' not in st.session_state:
+        st.session_state.task_executor = ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS)
+    if 'tasks' not in st.session_state:
+        st.session_state.tasks = {}
+    if 'task_count' not in st.session_state:
+        st.session_state.task_count = 0
+    if 'collected' not in st.session_state:
+        st.session_state.collected = []
     
     # Show disclaimer if not accepted
     if not st.session_state.disclaimer_accepted:
@@ -128,26 +581,31 @@ def main():
     if auth_option == "Upload Service Account Key":
         uploaded_file = st.sidebar.file_uploader("Upload Service Account Key (JSON)", type="json")
         if uploaded_file:
-            # Save the uploaded file to a temporary location
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.json') as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                st.session_state.service_account_key_path = tmp_file.name
+            # Save the uploaded file to a temporary location, once per distinct key
+            store_service_account_key(uploaded_file.getvalue())
             
             # Mark as authenticated and load GCP data
             if not st.session_state.authenticated:
                 st.session_state.authenticated = True
-                st.session_state.org_info, st.session_state.projects = load_gcp_data(st.session_state.service_account_key_path)
+                st.session_state.org_info, st.session_state.projects_df = load_gcp_data(st.session_state.service_account_key_path)
         else:
-            st.session_state.service_account_key_path = None
+            forget_service_account_key()
             st.session_state.authenticated = False
     else:
         # Using current gcloud configuration
-        st.session_state.service_account_key_path = None
+        forget_service_account_key()
         
         # Add a button to authenticate and load GCP data
         if st.sidebar.button("Authenticate with gcloud"):
             st.session_state.authenticated = True
-            st.session_state.org_info, st.session_state.projects = load_gcp_data()
+            st.session_state.org_info, st.session_state.projects_df = load_gcp_data()
+    
+    # Fetch everything from GCP again on request, instead of using cached results
+    if st.session_state.authenticated and st.sidebar.button("Refresh GCP Data"):
+        clear_gcp_caches()
+        st.session_state.org_info, st.session_state.projects_df = load_gcp_data(
+            st.session_state.service_account_key_path
+        )
     
     # Display organization info if available
     if st.session_state.authenticated and st.session_state.org_info:
@@ -156,6 +614,7 @@ def main():
             st.sidebar.info(f"Organization: {org.get('displayName', 'N/A')} ({org.get('name', 'N/A')})")
     
     # Project selection (only if authenticated)
+    tasks_running = False
     if st.session_state.authenticated:
         st.sidebar.subheader("Project Selection")
         
@@ -165,28 +624,32 @@ def main():
         )
         
         project_id = None
-        if project_option == "Specific Project" and st.session_state.projects:
-            # Create a dictionary of project names to IDs for the selectbox
-            project_options = {f"{p.get('name', 'Unknown')} ({p.get('projectId', 'Unknown')})": p.get('projectId') 
-                              for p in st.session_state.projects}
-            
-            # Add an option for manual entry
-            project_options["Enter Project ID manually"] = "manual"
+        if project_option == "Specific Project" and st.session_state.projects_df is not None:
+            # Options are (name, ID) pairs, with an option for manual entry
+            projects_df = st.session_state.projects_df
+            project_options = list(projects_df[["Project Name", "Project ID"]].itertuples(index=False, name=None))
+            project_options.append(MANUAL_PROJECT_OPTION)
             
             # Create a selectbox with project names
             selected_project = st.sidebar.selectbox(
                 "Select Project",
-                options=list(project_options.keys())
+                options=project_options,
+                format_func=project_label
             )
             
             # Handle manual entry
-            if project_options[selected_project] == "manual":
+            if selected_project == MANUAL_PROJECT_OPTION:
                 project_id = st.sidebar.text_input("Enter Project ID")
             else:
-                project_id = project_options[selected_project]
+                project_id = selected_project[1]
         
         # Other options
         skip_disabled_apis = st.sidebar.checkbox("Skip Projects with Disabled APIs", value=True)
+        use_asset_search = st.sidebar.checkbox(
+            "Only Scan Projects Found by Cloud Asset Inventory", value=False,
+            help="Searches the organization once per resource type and skips the projects directly under "
+                 "it without SQL, BigQuery or GKE resources. Needs the Cloud Asset API and organization access."
+        )
         
         # Resource selection
         st.sidebar.subheader("Resource Types")
@@ -195,120 +658,75 @@ def main():
         collect_bq = st.sidebar.checkbox("BigQuery Datasets", value=True)
         collect_gke = st.sidebar.checkbox("GKE Clusters", value=True)
         
-        # Action buttons
+        # Store the results of finished background tasks
+        poll_background_tasks()
+        
+        # Action buttons, disabled while tasks are still running
         col1, col2 = st.sidebar.columns(2)
-        check_apis_button = col1.button("Check APIs")
-        collect_inventory_button = col2.button("Collect Inventory")
+        check_apis_button = col1.button("Check APIs", disabled=bool(st.session_state.tasks))
+        collect_inventory_button = col2.button("Collect Inventory", disabled=bool(st.session_state.tasks))
         
         # Handle API check
         if check_apis_button:
-            with st.spinner("Checking API status..."):
-                project_api_status = check_apis_for_projects(
-                    projects=project_id,
-                    service_account_key=st.session_state.service_account_key_path
-                )
-                st.session_state.api_status = get_api_status_data(project_api_status)
+            submit_background_task(
+                'api_status', "Checking API status", cached_api_status,
+                project_id, st.session_state.service_account_key_path
+            )
         
         # Handle inventory collection
         if collect_inventory_button:
             if project_id == "":
                 st.error("Please enter a valid Project ID or select 'All Accessible Projects'")
             else:
-                # Collect VM inventory
-                if collect_vms:
-                    with st.spinner("Collecting VM inventory..."):
-                        vm_data = collect_vm_inventory(
-                            project_id=project_id,
-                            skip_disabled_apis=skip_disabled_apis,
-                            service_account_key=st.session_state.service_account_key_path
-                        )
-                        st.session_state.vm_inventory = vm_data if vm_data else []
-                
-                # Collect SQL inventory
-                if collect_sql:
-                    with st.spinner("Collecting Cloud SQL inventory..."):
-                        sql_data = collect_sql_inventory(
+                # The VM collection does not narrow its projects with Cloud Asset Inventory
+                asset_options = {'use_asset_search': use_asset_search}
+                collectors = [
+                    (collect_vms, 'vm_inventory', "Collecting VM inventory", cached_vm_inventory, {}),
+                    (collect_sql, 'sql_inventory', "Collecting Cloud SQL inventory", cached_sql_inventory,
+                     asset_options),
+                    (collect_bq, 'bq_inventory', "Collecting BigQuery inventory", cached_bigquery_inventory,
+                     asset_options),
+                    (collect_gke, 'gke_inventory', "Collecting GKE inventory", cached_gke_inventory,
+                     asset_options)
+                ]
+                # Resource types are collected concurrently
+                for selected, state_key, label, collector, options in collectors:
+                    if selected:
+                        submit_background_task(
+                            state_key, label, collector,
                             project_id=project_id,
                             skip_disabled_apis=skip_disabled_apis,
-                            service_account_key=st.session_state.service_account_key_path
+                            service_account_key=st.session_state.service_account_key_path,
+                            **options
                         )
-                        st.session_state.sql_inventory = sql_data if sql_data else []
-                
-                # Collect BigQuery inventory
-                if collect_bq:
-                    try:
-                        with st.spinner("Collecting BigQuery inventory..."):
-                            bq_data = collect_bigquery_inventory(
-                                project_id=project_id,
-                                skip_disabled_apis=skip_disabled_apis,
-                                service_account_key=st.session_state.service_account_key_path
-                            )
-                            # Always update the session state, even with empty list
-                            st.session_state.bq_inventory = bq_data if bq_data else []
-                    except Exception as e:
-                        st.error(f"Error collecting BigQuery inventory: {str(e)}")
-                        st.error("Make sure the BigQuery API is enabled and you have the necessary permissions.")
-                        # Initialize with empty list on error
-                        st.session_state.bq_inventory = []
-                
-                # Collect GKE inventory
-                if collect_gke:
-                    with st.spinner("Collecting GKE inventory..."):
-                        gke_data = collect_gke_inventory(
-                            project_id=project_id,
-                            skip_disabled_apis=skip_disabled_apis,
-                            service_account_key=st.session_state.service_account_key_path
-                        )
-                        st.session_state.gke_inventory = gke_data if gke_data else []
-                
-                # Check if any data was collected
-                if all([
-                    len(st.session_state.vm_inventory) == 0 if collect_vms else True,
-                    len(st.session_state.sql_inventory) == 0 if collect_sql else True,
-                    len(st.session_state.bq_inventory) == 0 if collect_bq else True,
-                    len(st.session_state.gke_inventory) == 0 if collect_gke else True
-                ]):
-                    st.warning("No data collected. Check API permissions or project selection.")
+                        st.session_state.collected.append(state_key)
+        
+        tasks_running = show_background_progress()
+        
+        # Check if any data was collected, once all collections are done
+        if st.session_state.collected and not tasks_running:
+            if all(len(st.session_state[state_key]) == 0 for state_key in st.session_state.collected):
+                st.warning("No data collected. Check API permissions or project selection.")
+            st.session_state.collected = []
     else:
         st.sidebar.info("Please authenticate to access GCP data")
     
     # Main content area
     
     # Display project list if authenticated
-    if st.session_state.authenticated and st.session_state.projects:
+    if st.session_state.authenticated and st.session_state.projects_df is not None:
         with st.expander("Available GCP Projects", expanded=False):
-            projects_df = pd.DataFrame([
-                {
-                    "Project Name": p.get("name", "N/A"),
-                    "Project ID": p.get("projectId", "N/A"),
-                    "Project Number": p.get("projectNumber", "N/A"),
-                    "Creation Time": p.get("createTime", "N/A"),
-                    "Status": p.get("lifecycleState", "N/A")
-                }
-                for p in st.session_state.projects
-            ])
-            st.dataframe(projects_df)
+            st.dataframe(st.session_state.projects_df)
     
     # Display API status if available
     if st.session_state.api_status:
         st.header("API Status")
         
         # Convert to DataFrame for display
-        api_df = pd.DataFrame(st.session_state.api_status)
-        
-        # Add color coding for status
-        def color_status(val):
-            if val == 'OK':
-                return 'background-color: #8eff8e'  # Green
-            elif val == 'MISSING':
-                return 'background-color: #ff8e8e'  # Red
-            elif val == 'CREDENTIAL_ISSUE':
-                return 'background-color: #ffde8e'  # Yellow
-            else:
-                return 'background-color: #ff8e8e'  # Red
+        api_df = records_dataframe(st.session_state.api_status)
         
-        # Display styled DataFrame
-        st.dataframe(api_df.style.applymap(color_status, subset=['status']))
+        # Display DataFrame with color coded statuses
+        st.dataframe(api_df.style.apply(status_styles, axis=None))
     
     # Create tabs for different resource types
     if any([
@@ -325,7 +743,7 @@ def main():
                 st.header("VM Inventory")
                 
                 # Convert to DataFrame for display
-                vm_df = pd.DataFrame(st.session_state.vm_inventory)
+                vm_df = vm_dataframe(st.session_state.vm_inventory)
                 
                 if len(vm_df) > 0:
                     # Add filtering options
@@ -333,47 +751,19 @@ def main():
                     col1, col2, col3 = st.columns(3)
                     
                     # Filter by project (if multiple projects)
-                    if 'project_id' in vm_df.columns and len(vm_df['project_id'].unique()) > 1:
-                        selected_projects = col1.multiselect(
-                            "Filter by Project",
-                            options=sorted(vm_df['project_id'].unique()),
-                            default=sorted(vm_df['project_id'].unique())
-                        )
-                        if selected_projects:
-                            vm_df = vm_df[vm_df['project_id'].isin(selected_projects)]
+                    vm_df = filter_by_column(col1, vm_df, 'project_id', "Filter by Project", "vm_projects")
                     
                     # Filter by zone
-                    if 'zone' in vm_df.columns and len(vm_df['zone'].unique()) > 1:
-                        selected_zones = col2.multiselect(
-                            "Filter by Zone",
-                            options=sorted(vm_df['zone'].unique()),
-                            default=sorted(vm_df['zone'].unique())
-                        )
-                        if selected_zones:
-                            vm_df = vm_df[vm_df['zone'].isin(selected_zones)]
+                    vm_df = filter_by_column(col2, vm_df, 'zone', "Filter by Zone", "vm_zones")
                     
                     # Filter by status
-                    if 'status' in vm_df.columns and len(vm_df['status'].unique()) > 1:
-                        selected_statuses = col3.multiselect(
-                            "Filter by Status",
-                            options=sorted(vm_df['status'].unique()),
-                            default=sorted(vm_df['status'].unique())
-                        )
-                        if selected_statuses:
-                            vm_df = vm_df[vm_df['status'].isin(selected_statuses)]
+                    vm_df = filter_by_column(col3, vm_df, 'status', "Filter by Status", "vm_statuses")
                     
-                    # Display the filtered DataFrame
-                    st.dataframe(vm_df)
+                    # Display the filtered DataFrame, one page at a time
+                    show_paginated_dataframe(vm_df, "vm")
                     
                     # Export options
-                    st.subheader("Export Options")
-                    col1, col2 = st.columns(2)
-                    
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    filename = f"gcp_vm_inventory_{timestamp}"
-                    
-                    col1.markdown(get_table_download_link(vm_df, filename, "csv"), unsafe_allow_html=True)
-                    col2.markdown(get_table_download_link(vm_df, filename, "excel"), unsafe_allow_html=True)
+                    show_export_options(vm_df, "gcp_vm_inventory")
                 else:
                     st.info("No VM instances found in the selected project(s).")
             else:
@@ -385,7 +775,7 @@ def main():
                 st.header("Cloud SQL Inventory")
                 
                 # Convert to DataFrame for display
-                sql_df = pd.DataFrame(st.session_state.sql_inventory)
+                sql_df = records_dataframe(st.session_state.sql_inventory)
                 
                 if len(sql_df) > 0:
                     # Add filtering options
@@ -393,38 +783,16 @@ def main():
                     col1, col2 = st.columns(2)
                     
                     # Filter by project (if multiple projects)
-                    if 'project_id' in sql_df.columns and len(sql_df['project_id'].unique()) > 1:
-                        selected_projects = col1.multiselect(
-                            "Filter by Project",
-                            options=sorted(sql_df['project_id'].unique()),
-                            default=sorted(sql_df['project_id'].unique()),
-                            key="sql_projects"
-                        )
-                        if selected_projects:
-                            sql_df = sql_df[sql_df['project_id'].isin(selected_projects)]
+                    sql_df = filter_by_column(col1, sql_df, 'project_id', "Filter by Project", "sql_projects")
                     
                     # Filter by database version
-                    if 'database_version' in sql_df.columns and len(sql_df['database_version'].unique()) > 1:
-                        selected_versions = col2.multiselect(
-                            "Filter by Database Version",
-                            options=sorted(sql_df['database_version'].unique()),
-                            default=sorted(sql_df['database_version'].unique())
-                        )
-                        if selected_versions:
-                            sql_df = sql_df[sql_df['database_version'].isin(selected_versions)]
+                    sql_df = filter_by_column(col2, sql_df, 'database_version', "Filter by Database Version", "sql_versions")
                     
                     # Display the filtered DataFrame
                     st.dataframe(sql_df)
                     
                     # Export options
-                    st.subheader("Export Options")
-                    col1, col2 = st.columns(2)
-                    
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    filename = f"gcp_sql_inventory_{timestamp}"
-                    
-                    col1.markdown(get_table_download_link(sql_df, filename, "csv"), unsafe_allow_html=True)
-                    col2.markdown(get_table_download_link(sql_df, filename, "excel"), unsafe_allow_html=True)
+                    show_export_options(sql_df, "gcp_sql_inventory")
                 else:
                     st.info("No Cloud SQL instances found in the selected project(s).")
             else:
@@ -436,7 +804,7 @@ def main():
                 st.header("BigQuery Inventory")
                 
                 # Convert to DataFrame for display
-                bq_df = pd.DataFrame(st.session_state.bq_inventory)
+                bq_df = records_dataframe(st.session_state.bq_inventory)
                 
                 if len(bq_df) > 0:
                     # Add filtering options
@@ -444,25 +812,10 @@ def main():
                     col1, col2 = st.columns(2)
                     
                     # Filter by project (if multiple projects)
-                    if 'project_id' in bq_df.columns and len(bq_df['project_id'].unique()) > 1:
-                        selected_projects = col1.multiselect(
-                            "Filter by Project",
-                            options=sorted(bq_df['project_id'].unique()),
-                            default=sorted(bq_df['project_id'].unique()),
-                            key="bq_projects"
-                        )
-                        if selected_projects:
-                            bq_df = bq_df[bq_df['project_id'].isin(selected_projects)]
+                    bq_df = filter_by_column(col1, bq_df, 'project_id', "Filter by Project", "bq_projects")
                     
                     # Filter by location
-                    if 'location' in bq_df.columns and len(bq_df['location'].unique()) > 1:
-                        selected_locations = col2.multiselect(
-                            "Filter by Location",
-                            options=sorted(bq_df['location'].unique()),
-                            default=sorted(bq_df['location'].unique())
-                        )
-                        if selected_locations:
-                            bq_df = bq_df[bq_df['location'].isin(selected_locations)]
+                    bq_df = filter_by_column(col2, bq_df, 'location', "Filter by Location", "bq_locations")
                     
                     # Display the filtered DataFrame
                     st.dataframe(bq_df)
@@ -506,14 +859,7 @@ def main():
                         col3.metric("Total Tables", f"{bq_df['table_count'].sum()}")
                     
                     # Export options
-                    st.subheader("Export Options")
-                    col1, col2 = st.columns(2)
-                    
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    filename = f"gcp_bigquery_inventory_{timestamp}"
-                    
-                    col1.markdown(get_table_download_link(bq_df, filename, "csv"), unsafe_allow_html=True)
-                    col2.markdown(get_table_download_link(bq_df, filename, "excel"), unsafe_allow_html=True)
+                    show_export_options(bq_df, "gcp_bigquery_inventory")
                 else:
                     st.info("No BigQuery datasets found in the selected project(s).")
             else:
@@ -525,7 +871,7 @@ def main():
                 st.header("GKE Cluster Inventory")
                 
                 # Convert to DataFrame for display
-                gke_df = pd.DataFrame(st.session_state.gke_inventory)
+                gke_df = records_dataframe(st.session_state.gke_inventory)
                 
                 if len(gke_df) > 0:
                     # Add filtering options
@@ -533,43 +879,25 @@ def main():
                     col1, col2 = st.columns(2)
                     
                     # Filter by project (if multiple projects)
-                    if 'project_id' in gke_df.columns and len(gke_df['project_id'].unique()) > 1:
-                        selected_projects = col1.multiselect(
-                            "Filter by Project",
-                            options=sorted(gke_df['project_id'].unique()),
-                            default=sorted(gke_df['project_id'].unique()),
-                            key="gke_projects"
-                        )
-                        if selected_projects:
-                            gke_df = gke_df[gke_df['project_id'].isin(selected_projects)]
+                    gke_df = filter_by_column(col1, gke_df, 'project_id', "Filter by Project", "gke_projects")
                     
                     # Filter by location
-                    if 'location' in gke_df.columns and len(gke_df['location'].unique()) > 1:
-                        selected_locations = col2.multiselect(
-                            "Filter by Location",
-                            options=sorted(gke_df['location'].unique()),
-                            default=sorted(gke_df['location'].unique()),
-                            key="gke_locations"
-                        )
-                        if selected_locations:
-                            gke_df = gke_df[gke_df['location'].isin(selected_locations)]
+                    gke_df = filter_by_column(col2, gke_df, 'location', "Filter by Location", "gke_locations")
                     
                     # Display the filtered DataFrame
                     st.dataframe(gke_df)
                     
                     # Export options
-                    st.subheader("Export Options")
-                    col1, col2 = st.columns(2)
-                    
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    filename = f"gcp_gke_inventory_{timestamp}"
-                    
-                    col1.markdown(get_table_download_link(gke_df, filename, "csv"), unsafe_allow_html=True)
-                    col2.markdown(get_table_download_link(gke_df, filename, "excel"), unsafe_allow_html=True)
+                    show_export_options(gke_df, "gcp_gke_inventory")
                 else:
                     st.info("No GKE clusters found in the selected project(s).")
             else:
                 st.info("No GKE cluster inventory data collected yet.")
+    
+    # Rerun until the background tasks are done, to show their progress and results
+    if tasks_running:
+        time.sleep(POLL_INTERVAL)
+        st.rerun()
 
 
 if __name__ == "__main__":
@@ -2,28 +2,228 @@
 Utility functions for GCP VM Inventory Tool.
 """
 
+import functools
+import hashlib
 import shutil
+import subprocess
 import sys
 import os
 import textwrap
 
+# Environment for gcloud subprocesses. Every invocation bootstraps the whole SDK,
+# so skip the work it does besides running the command: prompts, the component
+# update check, usage reporting and writing a log file.
+GCLOUD_ENV = dict(
+    os.environ,
+    CLOUDSDK_CORE_DISABLE_PROMPTS="1",
+    CLOUDSDK_COMPONENT_MANAGER_DISABLE_UPDATE_CHECK="true",
+    CLOUDSDK_CORE_DISABLE_USAGE_REPORTING="true",
+    CLOUDSDK_CORE_DISABLE_FILE_LOGGING="true",
+)
+
+
+
+def gcloud_env(service_account_key=None):
+    """Get the environment of a gcloud subprocess running with a service account key.
+    
+    The key is passed to each command with the credential file override rather
+    than activated with "gcloud auth activate-service-account", which changes the
+    active account of every other gcloud command on the machine.
+    
+    Args:
+        service_account_key: Path to service account key file (optional)
+        
+    Returns:
+        dict: Environment of the subprocess
+    """
+    if not service_account_key:
+        return GCLOUD_ENV
+    return dict(GCLOUD_ENV, CLOUDSDK_AUTH_CREDENTIAL_FILE_OVERRIDE=os.path.abspath(service_account_key))
+
+# gcloud output projections restricted to the fields the inventory reads
+VM_INSTANCE_FORMAT = (
+    "json(id,name,status,zone,machineType,creationTimestamp,"
+    "disks[].boot,disks[].licenses,"
+    "networkInterfaces[].network,networkInterfaces[].networkIP,"
+    "networkInterfaces[].accessConfigs[].natIP)"
+)
+# Same projection as a Compute Engine REST partial-response field mask
+VM_INSTANCE_FIELDS = (
+    "id,name,status,zone,machineType,creationTimestamp,disks(boot,licenses),"
+    "networkInterfaces(network,networkIP,accessConfigs(natIP))"
+)
+MACHINE_TYPE_FORMAT = "json(guestCpus,memoryMb)"
+MACHINE_TYPE_LIST_FORMAT = "json(name,zone,guestCpus,memoryMb)"
+MACHINE_TYPE_FIELDS = "name,zone,guestCpus,memoryMb"
+SQL_INSTANCE_FORMAT = (
+    "json(name,databaseVersion,region,state,createTime,"
+    "settings.tier,settings.dataDiskSizeGb,settings.dataDiskType,settings.availabilityType,"
+    "ipAddresses[].ipAddress,ipAddresses[].type)"
+)
+# Node pool names are kept so that pools without an initial node count are still counted
+GKE_CLUSTER_FORMAT = (
+    "json(name,location,status,currentMasterVersion,network,subnetwork,createTime,"
+    "nodePools[].name,nodePools[].initialNodeCount)"
+)
+# Same projections as Cloud SQL Admin and Kubernetes Engine REST partial-response field masks
+SQL_INSTANCE_FIELDS = (
+    "nextPageToken,items(name,databaseVersion,region,state,createTime,"
+    "settings(tier,dataDiskSizeGb,dataDiskType,availabilityType),ipAddresses(ipAddress,type))"
+)
+GKE_CLUSTER_FIELDS = (
+    "clusters(name,location,status,currentMasterVersion,network,subnetwork,createTime,"
+    "nodePools(name,initialNodeCount))"
+)
+
+# Number of bytes in a GB, as reported in the inventories (binary gigabytes)
+BYTES_PER_GB = 1 << 30
+
+# BigQuery table types as reported by the __TABLES__ meta-table
+TABLE_TYPES = {1: 'TABLE', 2: 'VIEW', 3: 'EXTERNAL'}
+
+# Maximum number of gcloud commands a client runs at the same time
+MAX_CONCURRENT_COMMANDS = 16
+
+# Default number of BigQuery datasets processed concurrently
+DEFAULT_CONCURRENCY = 10
+
+# Default number of BigQuery datasets or tables requested per page when listing them
+DEFAULT_PAGE_SIZE = 1000
+
+# Whether check_gcloud_installed has found gcloud in the PATH
+_gcloud_found = False
+
+
+@functools.lru_cache(maxsize=1024)
+def resource_name(url):
+    """Get the last path segment of a GCP resource URL, such as the zone of a zone URL.
+    
+    The same zone, machine type, network and license URLs repeat across every VM, so
+    results are memoized and each name is stored once in the inventory.
+    
+    Args:
+        url: Resource URL or name
+        
+    Returns:
+        str: Last path segment of the URL
+    """
+    return url.rsplit('/', 1)[-1]
+
+
+@functools.lru_cache(maxsize=256)
+def os_from_license(license_url):
+    """Get the OS name from the license URL of a boot disk.
+    
+    Args:
+        license_url: License URL, such as .../projects/debian-cloud/global/licenses/debian-11-bullseye
+        
+    Returns:
+        str: OS name, or 'N/A' if the URL has no path
+    """
+    if '/' not in license_url:
+        return 'N/A'
+    return resource_name(license_url)
+
 
 def check_gcloud_installed():
     """Check if the gcloud command line tool is installed and available in the PATH.
     
+    It is called before every gcloud command, so the PATH is only searched until
+    gcloud is found. A missing gcloud is looked up again, in case it gets installed
+    while the Streamlit app is running.
+    
     Returns:
         tuple: (is_installed, error_message)
     """
-    if shutil.which("gcloud") is None:
-        error_message = (
-            "The Google Cloud SDK (gcloud) command line tool is not installed or not in your PATH.\n"
-            "Please install it from https://cloud.google.com/sdk/docs/install and try again.\n"
-            "After installation, run 'gcloud init' to configure it."
-        )
-        return False, error_message
+    global _gcloud_found
+    if not _gcloud_found:
+        if shutil.which("gcloud") is None:
+            error_message = (
+                "The Google Cloud SDK (gcloud) command line tool is not installed or not in your PATH.\n"
+                "Please install it from https://cloud.google.com/sdk/docs/install and try again.\n"
+                "After installation, run 'gcloud init' to configure it."
+            )
+            return False, error_message
+        _gcloud_found = True
     return True, None
 
 
+@functools.lru_cache(maxsize=None)
+def get_credentials(service_account_key=None):
+    """Get the Google credentials shared by every API client of the run.
+    
+    Resolving credentials may hit the metadata server or read a key file, so this is
+    done once per key and the same object is passed to every client.
+    
+    Args:
+        service_account_key: Path to service account key file (optional)
+        
+    Returns:
+        Google credentials
+    """
+    if service_account_key:
+        from google.oauth2 import service_account
+        return service_account.Credentials.from_service_account_file(
+            service_account_key,
+            scopes=["https://www.googleapis.com/auth/cloud-platform"]
+        )
+    
+    # Use default credentials from environment
+    import google.auth
+    credentials, _ = google.auth.default(scopes=["https://www.googleapis.com/auth/cloud-platform"])
+    return credentials
+
+
+def key_fingerprint(service_account_key=None):
+    """Get a digest of the content of a service account key file.
+    
+    The same key can be stored at several paths, such as the temporary files of
+    keys uploaded to the Streamlit app, so its content identifies the account.
+    
+    Args:
+        service_account_key: Path to service account key file (optional)
+        
+    Returns:
+        str: SHA-256 of the key file, its path if it cannot be read, or None without key
+    """
+    if not service_account_key:
+        return None
+    try:
+        with open(service_account_key, "rb") as key_file:
+            return hashlib.sha256(key_file.read()).hexdigest()
+    except OSError:
+        return service_account_key
+
+
+def credential_identity(service_account_key=None):
+    """Get an identifier of the credentials gcloud commands run with.
+    
+    Results fetched with different credentials can list different projects and
+    resources, so cached results are keyed on it.
+    
+    Args:
+        service_account_key: Path to service account key file (optional)
+        
+    Returns:
+        str: Digest of the service account key, or the active gcloud account without key
+    """
+    if service_account_key:
+        return f"key:{key_fingerprint(service_account_key)}"
+    
+    try:
+        result = subprocess.run(
+            ["gcloud", "config", "get-value", "account"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=True,
+            text=True,
+            env=GCLOUD_ENV
+        )
+        return f"account:{result.stdout.strip()}"
+    except (OSError, subprocess.CalledProcessError):
+        return "account:"
+
+
 def get_disclaimer_text():
     """Get the disclaimer text.
     
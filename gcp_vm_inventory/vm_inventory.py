@@ -5,9 +5,18 @@ This module provides functionality to collect VM inventory data from GCP.
 """
 
 import logging
-from typing import Dict, List, Optional, Any
+import queue
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Any
 from .gcp_client import GCPClient
 from .models import VMInfo, MachineTypeInfo
+from .utils import (
+    os_from_license, resource_name, VM_INSTANCE_FIELDS, VM_INSTANCE_FORMAT, MACHINE_TYPE_FIELDS,
+    MACHINE_TYPE_FORMAT, MACHINE_TYPE_LIST_FORMAT
+)
 
 # Configure logging
 logging.basicConfig(
@@ -16,6 +25,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Number of projects listed concurrently
+MAX_WORKERS = 16
+
+# Number of threads extracting VM information (which may describe machine types)
+EXTRACT_WORKERS = 8
+
+# Maximum number of VMs waiting between pipeline stages
+QUEUE_SIZE = 256
+
+# Seconds a pipeline stage waits on a full queue before checking whether to stop
+QUEUE_TIMEOUT = 0.1
+
+# Marks the end of a project's VMs in the pipeline
+_DONE = object()
+
 
 class VMInventory:
     """Class for collecting VM inventory data from GCP."""
@@ -27,6 +51,52 @@ class VMInventory:
             client: GCP client instance
         """
         self.client = client
+        self._machine_types = {}
+    
+    def prefetch_machine_types(self, project_id: str, vms: List[Dict[str, Any]]) -> None:
+        """Fetch the machine types used by the VMs of a project with a single request.
+        
+        The machine types of all zones the VMs run in are listed at once, instead of
+        being described one VM at a time, and cached for get_machine_type_info. The
+        Compute Engine API is called directly when possible, otherwise gcloud is used.
+        
+        Args:
+            project_id: The GCP project ID
+            vms: List of VM data dictionaries of the project
+        """
+        wanted = {
+            (resource_name(vm.get('zone', '')), resource_name(vm.get('machineType', '')))
+            for vm in vms
+        }
+        wanted = {key for key in wanted if all(key) and (project_id, *key) not in self._machine_types}
+        if not wanted:
+            return
+        
+        names = sorted({name for _, name in wanted})
+        
+        # The API matches the filter literal as a regular expression on the whole name.
+        # Machine type names only contain lowercase letters, digits and dashes.
+        results = self.client.compute_aggregated_list(
+            project_id, "machineTypes", MACHINE_TYPE_FIELDS, f'name eq "({"|".join(names)})"'
+        )
+        if results is None:
+            zones = ' '.join(sorted({zone for zone, _ in wanted}))
+            command = [
+                "gcloud", "compute", "machine-types", "list",
+                "--project", project_id,
+                f"--filter=zone:({zones}) AND name:({' '.join(names)})",
+                f"--format={MACHINE_TYPE_LIST_FORMAT}",
+                "--quiet"
+            ]
+            results = self.client.run_gcloud_command(command) or []
+        
+        for result in results:
+            key = (resource_name(result.get('zone', '')), result.get('name'))
+            if key in wanted:
+                self._machine_types[(project_id, *key)] = MachineTypeInfo(
+                    cpu_count=result.get('guestCpus', 0),
+                    memory_mb=result.get('memoryMb', 0)
+                )
     
     def get_machine_type_info(self, project_id: str, zone: str, machine_type: str) -> MachineTypeInfo:
         """Get CPU and memory information for a machine type.
@@ -42,21 +112,26 @@ class VMInventory:
         if machine_type == 'unknown':
             return MachineTypeInfo()
         
+        cached = self._machine_types.get((project_id, zone, machine_type))
+        if cached:
+            return cached
+        
         command = [
             "gcloud", "compute", "machine-types", "describe",
             machine_type,
             "--project", project_id,
             "--zone", zone,
-            "--format=json",
+            f"--format={MACHINE_TYPE_FORMAT}",
             "--quiet"
         ]
         
         result = self.client.run_gcloud_command(command)
         if result:
-            return MachineTypeInfo(
+            self._machine_types[(project_id, zone, machine_type)] = machine_info = MachineTypeInfo(
                 cpu_count=result.get('guestCpus', 0),
                 memory_mb=result.get('memoryMb', 0)
             )
+            return machine_info
         return MachineTypeInfo()
     
     def get_os_info(self, vm: Dict[str, Any]) -> str:
@@ -81,10 +156,7 @@ class VMInventory:
             return 'N/A'
         
         # Extract OS name from license URL
-        license_parts = licenses[0].split('/')
-        if len(license_parts) >= 2:
-            return license_parts[-1]
-        return 'N/A'
+        return os_from_license(licenses[0])
     
     def get_external_ip(self, vm: Dict[str, Any]) -> str:
         """Extract external IP address from VM data.
@@ -115,23 +187,25 @@ class VMInventory:
         Returns:
             VMInfo object with extracted information
         """
-        machine_type_parts = vm.get('machineType', '').split('/')
-        machine_type = machine_type_parts[-1] if machine_type_parts else 'unknown'
-        zone_parts = vm.get('zone', '').split('/')
-        zone = zone_parts[-1] if zone_parts else 'N/A'
+        machine_type = resource_name(vm.get('machineType', ''))
+        zone = resource_name(vm.get('zone', ''))
         
         # Extract CPU and memory information
         machine_info = self.get_machine_type_info(project_id, zone, machine_type)
         
-        # Extract network information
-        network_interfaces = vm.get('networkInterfaces', [])
+        # Extract network information from the first interface
+        network_interfaces = vm.get('networkInterfaces')
         network = 'N/A'
         internal_ip = 'N/A'
+        external_ip = 'N/A'
         
         if network_interfaces:
-            network_parts = network_interfaces[0].get('network', '').split('/')
-            network = network_parts[-1] if network_parts else 'N/A'
-            internal_ip = network_interfaces[0].get('networkIP', 'N/A')
+            interface = network_interfaces[0]
+            network = resource_name(interface.get('network', ''))
+            internal_ip = interface.get('networkIP', 'N/A')
+            access_configs = interface.get('accessConfigs')
+            if access_configs:
+                external_ip = access_configs[0].get('natIP', 'N/A')
         
         return VMInfo(
             project_id=project_id,
@@ -146,73 +220,171 @@ class VMInventory:
             creation_timestamp=vm.get('creationTimestamp', 'N/A'),
             network=network,
             internal_ip=internal_ip,
-            external_ip=self.get_external_ip(vm)
+            external_ip=external_ip
         )
     
-    def get_vms_in_project(self, project_id: str) -> List[Dict[str, Any]]:
+    def get_vms_in_project(self, project_id: str) -> Iterable[Dict[str, Any]]:
         """Get all VMs in a specific project.
         
+        Uses a single aggregatedList call to the Compute Engine API, and falls back to
+        gcloud when the API cannot be called directly. Unless results are cached, the
+        gcloud output is streamed: VMs are parsed as they are iterated over, and
+        iterating raises subprocess.CalledProcessError if gcloud fails.
+        
         Args:
             project_id: The GCP project ID
             
         Returns:
-            List of VM data dictionaries
+            List of VM data dictionaries, or an iterator over them when streamed
         """
+        result = self.client.compute_aggregated_list(project_id, "instances", VM_INSTANCE_FIELDS)
+        if result is not None:
+            return result
+        
         command = [
             "gcloud", "compute", "instances", "list",
             "--project", project_id,
-            "--format=json",
+            f"--format={VM_INSTANCE_FORMAT}",
             "--quiet"
         ]
-        result = self.client.run_gcloud_command(command)
-        return result if result else []
+        if self.client.cache:
+            result = self.client.run_gcloud_command(command)
+            return result if result else []
+        # Without cache, the output is parsed as gcloud writes it instead of being read whole first
+        return self.client.stream_gcloud_json(command)
     
-    def collect_vm_inventory(self, project_id: Optional[str] = None, 
-                            skip_disabled_apis: bool = False) -> List[VMInfo]:
-        """Collect VM inventory data from GCP.
+    def iter_vm_inventory(self, project_id: Optional[str] = None,
+                          skip_disabled_apis: bool = False) -> Iterator[VMInfo]:
+        """Collect VM inventory data from GCP, yielding VMs as they are extracted.
+        
+        Projects are listed by one thread pool and the VMs of each listed project are
+        extracted by another, so gcloud calls overlap with processing. The stages are
+        connected by a bounded queue, so only a limited number of VMs are in flight
+        whatever the size of the inventory. The VMs of a project are yielded in listing
+        order. If the consumer stops early or raises, pending work is skipped and the
+        pools are shut down before returning.
         
         Args:
             project_id: Specific project ID to inventory (optional)
             skip_disabled_apis: Whether to skip projects with disabled APIs
             
-        Returns:
-            List of VMInfo objects
+        Yields:
+            VMInfo objects
         """
-        all_vm_data = []
-        
         if project_id:
-            # Process a single project
-            logger.info(f"Collecting VM data for project: {project_id}")
-            vms = self.get_vms_in_project(project_id)
-            if vms:
-                for vm in vms:
-                    vm_info = self.extract_vm_info(vm, project_id)
-                    all_vm_data.append(vm_info)
-                logger.info(f"Found {len(vms)} VMs in project {project_id}")
-            else:
-                logger.info(f"No VMs found in project {project_id}")
+            project_ids = [project_id]
         else:
             # Process all accessible projects
             projects = self.client.get_projects()
             if not projects:
                 logger.warning("No projects found or unable to access project list.")
-                return []
-            
-            logger.info(f"Found {len(projects)} projects to check for VMs")
+                return
             
-            for project in projects:
-                project_id = project.get('projectId')
-                logger.info(f"Collecting VM data for project: {project_id}")
-                vms = self.get_vms_in_project(project_id)
-                if vms:
-                    for vm in vms:
-                        vm_info = self.extract_vm_info(vm, project_id)
-                        all_vm_data.append(vm_info)
-                    logger.info(f"Found {len(vms)} VMs in project {project_id}")
+            project_ids = [project.get('projectId') for project in projects]
+            logger.info(f"Found {len(project_ids)} projects to check for VMs")
+        
+        # Extractions in listing order, followed by _DONE once per listed project
+        result_queue = queue.Queue(maxsize=QUEUE_SIZE)
+        
+        # Set when the consumer stops, so that pending work is skipped instead of run
+        stop = threading.Event()
+        
+        def put(item):
+            # Wait for room in the queue, unless the consumer has stopped
+            while not stop.is_set():
+                try:
+                    result_queue.put(item, timeout=QUEUE_TIMEOUT)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def extract_vm(vm, proj_id):
+            if stop.is_set():
+                return None
+            try:
+                return self.extract_vm_info(vm, proj_id)
+            except Exception as e:
+                logger.error(f"Error extracting VM information in project {proj_id}: {str(e)}")
+                return None
+        
+        def list_project_vms(proj_id):
+            vms = None
+            try:
+                if stop.is_set():
+                    return
+                logger.info(f"Collecting VM data for project: {proj_id}")
+                vms = self.get_vms_in_project(proj_id)
+                
+                # Streamed VMs are handled in batches as they are parsed, with the machine
+                # types of each batch fetched at once. Listed VMs are a single batch.
+                batch_size = len(vms) if isinstance(vms, list) else QUEUE_SIZE
+                vm_iterator = iter(vms)
+                count = 0
+                for batch in iter(lambda: list(islice(vm_iterator, batch_size)), []):
+                    self.prefetch_machine_types(proj_id, batch)
+                    # Extraction starts while the project is still being listed, as well as
+                    # the other projects. A full queue holds the listing back.
+                    for vm in batch:
+                        if not put(extract_executor.submit(extract_vm, vm, proj_id)):
+                            return
+                    count += len(batch)
+                
+                if count:
+                    logger.info(f"Found {count} VMs in project {proj_id}")
+                elif project_id:
+                    logger.info(f"No VMs found in project {proj_id}")
                 elif not skip_disabled_apis:
-                    logger.warning(f"No VM data found for project: {project_id} or API access issue")
+                    logger.warning(f"No VM data found for project: {proj_id} or API access issue")
+                else:
+                    logger.info(f"Skipping project: {proj_id} (possibly due to disabled API)")
+            except subprocess.CalledProcessError:
+                # gcloud has already logged its error output
+                if skip_disabled_apis:
+                    logger.info(f"Skipping project: {proj_id} (possibly due to disabled API)")
                 else:
-                    logger.info(f"Skipping project: {project_id} (possibly due to disabled API)")
+                    logger.error(f"Could not list the VMs of project {proj_id}, its inventory is incomplete")
+            except Exception as e:
+                logger.error(f"Error listing VMs in project {proj_id}: {str(e)}")
+            finally:
+                # Stop gcloud if the listing is abandoned before its end
+                close = getattr(vms, 'close', None)
+                if close:
+                    close()
+                put(_DONE)
+        
+        # The listing pool is shut down first, as its tasks submit to the extraction pool
+        with ThreadPoolExecutor(max_workers=EXTRACT_WORKERS) as extract_executor, \
+                ThreadPoolExecutor(max_workers=MAX_WORKERS) as list_executor:
+            futures = [list_executor.submit(list_project_vms, proj_id) for proj_id in project_ids]
+            try:
+                remaining = len(project_ids)
+                while remaining:
+                    item = result_queue.get()
+                    if item is _DONE:
+                        remaining -= 1
+                        continue
+                    vm_info = item.result()
+                    if vm_info is not None:
+                        yield vm_info
+            finally:
+                # Do not start the remaining work if the consumer stops early or fails
+                stop.set()
+                for future in futures:
+                    future.cancel()
+    
+    def collect_vm_inventory(self, project_id: Optional[str] = None, 
+                            skip_disabled_apis: bool = False) -> List[VMInfo]:
+        """Collect VM inventory data from GCP.
+        
+        Args:
+            project_id: Specific project ID to inventory (optional)
+            skip_disabled_apis: Whether to skip projects with disabled APIs
+            
+        Returns:
+            List of VMInfo objects
+        """
+        all_vm_data = list(self.iter_vm_inventory(project_id, skip_disabled_apis))
         
         logger.info(f"Collected information for {len(all_vm_data)} VMs across all projects")
         return all_vm_data
@@ -21,8 +21,9 @@ setup(
     python_requires=">=3.6",
     install_requires=[
         "pandas>=1.0.0",
-        "streamlit>=1.0.0",
+        "streamlit>=1.27.0",
         "xlsxwriter>=1.3.0",
+        "orjson>=3.0.0",
     ],
     entry_points={
         "console_scripts": [
@@ -0,0 +1,73 @@
+"""
+Unit tests for the API Checker module.
+"""
+
+import unittest
+import subprocess
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+# Add the parent directory to the path so we can import the package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from gcp_vm_inventory import api_checker
+from gcp_vm_inventory.api_checker import check_required_apis, invalidate_api_status_cache
+
+
+class TestCheckRequiredAPIs(unittest.TestCase):
+    """Test cases for the check_required_apis function."""
+    
+    def setUp(self):
+        """Set up test environment."""
+        invalidate_api_status_cache()
+        self.addCleanup(invalidate_api_status_cache)
+        
+        patcher = patch('gcp_vm_inventory.api_checker.subprocess.run')
+        self.mock_run = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mock_run.return_value = MagicMock(stdout="compute.googleapis.com\nbigquery.googleapis.com\n")
+    
+    def test_statuses(self):
+        """Test that every required API is reported from one listing of the enabled services."""
+        result = check_required_apis('test-project', 'key.json')
+        
+        # Verify the result
+        self.assertEqual(result["compute.googleapis.com"], {"name": "Compute Engine API", "status": "OK"})
+        self.assertEqual(result["sqladmin.googleapis.com"]["status"], "MISSING")
+        self.mock_run.assert_called_once()
+        
+        # The key is given to the command
+        env = self.mock_run.call_args[1]['env']
+        self.assertEqual(env['CLOUDSDK_AUTH_CREDENTIAL_FILE_OVERRIDE'], os.path.abspath('key.json'))
+    
+    def test_statuses_reused(self):
+        """Test that statuses are reused within the TTL, as new dictionaries."""
+        first = check_required_apis('test-project')
+        first["compute.googleapis.com"]["status"] = "MISSING"
+        second = check_required_apis('test-project')
+        
+        # Verify the result
+        self.assertEqual(second["compute.googleapis.com"]["status"], "OK")
+        self.mock_run.assert_called_once()
+        
+        # Expired statuses are checked again
+        with patch.object(api_checker, 'API_STATUS_TTL', 0):
+            check_required_apis('test-project')
+        self.assertEqual(self.mock_run.call_count, 2)
+    
+    def test_errors_not_reused(self):
+        """Test that failed checks are not reused."""
+        self.mock_run.side_effect = subprocess.CalledProcessError(1, 'gcloud', stderr="PERMISSION_DENIED")
+        
+        result = check_required_apis('test-project')
+        
+        # Verify the result
+        self.assertEqual(result["compute.googleapis.com"]["status"], "CREDENTIAL_ISSUE")
+        self.mock_run.side_effect = None
+        self.assertEqual(check_required_apis('test-project')["compute.googleapis.com"]["status"], "OK")
+        self.assertEqual(self.mock_run.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -11,8 +11,9 @@ from datetime import datetime
 # Add the parent directory to the path so we can import the package
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from gcp_vm_inventory.bigquery_inventory import BigQueryInventory
-from gcp_vm_inventory.models import BigQueryDatasetInfo
+from google.api_core import exceptions
+from gcp_vm_inventory.bigquery_inventory import BigQueryInventory, BQ_RETRY, _is_transient_error
+from gcp_vm_inventory.models import BigQueryDatasetInfo, BigQueryDatasetSummary
 
 
 class TestBigQueryInventory(unittest.TestCase):
@@ -58,8 +59,8 @@ class TestBigQueryInventory(unittest.TestCase):
     
     def test_get_datasets(self):
         """Test getting BigQuery datasets."""
-        # Mock the BigQuery client's list_datasets method
-        self.mock_bq_client.list_datasets.return_value = [self.mock_dataset]
+        # Mock the BigQuery client's list_datasets method, which returns a page iterator
+        self.mock_bq_client.list_datasets.return_value.pages = [[self.mock_dataset]]
         self.mock_bq_client.dataset.return_value = 'dataset_ref'
         self.mock_bq_client.get_dataset.return_value = self.mock_dataset
         
@@ -68,10 +69,53 @@ class TestBigQueryInventory(unittest.TestCase):
         
         # Verify the result
         self.assertEqual(len(result), 1)
-        self.assertEqual(result[0]['datasetReference']['datasetId'], 'test_dataset')
-        self.assertEqual(result[0]['datasetReference']['projectId'], 'test-project')
-        self.assertEqual(result[0]['location'], 'US')
-        self.mock_bq_client.list_datasets.assert_called_once()
+        self.assertEqual(result[0].dataset_id, 'test_dataset')
+        self.assertEqual(result[0].project_id, 'test-project')
+        self.assertEqual(result[0].location, 'US')
+        self.assertIsNotNone(result[0].creation_time)
+        self.mock_bq_client.list_datasets.assert_called_once_with(page_size=1000, retry=BQ_RETRY)
+    
+    def test_get_dataset_locations(self):
+        """Test resolving dataset locations with one probe and one SCHEMATA query per region."""
+        # The probed dataset is in the US, the SCHEMATA query resolves the others
+        self.mock_bq_client.get_dataset.return_value = self.mock_dataset
+        rows = []
+        for schema_name in ['test_dataset', 'other_dataset', 'third_dataset']:
+            row = MagicMock()
+            row.schema_name = schema_name
+            row.location = 'US'
+            row.creation_time = datetime(2025, 1, 1)
+            row.last_modified_time = None
+            rows.append(row)
+        self.mock_bq_client.query.return_value.result.return_value = rows
+        
+        # Get dataset locations
+        dataset_ids = ['test_dataset', 'other_dataset', 'third_dataset']
+        result = self.bq_inventory.get_dataset_locations('test-project', dataset_ids)
+        
+        # Verify the result
+        self.assertEqual(result, {dataset_id: 'US' for dataset_id in dataset_ids})
+        self.mock_bq_client.get_dataset.assert_called_once()
+        self.mock_bq_client.query.assert_called_once()
+        self.assertIn('other_dataset', self.bq_inventory._dataset_times['test-project'])
+        self.assertIn('`region-us`.INFORMATION_SCHEMA.SCHEMATA', self.mock_bq_client.query.call_args[0][0])
+        
+        # Locations are cached per project
+        self.bq_inventory.get_dataset_locations('test-project', dataset_ids)
+        self.mock_bq_client.get_dataset.assert_called_once()
+    
+    def test_get_dataset_locations_without_schemata(self):
+        """Test that locations are inferred from one probe when SCHEMATA cannot be queried."""
+        self.mock_bq_client.get_dataset.return_value = self.mock_dataset
+        self.mock_bq_client.query.side_effect = Exception("Access Denied")
+        
+        # Get dataset locations
+        dataset_ids = ['test_dataset', 'other_dataset', 'third_dataset']
+        result = self.bq_inventory.get_dataset_locations('test-project', dataset_ids)
+        
+        # Verify the result
+        self.assertEqual(result, {dataset_id: 'US' for dataset_id in dataset_ids})
+        self.mock_bq_client.get_dataset.assert_called_once()
     
     def test_get_dataset_info(self):
         """Test getting BigQuery dataset information."""
@@ -89,7 +133,20 @@ class TestBigQueryInventory(unittest.TestCase):
         self.assertIsNotNone(result['creationTime'])
         self.assertIsNotNone(result['lastModifiedTime'])
         self.mock_bq_client.dataset.assert_called_once_with('test_dataset')
-        self.mock_bq_client.get_dataset.assert_called_once_with('dataset_ref')
+        self.mock_bq_client.get_dataset.assert_called_once_with('dataset_ref', retry=BQ_RETRY)
+    
+    def test_get_full_dataset_fetched_once(self):
+        """Test that a dataset fetched for its location is not fetched again."""
+        self.mock_bq_client.get_dataset.return_value = self.mock_dataset
+        self.mock_bq_client.query.side_effect = Exception("Access Denied")
+        
+        # Resolve the location, then get the dataset info
+        self.bq_inventory.get_dataset_locations('test-project', ['test_dataset'])
+        result = self.bq_inventory.get_dataset_info('test-project', 'test_dataset')
+        
+        # Verify the result
+        self.assertEqual(result['location'], 'US')
+        self.mock_bq_client.get_dataset.assert_called_once()
     
     def test_get_tables(self):
         """Test getting BigQuery tables."""
@@ -103,14 +160,40 @@ class TestBigQueryInventory(unittest.TestCase):
         
         # Verify the result
         self.assertEqual(len(result), 1)
-        self.assertEqual(result[0]['tableReference']['tableId'], 'test_table')
-        self.assertEqual(result[0]['tableReference']['datasetId'], 'test_dataset')
-        self.assertEqual(result[0]['tableReference']['projectId'], 'test-project')
-        self.assertEqual(result[0]['numBytes'], 1024 * 1024 * 10)
-        self.assertEqual(result[0]['numRows'], 100)
-        self.mock_bq_client.list_tables.assert_called_once_with('dataset_ref')
+        self.assertEqual(result[0].table_id, 'test_table')
+        self.assertEqual(result[0].dataset_id, 'test_dataset')
+        self.assertEqual(result[0].project_id, 'test-project')
+        self.assertEqual(result[0].num_bytes, 1024 * 1024 * 10)
+        self.assertEqual(result[0].num_rows, 100)
+        self.mock_bq_client.list_tables.assert_called_once_with('dataset_ref', page_size=1000, retry=BQ_RETRY)
         self.mock_bq_client.get_table.assert_called_once()
     
+    def test_get_tables_from_meta_table(self):
+        """Test getting BigQuery tables from a single __TABLES__ query."""
+        # Mock the BigQuery client's list_tables and query methods
+        self.mock_bq_client.dataset.return_value = 'dataset_ref'
+        self.mock_bq_client.list_tables.return_value = [self.mock_table]
+        row = MagicMock()
+        row.table_id = 'test_table'
+        row.size_bytes = 1024 * 1024 * 10
+        row.row_count = 100
+        row.creation_time = 1735689600000
+        row.last_modified_time = 1735776000000
+        row.type = 1
+        self.mock_bq_client.query.return_value.result.return_value = [row]
+        
+        # Get tables
+        result = self.bq_inventory.get_tables('test-project', 'test_dataset')
+        
+        # Verify the result
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0].table_id, 'test_table')
+        self.assertEqual(result[0].num_bytes, 1024 * 1024 * 10)
+        self.assertEqual(result[0].num_rows, 100)
+        self.assertEqual(result[0].table_type, 'TABLE')
+        self.assertIn('`test-project.test_dataset.__TABLES__`', self.mock_bq_client.query.call_args[0][0])
+        self.mock_bq_client.get_table.assert_not_called()
+    
     def test_extract_dataset_info(self):
         """Test extracting BigQuery dataset information."""
         # Mock the BigQuery client's methods
@@ -130,16 +213,77 @@ class TestBigQueryInventory(unittest.TestCase):
         self.assertEqual(result.table_count, 1)
         self.assertEqual(result.total_size_gb, 0.01)  # 10 MB = 0.01 GB
     
-    @patch('gcp_vm_inventory.bigquery_inventory.BigQueryInventory.get_datasets')
+    def test_extract_dataset_info_without_meta_table(self):
+        """Test that the tables are fetched one by one, without a second query, when __TABLES__ fails."""
+        # Mock the BigQuery client's methods
+        self.mock_bq_client.dataset.return_value = 'dataset_ref'
+        self.mock_bq_client.get_dataset.return_value = self.mock_dataset
+        self.mock_bq_client.query.side_effect = Exception("Access Denied")
+        self.mock_bq_client.list_tables.return_value = [self.mock_table]
+        self.mock_bq_client.get_table.return_value = self.mock_table_ref
+        
+        # Extract dataset info
+        result = self.bq_inventory.extract_dataset_info('test-project', 'test_dataset', 'US')
+        
+        # Verify the result
+        self.assertEqual(result.table_count, 1)
+        self.assertEqual(result.total_size_gb, 0.01)
+        self.mock_bq_client.query.assert_called_once()
+        self.mock_bq_client.get_table.assert_called_once()
+    
+    def test_extract_dataset_info_from_summary_query(self):
+        """Test extracting dataset information from the aggregate __TABLES__ query."""
+        # Mock the BigQuery client's methods
+        self.mock_bq_client.dataset.return_value = 'dataset_ref'
+        self.mock_bq_client.get_dataset.return_value = self.mock_dataset
+        row = MagicMock()
+        row.table_count = 3
+        row.total_size_bytes = 1024 * 1024 * 1024 * 2
+        self.mock_bq_client.query.return_value.result.return_value = [row]
+        
+        # Extract dataset info
+        result = self.bq_inventory.extract_dataset_info('test-project', 'test_dataset', 'US')
+        
+        # Verify the result
+        self.assertEqual(result.table_count, 3)
+        self.assertEqual(result.total_size_gb, 2)
+        self.mock_bq_client.list_tables.assert_not_called()
+        self.mock_bq_client.get_table.assert_not_called()
+    
+    def test_extract_dataset_info_with_known_times(self):
+        """Test that the dataset is not fetched again when its times are already known."""
+        row = MagicMock()
+        row.table_count = 1
+        row.total_size_bytes = 0
+        self.mock_bq_client.query.return_value.result.return_value = [row]
+        
+        # Extract dataset info
+        result = self.bq_inventory.extract_dataset_info('test-project', 'test_dataset', 'US', 1000.0, 2000.0)
+        
+        # Verify the result
+        self.assertEqual(result.creation_time, 1000.0)
+        self.assertEqual(result.last_modified_time, 2000.0)
+        self.mock_bq_client.get_dataset.assert_not_called()
+    
+    def test_is_transient_error(self):
+        """Test which BigQuery errors are retried."""
+        self.assertTrue(_is_transient_error(exceptions.TooManyRequests("Too many requests")))
+        self.assertTrue(_is_transient_error(exceptions.ServiceUnavailable("Unavailable")))
+        self.assertTrue(_is_transient_error(
+            exceptions.Forbidden("Rate limit", errors=[{'reason': 'rateLimitExceeded'}])
+        ))
+        self.assertFalse(_is_transient_error(
+            exceptions.Forbidden("Access Denied", errors=[{'reason': 'accessDenied'}])
+        ))
+        self.assertFalse(_is_transient_error(exceptions.NotFound("Not found")))
+    
+    @patch('gcp_vm_inventory.bigquery_inventory.BigQueryInventory.iter_dataset_summaries')
     @patch('gcp_vm_inventory.bigquery_inventory.BigQueryInventory.extract_dataset_info')
-    def test_collect_bigquery_inventory_single_project(self, mock_extract_dataset_info, mock_get_datasets):
+    def test_collect_bigquery_inventory_single_project(self, mock_extract_dataset_info, mock_iter_dataset_summaries):
         """Test collecting BigQuery inventory for a single project."""
-        # Mock the get_datasets method
-        mock_get_datasets.return_value = [
-            {
-                'datasetReference': {'datasetId': 'test_dataset', 'projectId': 'test-project'},
-                'location': 'US'
-            }
+        # Mock the iter_dataset_summaries method
+        mock_iter_dataset_summaries.return_value = [
+            BigQueryDatasetSummary('test-project', 'test_dataset', 'US', None, None)
         ]
         
         # Mock the extract_dataset_info method
@@ -158,12 +302,12 @@ class TestBigQueryInventory(unittest.TestCase):
         # Verify the result
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0], mock_dataset_info)
-        mock_get_datasets.assert_called_once_with('test-project')
-        mock_extract_dataset_info.assert_called_once_with('test-project', 'test_dataset', 'US')
+        mock_iter_dataset_summaries.assert_called_once_with('test-project')
+        mock_extract_dataset_info.assert_called_once_with('test-project', 'test_dataset', 'US', None, None)
     
-    @patch('gcp_vm_inventory.bigquery_inventory.BigQueryInventory.get_datasets')
+    @patch('gcp_vm_inventory.bigquery_inventory.BigQueryInventory.iter_dataset_summaries')
     @patch('gcp_vm_inventory.bigquery_inventory.BigQueryInventory.extract_dataset_info')
-    def test_collect_bigquery_inventory_all_projects(self, mock_extract_dataset_info, mock_get_datasets):
+    def test_collect_bigquery_inventory_all_projects(self, mock_extract_dataset_info, mock_iter_dataset_summaries):
         """Test collecting BigQuery inventory for all projects."""
         # Mock the client's get_projects method
         self.mock_client.get_projects.return_value = [
@@ -171,12 +315,9 @@ class TestBigQueryInventory(unittest.TestCase):
             {'projectId': 'project-2'}
         ]
         
-        # Mock the get_datasets method
-        mock_get_datasets.return_value = [
-            {
-                'datasetReference': {'datasetId': 'test_dataset', 'projectId': 'project-1'},
-                'location': 'US'
-            }
+        # Mock the iter_dataset_summaries method
+        mock_iter_dataset_summaries.return_value = [
+            BigQueryDatasetSummary('project-1', 'test_dataset', 'US', None, None)
         ]
         
         # Mock the extract_dataset_info method
@@ -196,8 +337,26 @@ class TestBigQueryInventory(unittest.TestCase):
         self.assertEqual(len(result), 2)  # One dataset for each project
         self.assertEqual(result[0], mock_dataset_info)
         self.assertEqual(result[1], mock_dataset_info)
-        self.assertEqual(mock_get_datasets.call_count, 2)
+        self.assertEqual(mock_iter_dataset_summaries.call_count, 2)
         self.assertEqual(mock_extract_dataset_info.call_count, 2)
+        
+        # Each project gets its own BigQuery client
+        self.mock_client.get_bigquery_client.assert_any_call('project-1')
+        self.mock_client.get_bigquery_client.assert_any_call('project-2')
+    
+    @patch('gcp_vm_inventory.bigquery_inventory.BigQueryInventory.iter_dataset_summaries')
+    def test_collect_bigquery_inventory_forgets_previous_run(self, mock_iter_dataset_summaries):
+        """Test that datasets and times read by a previous run are not reused."""
+        mock_iter_dataset_summaries.return_value = []
+        self.bq_inventory._full_datasets[('test-project', 'test_dataset')] = MagicMock()
+        self.bq_inventory._dataset_times['test-project'] = {'test_dataset': (1.0, 2.0)}
+        
+        # Collect BigQuery inventory again
+        self.bq_inventory.collect_bigquery_inventory(project_id='test-project')
+        
+        # Verify the result
+        self.assertEqual(self.bq_inventory._full_datasets, {})
+        self.assertEqual(self.bq_inventory._dataset_times, {})
 
 
 if __name__ == '__main__':
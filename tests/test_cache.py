@@ -0,0 +1,111 @@
+"""
+Unit tests for the Cache module.
+"""
+
+import unittest
+import shutil
+import tempfile
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+# Add the parent directory to the path so we can import the package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from gcp_vm_inventory.cache import GcloudCache
+
+
+class TestGcloudCache(unittest.TestCase):
+    """Test cases for the GcloudCache class."""
+    
+    def setUp(self):
+        """Set up test environment."""
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = GcloudCache(self.cache_dir, ttl=60)
+        self.command = ["gcloud", "projects", "list", "--format=json", "--quiet"]
+        
+        # Mock the gcloud version lookup
+        patcher = patch('gcp_vm_inventory.cache.subprocess.run')
+        self.mock_run = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mock_run.return_value = MagicMock(stdout='{"Google Cloud SDK": "450.0.0"}')
+    
+    def tearDown(self):
+        """Clean up test environment."""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+    
+    def test_get_set(self):
+        """Test storing and retrieving a cached result."""
+        self.assertEqual(self.cache.get(self.command), (False, None))
+        
+        self.cache.set(self.command, [{"projectId": "test-project"}])
+        
+        self.assertEqual(self.cache.get(self.command), (True, [{"projectId": "test-project"}]))
+        # Text output is cached separately from JSON output
+        self.assertEqual(self.cache.get(self.command, check_json=False), (False, None))
+    
+    def test_get_set_structured_key(self):
+        """Test a round trip with a key holding None, numbers and dictionaries, logged on hits."""
+        key = ["streamlit", "0.2.0", "collect_vm_inventory", None, {"project_id": None, "skip_disabled_apis": True}]
+        timed_key = ["aggregatedList", "test-project", 1700000000.5]
+        
+        self.cache.set(key, [{"name": "vm-1"}])
+        self.cache.set(timed_key, [3, 1024])
+        
+        with self.assertLogs('gcp_vm_inventory.cache', level='DEBUG'):
+            self.assertEqual(self.cache.get(key), (True, [{"name": "vm-1"}]))
+            self.assertEqual(self.cache.get(timed_key), (True, [3, 1024]))
+    
+    def test_identity(self):
+        """Test that entries stored under other credentials are not returned."""
+        key_cache = GcloudCache(self.cache_dir, ttl=60, identity="key:abc")
+        key_cache.set(self.command, [{"projectId": "key-project"}])
+        
+        self.assertEqual(self.cache.get(self.command), (False, None))
+        self.assertEqual(GcloudCache(self.cache_dir, ttl=60, identity="key:def").get(self.command), (False, None))
+        self.assertEqual(
+            GcloudCache(self.cache_dir, ttl=60, identity="key:abc").get(self.command),
+            (True, [{"projectId": "key-project"}])
+        )
+    
+    def test_expired_entry(self):
+        """Test that entries older than the TTL are ignored."""
+        self.cache.set(self.command, [])
+        self.cache.ttl = -1
+        
+        self.assertEqual(self.cache.get(self.command), (False, None))
+    
+    def test_gcloud_upgrade_invalidates(self):
+        """Test that entries written by another gcloud version are ignored."""
+        self.cache.set(self.command, [])
+        
+        upgraded_cache = GcloudCache(self.cache_dir, ttl=60)
+        self.mock_run.return_value = MagicMock(stdout='{"Google Cloud SDK": "451.0.0"}')
+        
+        self.assertEqual(upgraded_cache.get(self.command), (False, None))
+    
+    def test_failed_write(self):
+        """Test that failed writes leave no temporary file behind."""
+        # Value that cannot be serialized
+        with self.assertLogs('gcp_vm_inventory.cache', level='WARNING'):
+            self.cache.set(self.command, object())
+        
+        # Write error
+        with patch('gcp_vm_inventory.cache.os.replace', side_effect=OSError("No space left on device")), \
+                self.assertLogs('gcp_vm_inventory.cache', level='WARNING'):
+            self.cache.set(self.command, [])
+        
+        self.assertEqual(os.listdir(self.cache_dir), [])
+        self.assertEqual(self.cache.get(self.command), (False, None))
+    
+    def test_disabled(self):
+        """Test that a disabled cache neither stores nor returns entries."""
+        self.cache.enabled = False
+        self.cache.set(self.command, [])
+        
+        self.assertEqual(self.cache.get(self.command), (False, None))
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -13,6 +13,7 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from gcp_vm_inventory.gcp_client import GCPClient
+from gcp_vm_inventory.utils import GCLOUD_ENV
 
 
 class TestGCPClient(unittest.TestCase):
@@ -28,8 +29,8 @@ class TestGCPClient(unittest.TestCase):
         """Test running a gcloud command successfully."""
         # Mock the subprocess.run result
         mock_process = MagicMock()
-        mock_process.stdout = '{"key": "value"}'
-        mock_process.stderr = ''
+        mock_process.stdout = b'{"key": "value"}'
+        mock_process.stderr = b''
         mock_run.return_value = mock_process
         
         # Run the command
@@ -43,16 +44,81 @@ class TestGCPClient(unittest.TestCase):
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             check=True,
-            text=True
+            env=GCLOUD_ENV
         )
     
+    @patch('gcp_vm_inventory.gcp_client.subprocess.run')
+    def test_run_gcloud_command_service_account_key(self, mock_run):
+        """Test that the service account key is given to each command instead of being activated."""
+        mock_run.return_value = MagicMock(stdout=b'[]', stderr=b'')
+        client = GCPClient(self.project_id, service_account_key='key.json')
+        
+        client.run_gcloud_command(["gcloud", "projects", "list", "--format=json"])
+        
+        # Only the command itself is run, with the key in its environment
+        mock_run.assert_called_once()
+        env = mock_run.call_args[1]['env']
+        self.assertEqual(env['CLOUDSDK_AUTH_CREDENTIAL_FILE_OVERRIDE'], os.path.abspath('key.json'))
+    
+    @patch('gcp_vm_inventory.gcp_client.STREAM_CHUNK_SIZE', 5)
+    def test_stream_gcloud_json(self):
+        """Test that the items of a JSON list are parsed while the output is read, across chunks."""
+        items = [{"name": "vm-1", "disks": [{"boot": True}]}, {"name": "vm-2, [x]"}, 3]
+        command = [sys.executable, "-c", f"import json; print(json.dumps({items!r}, indent=2))"]
+        
+        self.assertEqual(list(self.client.stream_gcloud_json(command)), items)
+        
+        # Empty output yields nothing
+        self.assertEqual(list(self.client.stream_gcloud_json([sys.executable, "-c", "pass"])), [])
+        
+        # A failed command raises after the items it output
+        command = [sys.executable, "-c", "import sys; print('[1, 2'); sys.exit('PERMISSION_DENIED')"]
+        stream = self.client.stream_gcloud_json(command, suppress_errors=True)
+        self.assertEqual([next(stream), next(stream)], [1, 2])
+        with self.assertRaises(subprocess.CalledProcessError) as context:
+            next(stream)
+        self.assertIn('PERMISSION_DENIED', context.exception.stderr)
+    
+    @patch('gcp_vm_inventory.gcp_client.subprocess.run')
+    def test_run_gcloud_command_suppress_errors(self, mock_run):
+        """Test that error output is not captured when errors are suppressed."""
+        mock_run.side_effect = subprocess.CalledProcessError(1, "cmd", stderr=None)
+        
+        # Run the command
+        command = ["gcloud", "projects", "list", "--format=json"]
+        result = self.client.run_gcloud_command(command, suppress_errors=True)
+        
+        # Verify the result
+        self.assertIsNone(result)
+        self.assertEqual(mock_run.call_args[1]["stderr"], subprocess.DEVNULL)
+    
+    @patch('gcp_vm_inventory.gcp_client.subprocess.run')
+    def test_run_gcloud_command_cached(self, mock_run):
+        """Test that cached gcloud results are reused and new results are stored."""
+        mock_cache = MagicMock()
+        client = GCPClient(self.project_id, cache=mock_cache)
+        command = ["gcloud", "projects", "list", "--format=json"]
+        
+        # A cache hit does not run gcloud
+        mock_cache.get.return_value = (True, {"key": "cached"})
+        self.assertEqual(client.run_gcloud_command(command), {"key": "cached"})
+        mock_run.assert_not_called()
+        
+        # A cache miss runs gcloud and stores the result
+        mock_cache.get.return_value = (False, None)
+        mock_process = MagicMock()
+        mock_process.stdout = b'{"key": "value"}'
+        mock_run.return_value = mock_process
+        self.assertEqual(client.run_gcloud_command(command), {"key": "value"})
+        mock_cache.set.assert_called_once_with(command, {"key": "value"}, True)
+    
     @patch('gcp_vm_inventory.gcp_client.subprocess.run')
     def test_run_gcloud_command_empty_output(self, mock_run):
         """Test running a gcloud command with empty output."""
         # Mock the subprocess.run result
         mock_process = MagicMock()
-        mock_process.stdout = ''
-        mock_process.stderr = ''
+        mock_process.stdout = b''
+        mock_process.stderr = b''
         mock_run.return_value = mock_process
         
         # Run the command
@@ -66,7 +132,7 @@ class TestGCPClient(unittest.TestCase):
     def test_run_gcloud_command_error(self, mock_run):
         """Test running a gcloud command that fails."""
         # Mock the subprocess.run to raise an exception
-        mock_run.side_effect = subprocess.CalledProcessError(1, "cmd", stderr="Error")
+        mock_run.side_effect = subprocess.CalledProcessError(1, "cmd", stderr=b"Error")
         
         # Run the command
         command = ["gcloud", "projects", "list", "--format=json"]
@@ -80,8 +146,8 @@ class TestGCPClient(unittest.TestCase):
         """Test getting a list of projects."""
         # Mock the subprocess.run result
         mock_process = MagicMock()
-        mock_process.stdout = '[{"projectId": "test-project", "name": "Test Project"}]'
-        mock_process.stderr = ''
+        mock_process.stdout = b'[{"projectId": "test-project", "name": "Test Project"}]'
+        mock_process.stderr = b''
         mock_run.return_value = mock_process
         
         # Get projects
@@ -91,27 +157,98 @@ class TestGCPClient(unittest.TestCase):
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0]["projectId"], "test-project")
         self.assertEqual(result[0]["name"], "Test Project")
+        
+        # The projects are listed once per client until the cache is invalidated
+        self.assertEqual(self.client.get_projects(), result)
+        mock_run.assert_called_once()
+        self.client.invalidate_projects_cache()
+        self.client.get_projects()
+        self.assertEqual(mock_run.call_count, 2)
     
-    @patch('gcp_vm_inventory.gcp_client.bigquery.Client')
-    def test_get_bigquery_client(self, mock_bq_client):
+    @patch('gcp_vm_inventory.gcp_client.get_credentials')
+    @patch('google.cloud.bigquery.Client')
+    def test_get_bigquery_client(self, mock_bq_client, mock_get_credentials):
         """Test getting a BigQuery client."""
-        # Mock the BigQuery client
+        # Mock the BigQuery client and the shared credentials
         mock_client = MagicMock()
         mock_bq_client.return_value = mock_client
+        mock_credentials = MagicMock()
+        mock_get_credentials.return_value = mock_credentials
         
-        # Get the BigQuery client
-        result = self.client.get_bigquery_client()
+        # Get the BigQuery client, without application credentials for a shared session
+        with patch.object(self.client, '_get_authorized_session', return_value=None):
+            result = self.client.get_bigquery_client()
         
         # Verify the result
         self.assertEqual(result, mock_client)
-        mock_bq_client.assert_called_once_with(project=self.project_id)
+        mock_get_credentials.assert_called_once_with(None)
+        mock_bq_client.assert_called_once_with(project=self.project_id, credentials=mock_credentials)
+        mock_client._http.mount.assert_called_once()
+        
+        # The client is reused for the same project and created once for another one
+        with patch.object(self.client, '_get_authorized_session', return_value=None):
+            self.assertEqual(self.client.get_bigquery_client(self.project_id), mock_client)
+            self.client.get_bigquery_client("other-project")
+            self.client.get_bigquery_client("other-project")
+        self.assertEqual(mock_bq_client.call_count, 2)
+        mock_bq_client.assert_called_with(project="other-project", credentials=mock_credentials)
+    
+    @patch('google.cloud.bigquery.Client')
+    def test_get_bigquery_client_shared_session(self, mock_bq_client):
+        """Test that BigQuery clients of all projects share the authorized session."""
+        mock_session = MagicMock()
+        
+        with patch.object(self.client, '_get_authorized_session', return_value=mock_session):
+            self.client.get_bigquery_client(self.project_id)
+            self.client.get_bigquery_client("other-project")
+        
+        # Verify the result
+        mock_bq_client.assert_called_with(
+            project="other-project", credentials=mock_session.credentials, _http=mock_session
+        )
+        self.assertEqual(mock_bq_client.call_count, 2)
+    
+    def test_compute_aggregated_list(self):
+        """Test listing a resource of every zone with paged aggregatedList calls."""
+        mock_session = MagicMock()
+        first_page = MagicMock(status_code=200)
+        first_page.json.return_value = {
+            "items": {
+                "zones/us-central1-a": {"instances": [{"name": "vm-1"}]},
+                "zones/us-central1-b": {"warning": {"code": "NO_RESULTS_ON_PAGE"}}
+            },
+            "nextPageToken": "token"
+        }
+        second_page = MagicMock(status_code=200)
+        second_page.json.return_value = {"items": {"zones/europe-west1-b": {"instances": [{"name": "vm-2"}]}}}
+        mock_session.get.side_effect = [first_page, second_page]
+        
+        with patch.object(self.client, '_get_authorized_session', return_value=mock_session):
+            result = self.client.compute_aggregated_list(self.project_id, "instances", "name")
+        
+        # Verify the result
+        self.assertEqual(result, [{"name": "vm-1"}, {"name": "vm-2"}])
+        self.assertEqual(mock_session.get.call_count, 2)
+        params = mock_session.get.call_args[1]["params"]
+        self.assertEqual(params["fields"], "nextPageToken,items/*/instances(name)")
+        self.assertEqual(params["pageToken"], "token")
+    
+    def test_compute_aggregated_list_unavailable(self):
+        """Test that None is returned so callers fall back to gcloud."""
+        with patch.object(self.client, '_get_authorized_session', return_value=None):
+            self.assertIsNone(self.client.compute_aggregated_list(self.project_id, "instances"))
+        
+        mock_session = MagicMock()
+        mock_session.get.return_value = MagicMock(status_code=403)
+        with patch.object(self.client, '_get_authorized_session', return_value=mock_session):
+            self.assertIsNone(self.client.compute_aggregated_list(self.project_id, "instances"))
     
     @patch('gcp_vm_inventory.gcp_client.subprocess.run')
     def test_check_api_status_enabled(self, mock_run):
         """Test checking API status when API is enabled."""
         # Mock the subprocess.run result
         mock_process = MagicMock()
-        mock_process.stdout = 'ENABLED'
+        mock_process.stdout = 'bigquery.googleapis.com\ncompute.googleapis.com\n'
         mock_process.stderr = ''
         mock_run.return_value = mock_process
         
@@ -121,6 +258,29 @@ class TestGCPClient(unittest.TestCase):
         # Verify the result
         self.assertEqual(result, "OK")
     
+    @patch('gcp_vm_inventory.gcp_client.subprocess.run')
+    def test_check_api_statuses(self, mock_run):
+        """Test checking several APIs with a single gcloud call."""
+        # Mock the subprocess.run result
+        mock_process = MagicMock()
+        mock_process.stdout = 'bigquery.googleapis.com\ncompute.googleapis.com\n'
+        mock_process.stderr = ''
+        mock_run.return_value = mock_process
+        
+        # Check API status
+        result = self.client.check_api_statuses(
+            self.project_id, ["compute.googleapis.com", "sqladmin.googleapis.com"]
+        )
+        
+        # Verify the result
+        self.assertEqual(result, {"compute.googleapis.com": "OK", "sqladmin.googleapis.com": "MISSING"})
+        mock_run.assert_called_once()
+        self.assertIn("--enabled", mock_run.call_args[0][0])
+        
+        # The enabled APIs of the project are listed only once
+        self.assertEqual(self.client.check_api_status(self.project_id, "bigquery.googleapis.com"), "OK")
+        mock_run.assert_called_once()
+    
     @patch('gcp_vm_inventory.gcp_client.subprocess.run')
     def test_check_api_status_disabled(self, mock_run):
         """Test checking API status when API is disabled."""
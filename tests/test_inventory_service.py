@@ -0,0 +1,171 @@
+"""
+Unit tests for the Inventory Service module.
+"""
+
+import unittest
+import csv
+import json
+import shutil
+import tempfile
+from datetime import datetime
+from unittest.mock import patch
+import orjson
+import sys
+import os
+
+# Add the parent directory to the path so we can import the package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from gcp_vm_inventory.inventory_service import InventoryService
+from gcp_vm_inventory.models import BigQueryDatasetInfo, InventoryResult
+
+
+class TestInventoryService(unittest.TestCase):
+    """Test cases for the InventoryService class."""
+    
+    def setUp(self):
+        """Set up test environment."""
+        self.output_dir = tempfile.mkdtemp()
+        
+        # Avoid creating real GCP clients
+        patcher = patch('gcp_vm_inventory.inventory_service.GCPClient')
+        self.mock_client_class = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.service = InventoryService(project_id='test-project')
+        
+        self.datasets = [
+            BigQueryDatasetInfo(
+                project_id='test-project',
+                dataset_id=f'dataset_{index}',
+                location='US',
+                table_count=index,
+                total_size_gb=0.5
+            )
+            for index in range(3)
+        ]
+    
+    def tearDown(self):
+        """Clean up test environment."""
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+    
+    def _output_file(self, extension):
+        """Get the path of the single output file with an extension."""
+        return self._output_file_in(self.output_dir, extension)
+    
+    def _output_file_in(self, directory, extension):
+        """Get the path of the single file with an extension in a directory."""
+        filenames = [name for name in os.listdir(directory) if name.endswith(extension)]
+        self.assertEqual(len(filenames), 1)
+        return os.path.join(directory, filenames[0])
+    
+    def test_check_api_status(self):
+        """Test that APIs are checked for every project, with results in project and API order."""
+        mock_client = self.mock_client_class.return_value
+        mock_client.get_projects.return_value = [{'projectId': 'project-1'}, {'projectId': 'project-2'}]
+        mock_client.check_api_statuses.side_effect = (
+            lambda project_id, api_ids: {api_id: "OK" if project_id == 'project-1' else "MISSING" for api_id in api_ids}
+        )
+        
+        # Check the API status of all projects
+        result = self.service.check_api_status()
+        
+        # Verify the result
+        self.assertEqual(len(result), 8)
+        self.assertEqual([status.project_id for status in result], ['project-1'] * 4 + ['project-2'] * 4)
+        self.assertEqual(result[0].api_id, 'compute.googleapis.com')
+        self.assertTrue(all(status.status == "OK" for status in result[:4]))
+        self.assertTrue(all(status.status == "MISSING" for status in result[4:]))
+        
+        # The enabled APIs are listed once per project
+        self.assertEqual(mock_client.check_api_statuses.call_count, 2)
+    
+    def test_collect_all_inventory(self):
+        """Test that every collector's result ends up in the inventory result."""
+        with patch.object(self.service, 'check_api_status', return_value=['api']), \
+                patch.object(self.service, 'collect_vm_inventory', return_value=['vm']), \
+                patch.object(self.service, 'collect_bigquery_inventory', return_value=self.datasets), \
+                patch.object(self.service, 'collect_sql_inventory', return_value=['sql']), \
+                patch.object(self.service, 'collect_gke_inventory', return_value=['gke']):
+            result = self.service.collect_all_inventory(skip_disabled_apis=True)
+        
+        # Verify the result
+        self.assertEqual(result.api_status, ['api'])
+        self.assertEqual(result.vms, ['vm'])
+        self.assertEqual(result.bigquery_datasets, self.datasets)
+        self.assertEqual(result.sql_instances, ['sql'])
+        self.assertEqual(result.gke_clusters, ['gke'])
+    
+    def test_export_to_csv_generator(self):
+        """Test exporting a generator of items to CSV."""
+        filename = self.service.export_to_csv(
+            (dataset for dataset in self.datasets), self.output_dir, 'bigquery_inventory'
+        )
+        
+        # Verify the result
+        with open(filename, newline='') as csv_file:
+            rows = list(csv.DictReader(csv_file))
+        self.assertEqual([row['dataset_id'] for row in rows], ['dataset_0', 'dataset_1', 'dataset_2'])
+        self.assertIsNone(self.service.export_to_csv(iter([]), self.output_dir, 'bigquery_inventory'))
+    
+    def test_export_all(self):
+        """Test that a full inventory is exported to one run directory with one timestamp."""
+        result = InventoryResult(timestamp=datetime.now(), bigquery_datasets=self.datasets)
+        
+        filenames = self.service.export_all(result, self.output_dir)
+        
+        # Verify the result
+        self.assertEqual(len(filenames), 2)
+        self.assertEqual(len({os.path.dirname(filename) for filename in filenames}), 1)
+        self.assertEqual(
+            sorted(os.path.basename(filename) for filename in filenames),
+            [f"bigquery_inventory_{self.service._run_timestamp}.csv", f"inventory_{self.service._run_timestamp}.json"]
+        )
+        
+        # The JSON output has the content of the result's dictionary
+        with open(self._output_file_in(os.path.dirname(filenames[0]), '.json')) as json_file:
+            self.assertEqual(json.load(json_file), result.to_dict())
+    
+    def test_export_inventory(self):
+        """Test exporting a generator of items to CSV and JSON."""
+        count = self.service.export_inventory(
+            (dataset for dataset in self.datasets), self.output_dir, 'bigquery_inventory', 'both'
+        )
+        
+        # Verify the result
+        self.assertEqual(count, 3)
+        with open(self._output_file('.csv'), newline='') as csv_file:
+            rows = list(csv.DictReader(csv_file))
+        self.assertEqual([row['dataset_id'] for row in rows], ['dataset_0', 'dataset_1', 'dataset_2'])
+        
+        # The JSON output matches a dump of the whole list
+        with open(self._output_file('.json'), 'rb') as json_file:
+            content = json_file.read()
+        self.assertEqual(
+            content, orjson.dumps([dataset.to_dict() for dataset in self.datasets], option=orjson.OPT_INDENT_2)
+        )
+        self.assertEqual(json.loads(content), [dataset.to_dict() for dataset in self.datasets])
+    
+    def test_export_inventory_interrupted(self):
+        """Test that items written before an interruption are kept in valid files."""
+        def interrupted():
+            yield self.datasets[0]
+            raise KeyboardInterrupt
+        
+        with self.assertRaises(KeyboardInterrupt):
+            self.service.export_inventory(interrupted(), self.output_dir, 'bigquery_inventory', 'json')
+        
+        # Verify the result
+        with open(self._output_file('.json')) as json_file:
+            self.assertEqual(json.load(json_file), [self.datasets[0].to_dict()])
+    
+    def test_export_inventory_empty(self):
+        """Test that no files are created for an empty inventory."""
+        count = self.service.export_inventory(iter([]), self.output_dir, 'bigquery_inventory', 'both')
+        
+        # Verify the result
+        self.assertEqual(count, 0)
+        self.assertEqual(os.listdir(self.output_dir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,264 @@
+"""
+Unit tests for the GCP Resources module.
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+# Add the parent directory to the path so we can import the package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from gcp_vm_inventory.resources import (
+    _collect_all_projects, extract_bigquery_info, get_bigquery_dataset_size, get_projects_with_assets,
+    get_sql_instances, list_rest_resources
+)
+
+
+def make_response(status_code, page=None):
+    """Create a mock HTTP response returning a JSON page."""
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = page
+    return response
+
+
+class TestListRestResources(unittest.TestCase):
+    """Test cases for the list_rest_resources function."""
+    
+    def setUp(self):
+        """Set up test environment."""
+        patcher = patch('gcp_vm_inventory.resources.get_authorized_session')
+        self.mock_get_session = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.session = self.mock_get_session.return_value
+        self.url = "https://sqladmin.googleapis.com/v1/projects/test-project/instances"
+    
+    def test_pages(self):
+        """Test that every page is listed, following the page tokens."""
+        pages = [
+            make_response(200, {'items': [{'name': 'a'}, {'name': 'b'}], 'nextPageToken': 'token'}),
+            make_response(200, {'items': [{'name': 'c'}]})
+        ]
+        params_seen = []
+        
+        def get(url, params=None, timeout=None):
+            # The parameters are updated in place between pages
+            params_seen.append(dict(params))
+            return pages.pop(0)
+        self.session.get.side_effect = get
+        
+        result = list_rest_resources(self.url, 'items', 'items(name)', 'key.json')
+        
+        # Verify the result
+        self.assertEqual(result, [{'name': 'a'}, {'name': 'b'}, {'name': 'c'}])
+        self.assertEqual(params_seen, [{'fields': 'items(name)'}, {'fields': 'items(name)', 'pageToken': 'token'}])
+        self.mock_get_session.assert_called_once_with('key.json')
+    
+    def test_empty(self):
+        """Test that a response without items is an empty list, not a failure."""
+        self.session.get.return_value = make_response(200, {})
+        self.assertEqual(list_rest_resources(self.url, 'items'), [])
+        self.assertEqual(self.session.get.call_args[1]['params'], {})
+    
+    def test_fallback(self):
+        """Test that None is returned, for gcloud to be used, when the API cannot be called."""
+        # Error response
+        self.session.get.return_value = make_response(403)
+        self.assertIsNone(list_rest_resources(self.url, 'items'))
+        
+        # Error on a later page
+        self.session.get.side_effect = [make_response(200, {'items': [1], 'nextPageToken': 'token'}), make_response(500)]
+        self.assertIsNone(list_rest_resources(self.url, 'items'))
+        
+        # Connection error
+        self.session.get.side_effect = ConnectionError("Connection refused")
+        self.assertIsNone(list_rest_resources(self.url, 'items'))
+        
+        # No credentials
+        self.mock_get_session.return_value = None
+        self.assertIsNone(list_rest_resources(self.url, 'items'))
+
+
+class TestGetSQLInstances(unittest.TestCase):
+    """Test cases for the get_sql_instances function."""
+    
+    @patch('gcp_vm_inventory.resources.run_gcloud_command')
+    @patch('gcp_vm_inventory.resources.list_rest_resources')
+    def test_get_sql_instances(self, mock_list_rest_resources, mock_run):
+        """Test that SQL instances are listed with the API, falling back to gcloud."""
+        mock_list_rest_resources.return_value = [{'name': 'db'}]
+        self.assertEqual(get_sql_instances('test-project'), [{'name': 'db'}])
+        mock_run.assert_not_called()
+        
+        # The API cannot be called directly
+        mock_list_rest_resources.return_value = None
+        mock_run.return_value = [{'name': 'db'}]
+        self.assertEqual(get_sql_instances('test-project', 'key.json'), [{'name': 'db'}])
+        command = mock_run.call_args[0][0]
+        self.assertEqual(command[:4], ["gcloud", "sql", "instances", "list"])
+        self.assertIn('test-project', command)
+        self.assertEqual(mock_run.call_args[1]['service_account_key'], 'key.json')
+
+
+class TestBigQueryInfo(unittest.TestCase):
+    """Test cases for the BigQuery functions."""
+    
+    @patch('gcp_vm_inventory.resources.list_bigquery_tables')
+    @patch('gcp_vm_inventory.resources.get_bigquery_dataset_stats')
+    def test_get_bigquery_dataset_size(self, mock_stats, mock_list_tables):
+        """Test that the tables are only listed when the __TABLES__ query fails."""
+        mock_stats.return_value = (2, 1024)
+        self.assertEqual(get_bigquery_dataset_size('client', 'test-project', 'dataset'), (2, 1024))
+        mock_list_tables.assert_not_called()
+        
+        # The query failed
+        mock_stats.return_value = None
+        mock_list_tables.return_value = [{'numBytes': 1024}, {'numBytes': None}, {'numBytes': 2048}]
+        self.assertEqual(get_bigquery_dataset_size('client', 'test-project', 'dataset'), (3, 3072))
+        mock_list_tables.assert_called_once_with('client', 'test-project', 'dataset')
+    
+    @patch('gcp_vm_inventory.resources.get_bigquery_dataset_size')
+    @patch('gcp_vm_inventory.resources.get_bigquery_client')
+    @patch('gcp_vm_inventory.resources.get_bigquery_datasets')
+    def test_extract_bigquery_info(self, mock_get_datasets, mock_get_client, mock_get_size):
+        """Test that the dataset sizes are fetched concurrently and joined in dataset order."""
+        mock_get_datasets.return_value = [
+            {
+                'datasetReference': {'datasetId': dataset_id, 'projectId': 'test-project'},
+                'location': 'US',
+                'creationTime': 1000.0,
+                'lastModifiedTime': 2000.0
+            }
+            for dataset_id in ('first', 'failed', 'last')
+        ]
+        sizes = {'first': (1, 1 << 30), 'last': (3, 3 << 30)}
+        
+        def get_size(client, project_id, dataset_id):
+            if dataset_id not in sizes:
+                raise RuntimeError("Access Denied")
+            return sizes[dataset_id]
+        mock_get_size.side_effect = get_size
+        
+        result = extract_bigquery_info('test-project')
+        
+        # Verify the result
+        self.assertEqual(result, [
+            {
+                'project_id': 'test-project',
+                'dataset_id': 'first',
+                'location': 'US',
+                'creation_time': 1000.0,
+                'last_modified_time': 2000.0,
+                'table_count': 1,
+                'total_size_gb': 1.0
+            },
+            {
+                'project_id': 'test-project',
+                'dataset_id': 'last',
+                'location': 'US',
+                'creation_time': 1000.0,
+                'last_modified_time': 2000.0,
+                'table_count': 3,
+                'total_size_gb': 3.0
+            }
+        ])
+        self.assertEqual(mock_get_size.call_count, 3)
+
+
+class TestCollectAllProjects(unittest.TestCase):
+    """Test cases for the _collect_all_projects function."""
+    
+    def setUp(self):
+        """Set up test environment."""
+        patcher = patch('gcp_vm_inventory.resources.get_projects')
+        self.mock_get_projects = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mock_get_projects.return_value = [{'projectId': f'project-{index}'} for index in range(3)]
+        
+        self.collect_project = MagicMock(side_effect=lambda project_id, key: [project_id])
+    
+    @patch('gcp_vm_inventory.resources.get_projects_with_assets')
+    def test_asset_search(self, mock_get_projects_with_assets):
+        """Test that only the projects kept by the asset search are collected."""
+        mock_get_projects_with_assets.return_value = {'project-0', 'project-2'}
+        
+        result = _collect_all_projects(self.collect_project, asset_type='sqladmin.googleapis.com/Instance')
+        
+        # Verify the result
+        self.assertEqual(result, ['project-0', 'project-2'])
+        mock_get_projects_with_assets.assert_called_once_with(
+            'sqladmin.googleapis.com/Instance', self.mock_get_projects.return_value, None
+        )
+    
+    @patch('gcp_vm_inventory.resources.get_projects_with_assets')
+    def test_asset_search_unavailable(self, mock_get_projects_with_assets):
+        """Test that every project is collected when no organization can be searched."""
+        mock_get_projects_with_assets.return_value = None
+        
+        result = _collect_all_projects(self.collect_project, asset_type='sqladmin.googleapis.com/Instance')
+        
+        # Verify the result
+        self.assertEqual(result, ['project-0', 'project-1', 'project-2'])
+        
+        # Without asset type, no search is made
+        self.assertEqual(_collect_all_projects(self.collect_project), ['project-0', 'project-1', 'project-2'])
+        mock_get_projects_with_assets.assert_called_once()
+
+
+class TestGetProjectsWithAssets(unittest.TestCase):
+    """Test cases for the get_projects_with_assets function."""
+    
+    def setUp(self):
+        """Set up test environment."""
+        patcher = patch('gcp_vm_inventory.resources.get_organization_info')
+        self.mock_get_organization_info = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mock_get_organization_info.return_value = [{'name': 'organizations/100'}]
+    
+        patcher = patch('gcp_vm_inventory.resources.run_gcloud_command')
+        self.mock_run = patcher.start()
+        self.addCleanup(patcher.stop)
+    
+        self.projects = [
+            {'projectId': 'with-assets', 'projectNumber': '1', 'parent': {'type': 'organization', 'id': '100'}},
+            {'projectId': 'without-assets', 'projectNumber': '2', 'parent': {'type': 'organization', 'id': '100'}},
+            {'projectId': 'other-organization', 'projectNumber': '3', 'parent': {'type': 'organization', 'id': '200'}},
+            {'projectId': 'in-folder', 'projectNumber': '4', 'parent': {'type': 'folder', 'id': '300'}},
+            {'projectId': 'no-organization', 'projectNumber': '5'}
+        ]
+    
+    def test_filters_searched_organization(self):
+        """Test that only the projects of a searched organization are filtered."""
+        self.mock_run.return_value = "projects/1\nprojects/1\n"
+    
+        result = get_projects_with_assets('sqladmin.googleapis.com/Instance', self.projects)
+    
+        # Verify the result
+        self.assertEqual(result, {'with-assets', 'other-organization', 'in-folder', 'no-organization'})
+        command = self.mock_run.call_args[0][0]
+        self.assertIn('--scope=organizations/100', command)
+        self.assertIn('--asset-types=sqladmin.googleapis.com/Instance', command)
+    
+    def test_no_organization_searched(self):
+        """Test that None is returned when no organization can be searched."""
+        self.mock_run.return_value = None
+        self.assertIsNone(get_projects_with_assets('sqladmin.googleapis.com/Instance', self.projects))
+    
+        self.mock_get_organization_info.return_value = None
+        self.assertIsNone(get_projects_with_assets('sqladmin.googleapis.com/Instance', self.projects))
+    
+    def test_failed_organization_kept(self):
+        """Test that the projects of an organization that cannot be searched are kept."""
+        self.mock_get_organization_info.return_value = [{'name': 'organizations/100'}, {'name': 'organizations/200'}]
+        self.mock_run.side_effect = ["projects/1\n", None]
+    
+        result = get_projects_with_assets('sqladmin.googleapis.com/Instance', self.projects)
+    
+        # Verify the result
+        self.assertEqual(result, {'with-assets', 'other-organization', 'in-folder', 'no-organization'})
+
+
+if __name__ == '__main__':
+    unittest.main()
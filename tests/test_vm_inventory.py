@@ -3,6 +3,9 @@ Unit tests for the VM Inventory module.
 """
 
 import unittest
+import subprocess
+import threading
+import time
 from unittest.mock import patch, MagicMock
 import sys
 import os
@@ -135,6 +138,68 @@ class TestVMInventory(unittest.TestCase):
         self.assertEqual(machine_info.cpu_count, 0)
         self.assertEqual(machine_info.memory_mb, 0)
     
+    def test_prefetch_machine_types(self):
+        """Test that machine types are listed once per project and then served from the cache."""
+        # Mock the client's run_gcloud_command method with the machine types list
+        self.mock_client.compute_aggregated_list.return_value = None
+        self.mock_client.run_gcloud_command.return_value = [
+            {'name': 'n1-standard-2', 'zone': 'us-central1-a', 'guestCpus': 2, 'memoryMb': 7680},
+            {'name': 'n1-standard-2', 'zone': 'us-central1-b', 'guestCpus': 2, 'memoryMb': 7680}
+        ]
+        
+        # Prefetch the machine types of two VMs using the same type
+        self.vm_inventory.prefetch_machine_types('test-project', [self.sample_vm, dict(self.sample_vm)])
+        
+        # Verify the result
+        self.mock_client.run_gcloud_command.assert_called_once()
+        command = self.mock_client.run_gcloud_command.call_args[0][0]
+        self.assertIn('list', command)
+        self.assertIn('--filter=zone:(us-central1-a) AND name:(n1-standard-2)', command)
+        
+        machine_info = self.vm_inventory.get_machine_type_info('test-project', 'us-central1-a', 'n1-standard-2')
+        self.assertEqual(machine_info.cpu_count, 2)
+        self.assertEqual(machine_info.memory_mb, 7680)
+        self.mock_client.run_gcloud_command.assert_called_once()
+        
+        # Nothing is fetched again for machine types already known
+        self.vm_inventory.prefetch_machine_types('test-project', [self.sample_vm])
+        self.mock_client.run_gcloud_command.assert_called_once()
+    
+    def test_prefetch_machine_types_api(self):
+        """Test that machine types are fetched with one filtered Compute Engine API request."""
+        self.mock_client.compute_aggregated_list.return_value = [
+            {'name': 'n1-standard-2', 'zone': 'https://www.googleapis.com/compute/v1/projects/p/zones/us-central1-a',
+             'guestCpus': 2, 'memoryMb': 7680}
+        ]
+        
+        self.vm_inventory.prefetch_machine_types('test-project', [self.sample_vm])
+        
+        # Verify the result
+        args = self.mock_client.compute_aggregated_list.call_args[0]
+        self.assertEqual(args[1], 'machineTypes')
+        self.assertEqual(args[3], 'name eq "(n1-standard-2)"')
+        self.mock_client.run_gcloud_command.assert_not_called()
+        machine_info = self.vm_inventory.get_machine_type_info('test-project', 'us-central1-a', 'n1-standard-2')
+        self.assertEqual(machine_info.cpu_count, 2)
+    
+    def test_get_vms_in_project(self):
+        """Test that VMs are listed with the Compute Engine API, falling back to gcloud."""
+        self.mock_client.compute_aggregated_list.return_value = [self.sample_vm]
+        self.assertEqual(self.vm_inventory.get_vms_in_project('test-project'), [self.sample_vm])
+        self.mock_client.run_gcloud_command.assert_not_called()
+        
+        # The API cannot be called directly
+        self.mock_client.compute_aggregated_list.return_value = None
+        self.mock_client.run_gcloud_command.return_value = [self.sample_vm]
+        self.assertEqual(self.vm_inventory.get_vms_in_project('test-project'), [self.sample_vm])
+        self.mock_client.run_gcloud_command.assert_called_once()
+        
+        # Without cache, the gcloud output is streamed
+        self.mock_client.cache = None
+        self.mock_client.stream_gcloud_json.return_value = iter([self.sample_vm])
+        self.assertEqual(list(self.vm_inventory.get_vms_in_project('test-project')), [self.sample_vm])
+        self.mock_client.run_gcloud_command.assert_called_once()
+    
     @patch('gcp_vm_inventory.vm_inventory.VMInventory.get_vms_in_project')
     @patch('gcp_vm_inventory.vm_inventory.VMInventory.extract_vm_info')
     def test_collect_vm_inventory_single_project(self, mock_extract_vm_info, mock_get_vms):
@@ -200,6 +265,109 @@ class TestVMInventory(unittest.TestCase):
         self.assertEqual(mock_get_vms.call_count, 2)
         self.assertEqual(mock_extract_vm_info.call_count, 2)
 
+    
+    @patch('gcp_vm_inventory.vm_inventory.VMInventory.get_vms_in_project')
+    @patch('gcp_vm_inventory.vm_inventory.VMInventory.extract_vm_info')
+    def test_collect_vm_inventory_extract_error(self, mock_extract_vm_info, mock_get_vms):
+        """Test that a VM failing extraction is skipped without stopping the collection."""
+        mock_get_vms.return_value = [self.sample_vm, self.sample_vm]
+        mock_vm_info = VMInfo(
+            project_id='test-project',
+            vm_id='1234567890',
+            name='test-vm',
+            zone='us-central1-a',
+            status='RUNNING',
+            machine_type='n1-standard-2'
+        )
+        mock_extract_vm_info.side_effect = [mock_vm_info, ValueError("bad VM")]
+        
+        # Collect VM inventory
+        result = self.vm_inventory.collect_vm_inventory(project_id='test-project')
+        
+        # Verify the result
+        self.assertEqual(result, [mock_vm_info])
+        self.assertEqual(mock_extract_vm_info.call_count, 2)
+    
+    @patch('gcp_vm_inventory.vm_inventory.VMInventory.get_vms_in_project')
+    @patch('gcp_vm_inventory.vm_inventory.VMInventory.extract_vm_info')
+    def test_iter_vm_inventory_project_order(self, mock_extract_vm_info, mock_get_vms):
+        """Test that the VMs of a project are yielded in listing order, whichever is extracted first."""
+        mock_get_vms.return_value = [{'name': f'vm-{index}'} for index in range(5)]
+        
+        def extract(vm, project_id):
+            # Earlier VMs take longer to extract
+            time.sleep(0.01 * (5 - int(vm['name'][-1])))
+            return vm['name']
+        mock_extract_vm_info.side_effect = extract
+        
+        # Collect VM inventory
+        result = list(self.vm_inventory.iter_vm_inventory(project_id='test-project'))
+        
+        # Verify the result
+        self.assertEqual(result, [f'vm-{index}' for index in range(5)])
+    
+    @patch('gcp_vm_inventory.vm_inventory.VMInventory.get_vms_in_project')
+    @patch('gcp_vm_inventory.vm_inventory.VMInventory.extract_vm_info')
+    def test_iter_vm_inventory_early_stop(self, mock_extract_vm_info, mock_get_vms):
+        """Test that no thread is left running when the consumer stops early."""
+        self.mock_client.get_projects.return_value = [{'projectId': f'project-{index}'} for index in range(50)]
+        mock_get_vms.return_value = [self.sample_vm] * 100
+        mock_extract_vm_info.return_value = 'vm'
+        thread_count = threading.active_count()
+        
+        # Stop after the first VM
+        vms = self.vm_inventory.iter_vm_inventory()
+        self.assertEqual(next(vms), 'vm')
+        vms.close()
+        
+        # Verify the result
+        self.assertEqual(threading.active_count(), thread_count)
+        self.assertLess(mock_extract_vm_info.call_count, 50 * 100)
+    
+    @patch('gcp_vm_inventory.vm_inventory.QUEUE_SIZE', 4)
+    @patch('gcp_vm_inventory.vm_inventory.VMInventory.get_vms_in_project')
+    @patch('gcp_vm_inventory.vm_inventory.VMInventory.extract_vm_info')
+    def test_iter_vm_inventory_bounded(self, mock_extract_vm_info, mock_get_vms):
+        """Test that a slow consumer holds back the extraction of further VMs."""
+        mock_get_vms.return_value = [self.sample_vm] * 100
+        mock_extract_vm_info.return_value = 'vm'
+        
+        vms = self.vm_inventory.iter_vm_inventory(project_id='test-project')
+        self.assertEqual(next(vms), 'vm')
+        time.sleep(0.2)
+        
+        # The queue, the VM being put and the VM consumed
+        self.assertLessEqual(mock_extract_vm_info.call_count, 4 + 2)
+        
+        # The remaining VMs are yielded once consumed
+        self.assertEqual(len(list(vms)), 99)
+    
+    @patch('gcp_vm_inventory.vm_inventory.QUEUE_SIZE', 4)
+    @patch('gcp_vm_inventory.vm_inventory.VMInventory.get_vms_in_project')
+    @patch('gcp_vm_inventory.vm_inventory.VMInventory.extract_vm_info')
+    def test_iter_vm_inventory_streamed(self, mock_extract_vm_info, mock_get_vms):
+        """Test that streamed VMs are read as they are consumed, up to a failed listing."""
+        listed = []
+        
+        def stream():
+            for index in range(1000):
+                listed.append(index)
+                yield {'name': f'vm-{index}'}
+            raise subprocess.CalledProcessError(1, 'gcloud')
+        mock_get_vms.return_value = stream()
+        mock_extract_vm_info.side_effect = lambda vm, project_id: vm['name']
+        
+        vms = self.vm_inventory.iter_vm_inventory(project_id='test-project')
+        self.assertEqual(next(vms), 'vm-0')
+        time.sleep(0.2)
+        
+        # The queue and the batches being put and prefetched
+        self.assertLess(len(listed), 20)
+        
+        # The VMs listed before the failure are yielded, and the failure is reported
+        with self.assertLogs('gcp_vm_inventory.vm_inventory', 'ERROR') as logs:
+            self.assertEqual(list(vms), [f'vm-{index}' for index in range(1, 1000)])
+        self.assertIn('Could not list the VMs of project test-project', logs.output[0])
 
 if __name__ == '__main__':
     unittest.main()